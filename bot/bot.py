@@ -10,14 +10,27 @@ Telegram бот для системы управления задачами.
 с Django REST API.
 """
 
+import asyncio
 import logging
 import os
+import time
+from collections import OrderedDict
+from html import escape
+
 import aiohttp
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.types import Message
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardButton, Message, Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+from pydantic import ValidationError
 from aiogram.filters import Command
+from aiogram.filters.callback_data import CallbackData
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from dotenv import load_dotenv
 
 # Загрузка переменных из .env
@@ -26,16 +39,256 @@ load_dotenv()
 API_TOKEN = os.getenv("BOT_TOKEN")
 DJANGO_API_URL = os.getenv("DJANGO_API", "http://127.0.0.1:8000/api/")
 
+# Параметры соединений с Django API
+DJANGO_API_CONNECTIONS = int(os.getenv("DJANGO_API_CONNECTIONS", "20"))
+DJANGO_API_KEEPALIVE = float(os.getenv("DJANGO_API_KEEPALIVE", "30"))
+DJANGO_API_TIMEOUT = float(os.getenv("DJANGO_API_TIMEOUT", "10"))
+
+# Сколько хранится страница задач для перепроверки по ETag (секунды)
+TASKS_CACHE_TTL = float(os.getenv("TASKS_CACHE_TTL", "30"))
+TASKS_CACHE_SIZE = int(os.getenv("TASKS_CACHE_SIZE", "10000"))
+
+# Количество задач на одной странице сообщения /tasks
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", "10"))
+
+# Режим получения обновлений: "polling" или "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+# Параметры режима webhook
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+# Регистрировать webhook при старте (достаточно одной реплики)
+WEBHOOK_REGISTER = os.getenv("WEBHOOK_REGISTER", "1") == "1"
+# Число одновременно обрабатываемых обновлений и размер очереди ожидания
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "50"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+
+# Адрес Bot API (для локального сервера Bot API или тестового стенда)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
 # Инициализация бота
 logging.basicConfig(level=logging.INFO)
 
 bot = Bot(
     token=API_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    if TELEGRAM_API_URL else None,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 dp = Dispatcher()
 
 
+class TTLCache:
+    """
+    Кэш страниц задач пользователей с ограниченным временем жизни.
+
+    Страницы хранятся по пользователю и ключу страницы (курсору) вместе
+    с ETag ответа Django API. Кэш не считается свежим сам по себе:
+    страница отдается только после перепроверки через If-None-Match,
+    поэтому реплики бота за балансировщиком не показывают устаревшие
+    задачи. Время жизни лишь ограничивает, сколько страница хранится
+    для перепроверки. Хранит не более ``max_size`` пользователей,
+    вытесняя давно использованных. Страницы пользователя сбрасываются
+    целиком через invalidate, например после завершения задачи.
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, telegram_id, key):
+        """Возвращает страницу или None, если её нет или срок хранения истёк."""
+        pages = self.entries.get(telegram_id)
+        entry = pages.get(key) if pages else None
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del pages[key]
+            return None
+        self.entries.move_to_end(telegram_id)
+        return value
+
+    def set(self, telegram_id, key, value):
+        """Сохраняет страницу пользователя."""
+        pages = self.entries.setdefault(telegram_id, {})
+        pages[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(telegram_id)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, telegram_id):
+        """Удаляет все страницы пользователя."""
+        self.entries.pop(telegram_id, None)
+
+
+tasks_cache = TTLCache(TASKS_CACHE_TTL, TASKS_CACHE_SIZE)
+
+# Сессия для запросов к Django API, живёт всё время работы бота
+api_session = None
+
+
+@dp.startup()
+async def open_api_session():
+    """
+    Создаёт долгоживущую сессию для запросов к Django API.
+
+    Сессия держит keep-alive соединения, поэтому команды не тратят
+    время на установку нового TCP соединения.
+    """
+    global api_session
+    api_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=DJANGO_API_CONNECTIONS,
+            keepalive_timeout=DJANGO_API_KEEPALIVE,
+        ),
+        timeout=aiohttp.ClientTimeout(total=DJANGO_API_TIMEOUT),
+    )
+
+
+@dp.shutdown()
+async def close_api_session():
+    """Закрывает сессию Django API при остановке бота."""
+    if api_session is not None:
+        await api_session.close()
+
+
+async def fetch_tasks(telegram_id, cursor=""):
+    """
+    Возвращает страницу задач пользователя из Django API.
+
+    В кэш попадают только успешные ответы вместе с их ETag. Сохраненная
+    страница всегда перепроверяется через If-None-Match: если задачи
+    не изменились (в том числе через другую реплику бота или веб),
+    Django API отвечает 304 без тела и страница берется из кэша.
+
+    Args:
+        telegram_id (int): ID пользователя Telegram
+        cursor (str): Курсор страницы ("" для первой страницы)
+
+    Returns:
+        tuple: (HTTP статус, данные страницы или None)
+    """
+    params = {"telegram_id": telegram_id, "page_size": TASKS_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    cached = tasks_cache.get(telegram_id, cursor)
+    headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+    async with api_session.get(
+        f"{DJANGO_API_URL}telegram/tasks/", params=params, headers=headers
+    ) as resp:
+        if resp.status == 304 and cached:
+            etag, data = cached
+        elif resp.status != 200:
+            return resp.status, None
+        else:
+            etag, data = resp.headers.get("ETag"), await resp.json()
+
+    tasks_cache.set(telegram_id, cursor, (etag, data))
+    return 200, data
+
+
+async def complete(telegram_id, task_id):
+    """
+    Отмечает задачу выполненной через Django API.
+
+    Сбрасывает кэш страниц пользователя.
+
+    Args:
+        telegram_id (int): ID пользователя Telegram
+        task_id (int): ID задачи
+
+    Returns:
+        int: HTTP статус ответа
+    """
+    async with api_session.post(
+        f"{DJANGO_API_URL}telegram/complete-task/",
+        json={"telegram_id": telegram_id, "task_id": task_id}
+    ) as resp:
+        status = resp.status
+
+    tasks_cache.invalidate(telegram_id)
+    return status
+
+
+class TasksPage(CallbackData, prefix="tp"):
+    """Callback-данные кнопок перехода между страницами задач."""
+    cursor: str = ""
+
+
+class CompleteTask(CallbackData, prefix="tc"):
+    """Callback-данные кнопки завершения задачи на странице с курсором cursor."""
+    task_id: int
+    cursor: str = ""
+
+
+def render_page(data, cursor=""):
+    """
+    Формирует одно сообщение со страницей задач и клавиатурой.
+
+    Args:
+        data (dict): Страница задач из Django API
+        cursor (str): Курсор текущей страницы
+
+    Returns:
+        tuple: (текст сообщения, InlineKeyboardMarkup)
+    """
+    lines = ["📋 <b>Твои задачи</b>"]
+    builder = InlineKeyboardBuilder()
+    for task in data["results"]:
+        mark = "✅" if task["completed"] else "❌"
+        lines.append(f"{mark} <b>{escape(task['title'])}</b>\n🕓 Срок: {task['deadline']}")
+        if not task["completed"]:
+            builder.row(InlineKeyboardButton(
+                text=f"✔️ {task['title'][:40]}",
+                callback_data=CompleteTask(task_id=task["id"], cursor=cursor).pack(),
+            ))
+
+    navigation = []
+    if data["previous"]:
+        navigation.append(InlineKeyboardButton(
+            text="⬅️ Назад", callback_data=TasksPage(cursor=data["previous"]).pack()
+        ))
+    if data["next"]:
+        navigation.append(InlineKeyboardButton(
+            text="Вперёд ➡️", callback_data=TasksPage(cursor=data["next"]).pack()
+        ))
+    if navigation:
+        builder.row(*navigation)
+    return "\n\n".join(lines), builder.as_markup()
+
+
+async def show_page(callback: CallbackQuery, cursor):
+    """
+    Заменяет сообщение со списком задач страницей с курсором cursor.
+
+    Args:
+        callback (CallbackQuery): Нажатие кнопки под сообщением
+        cursor (str): Курсор страницы
+    """
+    status, data = await fetch_tasks(callback.from_user.id, cursor)
+    if status != 200:
+        await callback.answer("⚠️ Не удалось получить задачи.", show_alert=True)
+        return
+    if not data["results"] and cursor:
+        # Страница опустела (например, после завершения задач) — показываем первую
+        cursor = ""
+        status, data = await fetch_tasks(callback.from_user.id, cursor)
+        if status != 200:
+            await callback.answer("⚠️ Не удалось получить задачи.", show_alert=True)
+            return
+
+    text, markup = render_page(data, cursor)
+    try:
+        await callback.message.edit_text(text, reply_markup=markup)
+    except TelegramBadRequest:
+        pass  # Содержимое сообщения не изменилось
+
+
 @dp.message(Command("start"))
 async def start(message: Message):
     """
@@ -61,41 +314,66 @@ async def tasks(message: Message):
     """
     Обработчик команды /tasks.
     
-    Получает и отображает список задач пользователя из Django API.
+    Получает первую страницу задач пользователя из Django API
+    (или из кэша, если Django API подтвердил её ETag) и отправляет её одним
+    сообщением. Кнопки под сообщением листают страницы и завершают
+    задачи, поэтому число запросов к Telegram не зависит от числа задач.
     Если аккаунт не привязан, показывает инструкции по привязке.
-    Для невыполненных задач добавляет кнопки для завершения.
     
     Args:
         message (Message): Сообщение от пользователя с командой /tasks
     """
     telegram_id = message.from_user.id
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            f"{DJANGO_API_URL}telegram/tasks/?telegram_id={telegram_id}"
-        ) as resp:
-            if resp.status == 200:
-                tasks = await resp.json()
-                if not tasks:
-                    await message.answer("🎉 У тебя пока нет задач!")
-                    return
-
-                for task in tasks:
-                    text = (
-                        f"<b>{task['title']}</b>\n"
-                        f"🕓 Срок: {task['deadline']}\n"
-                        f"{'✅ Выполнена' if task['completed'] else '❌ Не выполнена'}"
-                    )
-                    if not task["completed"]:
-                        text += f"\n\nЧтобы завершить:\n/complete_{task['id']}"
-                    await message.answer(text)
-            elif resp.status == 404:
-                await message.answer(
-                    "🔒 Ты ещё не привязал Telegram к аккаунту.\n\n"
-                    "Напиши /login, чтобы получить код и ввести его на сайте."
-                )
-            else:
-                await message.answer("⚠️ Не удалось получить задачи. Попробуй позже.")
+    status, data = await fetch_tasks(telegram_id)
+    if status == 200:
+        if not data["results"]:
+            await message.answer("🎉 У тебя пока нет задач!")
+            return
+
+        text, markup = render_page(data)
+        await message.answer(text, reply_markup=markup)
+    elif status == 404:
+        await message.answer(
+            "🔒 Ты ещё не привязал Telegram к аккаунту.\n\n"
+            "Напиши /login, чтобы получить код и ввести его на сайте."
+        )
+    else:
+        await message.answer("⚠️ Не удалось получить задачи. Попробуй позже.")
+
+
+@dp.callback_query(TasksPage.filter())
+async def tasks_page(callback: CallbackQuery, callback_data: TasksPage):
+    """
+    Обработчик кнопок "Назад"/"Вперёд" под списком задач.
+
+    Args:
+        callback (CallbackQuery): Нажатие кнопки
+        callback_data (TasksPage): Курсор запрошенной страницы
+    """
+    await show_page(callback, callback_data.cursor)
+    await callback.answer()
+
+
+@dp.callback_query(CompleteTask.filter())
+async def complete_task_button(callback: CallbackQuery, callback_data: CompleteTask):
+    """
+    Обработчик кнопки завершения задачи под списком задач.
+
+    Завершает задачу через Django API и перерисовывает текущую страницу.
+
+    Args:
+        callback (CallbackQuery): Нажатие кнопки
+        callback_data (CompleteTask): ID задачи и курсор текущей страницы
+    """
+    status = await complete(callback.from_user.id, callback_data.task_id)
+    if status == 200:
+        await show_page(callback, callback_data.cursor)
+        await callback.answer("✅ Задача завершена")
+    elif status == 404:
+        await callback.answer("❌ Задача не найдена или не твоя.", show_alert=True)
+    else:
+        await callback.answer("⚠️ Не удалось завершить задачу.", show_alert=True)
 
 
 @dp.message(lambda m: m.text.startswith("/complete_"))
@@ -118,17 +396,13 @@ async def complete_task(message: Message):
         await message.answer("❌ Неверный формат команды. Пример: /complete_5")
         return
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{DJANGO_API_URL}telegram/complete-task/",
-            json={"telegram_id": telegram_id, "task_id": task_id}
-        ) as resp:
-            if resp.status == 200:
-                await message.answer("✅ Задача успешно завершена.")
-            elif resp.status == 404:
-                await message.answer("❌ Задача не найдена или не твоя.")
-            else:
-                await message.answer("⚠️ Не удалось завершить задачу.")
+    status = await complete(telegram_id, task_id)
+    if status == 200:
+        await message.answer("✅ Задача успешно завершена.")
+    elif status == 404:
+        await message.answer("❌ Задача не найдена или не твоя.")
+    else:
+        await message.answer("⚠️ Не удалось завершить задачу.")
 
 
 @dp.message(Command("login"))
@@ -153,12 +427,119 @@ async def login_help(message: Message):
     )
 
 
+class UpdateWorkerPool:
+    """
+    Пул обработчиков обновлений для режима webhook.
+
+    HTTP обработчик только кладёт обновление в ограниченную очередь
+    и сразу отвечает Telegram, а ``workers`` задач параллельно разбирают
+    очередь. Если очередь заполнена, webhook отвечает 503 и Telegram
+    повторит доставку позже — так медленный Django API не приводит
+    к неограниченному росту памяти.
+
+    Attributes:
+        workers (int): Число одновременно обрабатываемых обновлений
+        queue_size (int): Максимальное число обновлений в очереди
+    """
+
+    def __init__(self, dispatcher, bot, workers, queue_size, secret=None):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.secret = secret
+        self.tasks = []
+
+    async def start(self, app=None):
+        """Запускает задачи-обработчики."""
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self, app=None):
+        """Дожидается обработки очереди и останавливает обработчики."""
+        await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def work(self):
+        """Обрабатывает обновления из очереди."""
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception:
+                logging.exception("Ошибка обработки обновления %s", update.update_id)
+            finally:
+                self.queue.task_done()
+
+    async def handle(self, request):
+        """
+        HTTP обработчик webhook.
+
+        Args:
+            request (web.Request): Запрос Telegram с обновлением
+
+        Returns:
+            web.Response: 200, если обновление принято в очередь;
+                400, если тело не является обновлением Telegram;
+                503, если очередь заполнена
+        """
+        if self.secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != self.secret:
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except (ValueError, ValidationError):
+            # Некорректный JSON (ValueError) или не обновление Telegram
+            return web.Response(status=400)
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            return web.Response(status=503, headers={"Retry-After": "1"})
+        return web.Response()
+
+
+def create_webhook_app():
+    """
+    Создаёт aiohttp приложение для приёма обновлений через webhook.
+
+    Приложение не хранит состояние между запросами (кроме кэша),
+    поэтому несколько реплик можно поставить за балансировщик нагрузки.
+
+    Returns:
+        web.Application: Приложение с обработчиком WEBHOOK_PATH
+    """
+    app = web.Application()
+    pool = UpdateWorkerPool(
+        dp, bot, WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE, secret=WEBHOOK_SECRET
+    )
+    app.router.add_post(WEBHOOK_PATH, pool.handle)
+    app.on_startup.append(pool.start)
+    app.on_shutdown.append(pool.stop)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+@dp.startup()
+async def register_webhook():
+    """Регистрирует webhook в Telegram при запуске в режиме webhook."""
+    if BOT_MODE == "webhook" and WEBHOOK_REGISTER and WEBHOOK_URL:
+        await bot.set_webhook(
+            f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            max_connections=100,
+        )
+
+
 if __name__ == "__main__":
     """
     Точка входа для запуска Telegram бота.
     
-    Запускает поллинг для получения обновлений от Telegram API
-    и обработки входящих сообщений.
+    В режиме polling (по умолчанию) запускает поллинг Telegram API.
+    В режиме webhook (BOT_MODE=webhook) запускает HTTP сервер,
+    принимающий обновления от Telegram.
     """
-    import asyncio
-    asyncio.run(dp.start_polling(bot))
\ No newline at end of file
+    if BOT_MODE == "webhook":
+        web.run_app(create_webhook_app(), host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+    else:
+        asyncio.run(dp.start_polling(bot))
@@ -0,0 +1,184 @@
+"""
+Локальный стенд для измерения пропускной способности бота в режиме webhook.
+
+Скрипт поднимает в одном процессе:
+
+1. Фальшивый Telegram Bot API, который принимает вызовы бота
+   (sendMessage, editMessageText, answerCallbackQuery и т.д.) и считает их.
+2. Фальшивый Django API с эндпоинтами telegram/tasks/ и
+   telegram/complete-task/ и настраиваемой задержкой ответа.
+3. Бота из bot.py в режиме webhook, направленного на эти заглушки.
+
+Затем стенд отправляет в webhook заданное число обновлений с заданной
+конкурентностью и печатает пропускную способность и задержки. Сеть
+не нужна.
+
+Использование:
+    python bot/fake_telegram.py --updates 2000 --concurrency 100 \\
+        --command /tasks --django-latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from aiohttp import ClientSession, web
+
+HOST = "127.0.0.1"
+TOKEN = "123456:fake-token"
+
+
+class FakeServer:
+    """
+    Заглушки Telegram Bot API и Django API.
+
+    Attributes:
+        calls (dict): Число вызовов каждого метода Bot API
+        replies (asyncio.Event): Устанавливается, когда бот сделал
+            ожидаемое число ответных вызовов
+    """
+
+    def __init__(self, django_latency, expected_replies):
+        self.django_latency = django_latency
+        self.expected_replies = expected_replies
+        self.calls = {}
+        self.replies = asyncio.Event()
+        self.reply_count = 0
+        self.message_id = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.bot_api)
+        app.router.add_get("/api/telegram/tasks/", self.django_tasks)
+        app.router.add_post("/api/telegram/complete-task/", self.django_complete)
+        return app
+
+    async def bot_api(self, request):
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method in ("sendMessage", "editMessageText"):
+            self.reply_count += 1
+            if self.reply_count >= self.expected_replies:
+                self.replies.set()
+            self.message_id += 1
+            return web.json_response({"ok": True, "result": {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": 1, "type": "private"},
+                "text": "ok",
+            }})
+        return web.json_response({"ok": True, "result": True})
+
+    async def django_tasks(self, request):
+        await asyncio.sleep(self.django_latency)
+        return web.json_response({
+            "next": None,
+            "previous": None,
+            "results": [
+                {"id": i, "title": f"Задача {i}", "deadline": "2030-01-01T00:00:00Z",
+                 "completed": False}
+                for i in range(1, 11)
+            ],
+        })
+
+    async def django_complete(self, request):
+        await asyncio.sleep(self.django_latency)
+        return web.json_response({"message": "Task completed ✅"})
+
+
+def make_update(update_id, user_id, command):
+    """Формирует обновление Telegram с текстовой командой от пользователя."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+            "text": command,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+async def run(args):
+    fake = FakeServer(args.django_latency, args.updates)
+    fake_runner = web.AppRunner(fake.app())
+    await fake_runner.setup()
+    fake_site = web.TCPSite(fake_runner, HOST, 0)
+    await fake_site.start()
+    fake_port = fake_runner.addresses[0][1]
+
+    os.environ.update({
+        "BOT_TOKEN": TOKEN,
+        "BOT_MODE": "webhook",
+        "WEBHOOK_REGISTER": "0",
+        "WEBHOOK_WORKERS": str(args.workers),
+        "WEBHOOK_QUEUE_SIZE": str(args.queue_size),
+        "TELEGRAM_API_URL": f"http://{HOST}:{fake_port}",
+        "DJANGO_API": f"http://{HOST}:{fake_port}/api/",
+        # Страницы не хранятся, чтобы каждое обновление получало полный ответ
+        "TASKS_CACHE_TTL": "0",
+    })
+    import bot  # Настройки бота читаются из окружения при импорте
+
+    bot_runner = web.AppRunner(bot.create_webhook_app())
+    await bot_runner.setup()
+    bot_site = web.TCPSite(bot_runner, HOST, 0)
+    await bot_site.start()
+    webhook_url = f"http://{HOST}:{bot_runner.addresses[0][1]}{bot.WEBHOOK_PATH}"
+
+    latencies = []
+    rejected = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def post(session, update_id):
+        nonlocal rejected
+        update = make_update(update_id, 1000 + update_id % args.users, args.command)
+        async with semaphore:
+            while True:
+                started = time.perf_counter()
+                async with session.post(webhook_url, json=update) as resp:
+                    latencies.append(time.perf_counter() - started)
+                    if resp.status != 503:
+                        return
+                rejected += 1
+                await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(post(session, i) for i in range(1, args.updates + 1)))
+    accepted = time.perf_counter() - started
+    await asyncio.wait_for(fake.replies.wait(), timeout=args.timeout)
+    elapsed = time.perf_counter() - started
+
+    await bot_runner.cleanup()
+    await fake_runner.cleanup()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"Обновлений: {args.updates}, конкурентность: {args.concurrency}, "
+          f"обработчиков: {args.workers}, команда: {args.command}")
+    print(f"Приём webhook: {args.updates / accepted:.0f} обновлений/с, "
+          f"p50 {quantiles[49] * 1000:.1f} мс, p99 {quantiles[98] * 1000:.1f} мс, "
+          f"отклонено (503): {rejected}")
+    print(f"Полная обработка: {elapsed:.2f} с, {args.updates / elapsed:.0f} обновлений/с")
+    print(f"Вызовы Bot API: {fake.calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--command", default="/tasks")
+    parser.add_argument("--django-latency", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=120)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+django_asgi_app = get_asgi_application()
+
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 import tasks.routing
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from tasks.middleware import JWTAuthMiddleware
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
-        URLRouter(tasks.routing.websocket_urlpatterns)
+        JWTAuthMiddleware(URLRouter(tasks.routing.websocket_urlpatterns))
     ),
-})
\ No newline at end of file
+})
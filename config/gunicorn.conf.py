@@ -0,0 +1,43 @@
+"""
+Конфигурация gunicorn для продакшен запуска ASGI приложения.
+
+Каждый воркер — отдельный процесс с циклом событий uvicorn
+(uvloop + httptools), поэтому приложение использует все ядра.
+Настройки читаются из окружения, чтобы HTTP и WebSocket процессы
+можно было запускать с разным числом воркеров одним образом:
+
+    gunicorn -c config/gunicorn.conf.py config.asgi:application
+
+Переменные окружения:
+    GUNICORN_BIND        Адрес прослушивания (по умолчанию 0.0.0.0:8000)
+    WEB_CONCURRENCY      Число воркеров (по умолчанию число ядер)
+    GUNICORN_TIMEOUT     Предел времени ответа воркера, секунды
+    GUNICORN_KEEPALIVE   Время жизни keep-alive соединения, секунды
+    GUNICORN_MAX_REQUESTS  Перезапуск воркера после N запросов (0 — никогда)
+    GUNICORN_RELOAD      Перезапуск при изменении кода (только для разработки)
+    GUNICORN_ACCESS_LOG  Журнал запросов ("-" — stdout, пусто — отключен)
+
+Плавный перезапуск без потери запросов: ``kill -HUP <pid мастера>``.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Периодический перезапуск воркеров ограничивает рост памяти;
+# разброс не дает всем воркерам перезапуститься одновременно
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+reload = os.environ.get("GUNICORN_RELOAD", "0").lower() in {"1", "true", "yes"}
+
+# Пустое значение отключает журнал запросов (например, при нагрузочных тестах)
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -16,22 +19,119 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
-
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATIC_ROOT = BASE_DIR / "staticfiles"
+# Статику отдает whitenoise из собранных (collectstatic) сжатых файлов
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tasks.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+# Redis для Celery и слоя каналов задается окружением (как CACHE_URL),
+# по умолчанию — локальный сервер
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+
+# Уведомления о просрочке отправляют таймеры notify_task_overdue;
+# периодическая проверка подбирает потерянные таймеры и неудачные отправки
+CELERY_BEAT_SCHEDULE = {
+    'check-expired-tasks': {
+        'task': 'tasks.tasks.check_expired_tasks',
+        'schedule': 600,
+    },
+    # Сверка инкрементальных счетчиков статистики задач
+    'reconcile-task-stats': {
+        'task': 'tasks.tasks.reconcile_task_stats',
+        'schedule': 3600,
+    },
+    # Удаление устаревших отметок об удалении задач (TASK_SYNC)
+    'purge-task-tombstones': {
+        'task': 'tasks.tasks.purge_task_tombstones',
+        'schedule': 86400,
+    },
+}
+
+# Telegram Bot API: пул соединений, таймауты, повторы и лимиты скорости
+TELEGRAM_API_URL = 'https://api.telegram.org'
+TELEGRAM_POOL_SIZE = 10
+TELEGRAM_CONNECT_TIMEOUT = 5
+TELEGRAM_READ_TIMEOUT = 10
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_RETRY_BACKOFF = 0.5
+TELEGRAM_MAX_RETRY_AFTER = 60
+TELEGRAM_CONCURRENCY = 100
+TELEGRAM_BATCH_SIZE = 500
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_PER_CHAT_RATE = 1
+
+# Кэш: Redis, если задан CACHE_URL, иначе память процесса
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Кэш соответствия telegram_id -> user_id (секунды и число записей)
+TELEGRAM_PROFILE_CACHE = {
+    'TIMEOUT': 3600,
+    'NEGATIVE_TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 10,
+    'LOCAL_SIZE': 10000,
+}
+
+# Кэш ID списка задач по умолчанию (меняется только при удалении списка;
+# только общий кэш, без локального уровня процесса)
+DEFAULT_TASK_LIST_CACHE = {
+    'TIMEOUT': 86400,
+}
+
+# Максимальное число элементов в одном запросе массовых операций с задачами
+BULK_TASKS_MAX_ITEMS = 10000
+
+# Инкрементальная синхронизация (/api/my-tasks/changes/): окно повторной
+# выдачи изменений для поздно зафиксированных транзакций и срок хранения
+# отметок об удалении задач, секунды
+TASK_SYNC = {
+    'LAG': 10,
+    'TOMBSTONE_TTL': 30 * 86400,
+}
+
+# Метрики запросов и задач Celery (/metrics и Server-Timing): порог
+# одинаковых SQL запросов для предупреждения N+1, период сохранения
+# снимка метрик процесса в кэш и срок его хранения (секунды), токен
+# доступа к /metrics (пустой — /metrics отвечает 403)
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'N_PLUS_ONE_THRESHOLD': 10,
+    'FLUSH_INTERVAL': 10,
+    'PROCESS_TTL': 86400,
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
 
 # Application definition
 
@@ -40,7 +140,7 @@ CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],
+            "hosts": [os.environ.get('CHANNEL_LAYER_URL', 'redis://127.0.0.1:6379/0')],
         },
     },
 }
@@ -58,6 +158,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы измерять весь запрос (см. tasks.metrics)
+    'tasks.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -93,11 +195,10 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# База данных задается DATABASE_URL (см. config/database.py),
+# без него используется локальный SQLite в режиме WAL
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.environ, BASE_DIR),
 }
 
 
@@ -6,10 +6,13 @@ from rest_framework_simplejwt.views import (
 )
 from django.views.generic import TemplateView
 
+from tasks.views import prometheus_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', TemplateView.as_view(template_name="index.html")),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('tasks.urls')),
+    path('metrics', prometheus_metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -23,6 +23,8 @@
     logs    - Показать логи всех сервисов
     restart - Перезапустить все сервисы
     clean   - Очистить все Docker данные
+    loadtest - Нагрузочный тест API (аргументы передаются в manage.py loadtest)
+    perfbench - Бенчмарк REST, WebSocket и API бота (аргументы передаются в manage.py perfbench)
 """
 
 set -e
@@ -114,6 +116,18 @@ clean() {
     fi
 }
 
+# Функция нагрузочного теста
+loadtest() {
+    info "Нагрузочный тест /api/my-tasks/..."
+    docker-compose exec web python manage.py loadtest http://localhost:8000/api/my-tasks/ "$@"
+}
+
+# Функция бенчмарка со сравнением с эталоном
+perfbench() {
+    info "Бенчмарк REST, WebSocket и API бота..."
+    docker-compose exec web python manage.py perfbench "$@"
+}
+
 # Функция помощи
 help() {
     echo "Использование: $0 [команда]"
@@ -125,6 +139,8 @@ help() {
     echo "  logs     - Показать логи всех сервисов"
     echo "  restart  - Перезапустить все сервисы"
     echo "  clean    - Очистить все Docker данные"
+    echo "  loadtest - Нагрузочный тест API (--username, --password, --concurrency, --duration)"
+    echo "  perfbench - Бенчмарк на временной базе (--baseline, --save-baseline, --tolerance)"
     echo "  help     - Показать эту справку"
 }
 
@@ -148,6 +164,14 @@ case "${1:-up}" in
     clean)
         clean
         ;;
+    loadtest)
+        shift
+        loadtest "$@"
+        ;;
+    perfbench)
+        shift
+        perfbench "$@"
+        ;;
     help|--help|-h)
         help
         ;;
@@ -1,23 +1,16 @@
 let accessToken = null;
-const socket = new WebSocket("ws://127.0.0.1:8000/ws/tasks/");
+let socket = null;
 
-socket.onopen = () => console.log("✅ WebSocket соединение установлено");
-
-socket.onmessage = (event) => {
-  const data = JSON.parse(event.data);
-  if (data.event === "task_updated") {
-    console.log("🔄 Обновление задач:", data.message);
-    loadTasks();  // Повторная загрузка задач
-  }
-};
-
-socket.onerror = (error) => {
-  console.error("❌ WebSocket ошибка:", error);
-};
+// Локальная копия задач пользователя: id -> задача
+const tasks = new Map();
+// Курсор следующей страницы /api/my-tasks/
+let nextCursor = null;
+// ETag первой страницы: повторная загрузка без изменений получает 304
+let firstPageEtag = null;
 
 function connectWebSocket() {
   const wsScheme = window.location.protocol === "https:" ? "wss" : "ws";
-  const socketUrl = `${wsScheme}://${window.location.host}/ws/tasks/`;
+  const socketUrl = `${wsScheme}://${window.location.host}/ws/tasks/?token=${encodeURIComponent(accessToken)}`;
 
   socket = new WebSocket(socketUrl);
 
@@ -26,13 +19,21 @@ function connectWebSocket() {
   };
 
   socket.onmessage = (event) => {
-    const task = JSON.parse(event.data);
-    console.log("📬 Обновление по задаче:", task);
+    const data = JSON.parse(event.data);
+    console.log("📬 Обновление по задаче:", data);
 
-    loadTasks();
+    if (data.event === "task_batch") {
+      data.events.forEach(applyEvent);
+    } else {
+      applyEvent(data);
+    }
+    renderTasks();
   };
 
   socket.onclose = () => {
+    if (!accessToken) {
+      return;
+    }
     console.log("⚠️ WebSocket отключён. Переподключение через 3 сек...");
     setTimeout(connectWebSocket, 3000);
   };
@@ -42,6 +43,27 @@ function connectWebSocket() {
   };
 }
 
+function applyEvent(event) {
+  if (event.event === "task_deleted") {
+    tasks.delete(event.id);
+  } else if (event.event === "task_updated") {
+    loadTasks();  // Дельты нет — повторная загрузка задач
+  } else if (event.id !== undefined) {
+    applyDelta(event);
+  }
+}
+
+function applyDelta(delta) {
+  const current = tasks.get(delta.id);
+  if (current && current.version >= delta.version) {
+    return;  // Устаревшая или уже применённая дельта
+  }
+  if (!current && delta.event !== undefined && delta.event !== "task_created") {
+    return;  // Изменение задачи, которая ещё не загружена на страницу
+  }
+  tasks.set(delta.id, {...current, ...delta.changes, id: delta.id, version: delta.version});
+}
+
 
 async function loginUser() {
   const username = document.getElementById("username").value;
@@ -57,42 +79,71 @@ async function loginUser() {
 
   if (response.ok) {
     accessToken = data.access;
+    firstPageEtag = null;
     document.getElementById("login-ui").style.display = "none";
     document.getElementById("task-ui").style.display = "block";
 
     await loadTasks();
+    connectWebSocket();
   } else {
     alert("Ошибка авторизации");
   }
 }
 
-async function loadTasks() {
-  const response = await fetch("/api/my-tasks/", {
-    headers: {
-      "Authorization": `Bearer ${accessToken}`
-    }
-  });
+async function loadTasks(cursor = null) {
+  const url = cursor ? `/api/my-tasks/?cursor=${encodeURIComponent(cursor)}` : "/api/my-tasks/";
+  const headers = {"Authorization": `Bearer ${accessToken}`};
+  if (!cursor && firstPageEtag) {
+    headers["If-None-Match"] = firstPageEtag;
+  }
+  const response = await fetch(url, {headers});
 
-  const tasks = await response.json();
+  if (response.status === 304) {
+    return;  // Задачи не изменились с прошлой загрузки
+  }
+  const data = await response.json();
+  if (!cursor) {
+    firstPageEtag = response.headers.get("ETag");
+    tasks.clear();
+  }
+  data.results.forEach(task => tasks.set(task.id, task));
+  nextCursor = data.next;
+  renderTasks();
+}
+
+async function loadMoreTasks() {
+  if (nextCursor) {
+    await loadTasks(nextCursor);
+  }
+}
+
+function renderTasks() {
   const list = document.getElementById("task-list");
   list.innerHTML = "";
 
   tasks.forEach(task => {
     const item = document.createElement("li");
-    item.innerHTML = `${task.title} — до ${task.deadline} 
+    item.innerHTML = `${task.title} — до ${task.deadline}
       ${task.completed ? "✅" : `<button onclick="completeTask(${task.id})">Выполнить</button>`}`;
     list.appendChild(item);
   });
+
+  document.getElementById("load-more").style.display = nextCursor ? "inline-block" : "none";
 }
 
 async function completeTask(id) {
-  await fetch(`/api/complete-task/${id}/`, {
+  const response = await fetch(`/api/complete-task/${id}/`, {
     method: "PATCH",
     headers: {
       "Authorization": `Bearer ${accessToken}`
     }
   });
-  loadTasks();
+
+  if (response.ok) {
+    const task = await response.json();
+    applyDelta({id: task.id, changes: task, version: task.version});
+    renderTasks();
+  }
 }
 
 async function createTask() {
@@ -114,12 +165,14 @@ async function createTask() {
       title,
       deadline,
       completed: false
-     
+
     })
   });
 
   if (response.ok) {
-    loadTasks();
+    const task = await response.json();
+    applyDelta({id: task.id, changes: task, version: task.version});
+    renderTasks();
     document.getElementById("title").value = '';
     document.getElementById("deadline").value = '';
   } else {
@@ -148,7 +201,3 @@ async function linkTelegram() {
     alert("Ошибка: " + JSON.stringify(data));
   }
 }
-
-
-
-connectWebSocket();
\ No newline at end of file
@@ -1,13 +1,66 @@
 """
 Конфигурация административной панели Django для приложения задач.
 
-Этот модуль регистрирует модели Task и TaskList в административной
+Этот модуль регистрирует модели приложения задач в административной
 панели Django, позволяя администраторам управлять задачами и списками
 задач через веб-интерфейс Django Admin.
 """
 
 from django.contrib import admin
-from .models import Task, TaskList, TelegramProfile
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .models import Task, TaskList, TelegramProfile, UserTaskStats
+from .search import matching_tasks
+
+# Ниже этого числа строк оценка заменяется точным COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Возвращает оценку числа строк таблицы из статистики СУБД.
+
+    Args:
+        model (type[Model]): Модель, для таблицы которой нужна оценка
+        using (str): Алиас базы данных
+
+    Returns:
+        int | None: Оценка числа строк или None, если СУБД ее не дает
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples = -1, пока таблица ни разу не анализировалась
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает COUNT(*) по всей большой таблице.
+
+    Для queryset без фильтров число строк берется из статистики
+    PostgreSQL (pg_class.reltuples). Точный COUNT(*) выполняется для
+    отфильтрованных списков и для таблиц меньше ESTIMATED_COUNT_THRESHOLD.
+    """
+
+    @cached_property
+    def count(self):
+        """Точное или оценочное число строк."""
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
 
 
 @admin.register(Task)
@@ -16,13 +69,32 @@ class TaskAdmin(admin.ModelAdmin):
     Административная конфигурация для модели Task.
     
     Определяет отображение задач в админ-панели с удобными
-    фильтрами и полями для просмотра.
+    фильтрами и полями для просмотра. Поиск по заголовку и описанию
+    идет через полнотекстовый индекс (см. tasks.search), а не через
+    LIKE по всей таблице.
+
+    Исполнитель загружается тем же запросом, что и задачи, а число
+    строк большой таблицы оценивается (см. EstimatedCountPaginator).
     """
     list_display = ('title', 'assigned_to', 'deadline', 'completed', 'created_at')
+    list_select_related = ('assigned_to',)
+    autocomplete_fields = ('assigned_to', 'task_list')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ('completed', 'deadline', 'created_at')
-    search_fields = ('title', 'description', 'assigned_to__username')
+    search_fields = ('assigned_to__username',)
+    search_help_text = 'Поиск по заголовку, описанию и имени пользователя'
     date_hierarchy = 'deadline'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет задачи по полнотекстовому индексу и по имени пользователя."""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        # Пользователи подбираются подзапросом, без JOIN на каждую задачу
+        users = User.objects.filter(username__icontains=search_term).values('id')
+        queryset = queryset.filter(matching_tasks(search_term) | Q(assigned_to_id__in=users))
+        return queryset, False
+
 
 @admin.register(TaskList)
 class TaskListAdmin(admin.ModelAdmin):
@@ -32,6 +104,8 @@ class TaskListAdmin(admin.ModelAdmin):
     Определяет отображение списков задач в админ-панели.
     """
     list_display = ('name', 'owner')
+    list_select_related = ('owner',)
+    autocomplete_fields = ('owner',)
     search_fields = ('name', 'owner__username')
 
 
@@ -43,5 +117,29 @@ class TelegramProfileAdmin(admin.ModelAdmin):
     Определяет отображение профилей Telegram в админ-панели.
     """
     list_display = ('user', 'telegram_id', 'created_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     search_fields = ('user__username', 'telegram_id')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+
+@admin.register(UserTaskStats)
+class UserTaskStatsAdmin(admin.ModelAdmin):
+    """
+    Административная конфигурация для модели UserTaskStats.
+    
+    Счетчики поддерживаются автоматически, поэтому доступны
+    только для просмотра.
+    """
+    list_display = ('user', 'total', 'completed', 'revision')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'total', 'completed', 'revision')
+
+    def has_add_permission(self, request):
+        """Строки статистики создаются только самим приложением."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Счетчики нельзя менять вручную, иначе они разойдутся с задачами."""
+        return False
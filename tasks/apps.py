@@ -21,3 +21,7 @@ class TasksConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        """Подключает обработчики сигналов приложения и сбор метрик."""
+        from . import metrics, signals  # noqa: F401
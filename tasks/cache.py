@@ -0,0 +1,209 @@
+"""
+Кэширование данных, которые часто читаются и редко меняются.
+
+Соответствие telegram_id -> user_id нужно каждому запросу Telegram бота,
+а меняется только при привязке аккаунта. Поэтому оно кэшируется в два
+уровня:
+
+1. Локальный LRU кэш процесса с коротким временем жизни — без сетевых
+   обращений вообще.
+2. Общий кэш Django (``caches["default"]``, в продакшене Redis) с долгим
+   временем жизни, который явно сбрасывается сигналами при изменении
+   или удалении TelegramProfile.
+
+Отсутствующие telegram_id тоже кэшируются (с меньшим временем жизни),
+чтобы сообщения от непривязанных пользователей не доходили до базы.
+Локальный уровень других процессов сигналами не сбрасывается, поэтому
+его время жизни держится коротким.
+
+ID списка задач пользователя по умолчанию, который нужен при каждом
+создании задачи, кэшируется только в общем кэше: он меняется при
+удалении списка, а устаревший ID в локальном кэше другого процесса
+приводил бы к ошибке внешнего ключа при создании задачи.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import TaskList, TelegramProfile
+
+# Значение в кэше для telegram_id без привязанного профиля
+NOT_LINKED = 0
+
+_MISS = object()
+
+
+class LocalLRUCache:
+    """
+    Потокобезопасный LRU кэш процесса с временем жизни записей.
+
+    Attributes:
+        max_size (int): Максимальное число записей
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Возвращает значение или default, если записи нет или она устарела."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        """Сохраняет значение на timeout секунд."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        """Удаляет запись."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """Удаляет все записи."""
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalLRUCache(settings.TELEGRAM_PROFILE_CACHE['LOCAL_SIZE'])
+
+
+def telegram_user_key(telegram_id):
+    """Ключ кэша соответствия telegram_id -> user_id."""
+    return f"tasks:telegram_user:{telegram_id}"
+
+
+def get_user_id_for_telegram(telegram_id):
+    """
+    Возвращает ID пользователя, привязанного к Telegram аккаунту.
+
+    Args:
+        telegram_id (int): ID пользователя Telegram
+
+    Returns:
+        int | None: ID пользователя Django или None, если аккаунт не привязан
+    """
+    options = settings.TELEGRAM_PROFILE_CACHE
+    key = telegram_user_key(telegram_id)
+
+    user_id = local_cache.get(key, _MISS)
+    if user_id is _MISS:
+        user_id = cache.get(key, _MISS)
+        if user_id is _MISS:
+            user_id = (
+                TelegramProfile.objects
+                .filter(telegram_id=telegram_id)
+                .values_list("user_id", flat=True)
+                .first()
+            ) or NOT_LINKED
+            cache.set(
+                key, user_id,
+                options['TIMEOUT'] if user_id else options['NEGATIVE_TIMEOUT'],
+            )
+        local_cache.set(key, user_id, options['LOCAL_TIMEOUT'])
+
+    return user_id or None
+
+
+async def aget_user_id_for_telegram(telegram_id):
+    """
+    Асинхронный вариант get_user_id_for_telegram для async представлений.
+
+    Args:
+        telegram_id (int): ID пользователя Telegram
+
+    Returns:
+        int | None: ID пользователя Django или None, если аккаунт не привязан
+    """
+    options = settings.TELEGRAM_PROFILE_CACHE
+    key = telegram_user_key(telegram_id)
+
+    user_id = local_cache.get(key, _MISS)
+    if user_id is _MISS:
+        user_id = await cache.aget(key, _MISS)
+        if user_id is _MISS:
+            user_id = await (
+                TelegramProfile.objects
+                .filter(telegram_id=telegram_id)
+                .values_list("user_id", flat=True)
+                .afirst()
+            ) or NOT_LINKED
+            await cache.aset(
+                key, user_id,
+                options['TIMEOUT'] if user_id else options['NEGATIVE_TIMEOUT'],
+            )
+        local_cache.set(key, user_id, options['LOCAL_TIMEOUT'])
+
+    return user_id or None
+
+
+def invalidate_telegram_user(telegram_id):
+    """
+    Сбрасывает закэшированное соответствие для telegram_id.
+
+    Args:
+        telegram_id (int): ID пользователя Telegram
+    """
+    key = telegram_user_key(telegram_id)
+    local_cache.delete(key)
+    cache.delete(key)
+
+
+def default_task_list_key(user_id):
+    """Ключ кэша ID списка задач пользователя по умолчанию."""
+    return f"tasks:default_task_list:{user_id}"
+
+
+def get_default_task_list_id(user_id):
+    """
+    Возвращает ID списка задач пользователя по умолчанию.
+
+    Если списка еще нет, он создается через get_or_create: при гонке
+    двух запросов уникальное ограничение оставляет один список,
+    а проигравший запрос получает его ID.
+
+    Args:
+        user_id (int): ID пользователя Django
+
+    Returns:
+        int: ID списка задач по умолчанию
+    """
+    options = settings.DEFAULT_TASK_LIST_CACHE
+    key = default_task_list_key(user_id)
+
+    task_list_id = cache.get(key)
+    if task_list_id is None:
+        task_list, _ = TaskList.objects.get_or_create(
+            owner_id=user_id, is_default=True, defaults={"name": "Default"}
+        )
+        task_list_id = task_list.id
+        cache.set(key, task_list_id, options['TIMEOUT'])
+
+    return task_list_id
+
+
+def invalidate_default_task_list(user_id):
+    """
+    Сбрасывает закэшированный ID списка задач по умолчанию.
+
+    Args:
+        user_id (int): ID пользователя Django
+    """
+    cache.delete(default_task_list_key(user_id))
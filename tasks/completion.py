@@ -0,0 +1,81 @@
+"""
+Отметка задачи выполненной одним условным UPDATE.
+
+Задача отмечается запросом
+``UPDATE ... WHERE id = ? AND assigned_to_id = ? AND completed = false``,
+который одновременно проверяет владельца, увеличивает версию строки
+и, где СУБД поддерживает RETURNING (PostgreSQL, SQLite 3.35+),
+возвращает обновленную строку. Повторная отметка ничего не пишет,
+поэтому операция идемпотентна, а условие в WHERE исключает потерю
+конкурентного изменения.
+
+Сигналы модели при этом не вызываются: счетчики статистики обновляются
+здесь же, в той же транзакции, а событие WebSocket публикует
+вызывающий код (синхронно или из async представления).
+"""
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import stats
+from .models import Task
+
+
+def supports_update_returning():
+    """Проверяет, поддерживает ли текущая СУБД UPDATE ... RETURNING."""
+    if connection.vendor == "postgresql":
+        return True
+    # SQLite поддерживает RETURNING с той же версии, что и для INSERT
+    return connection.vendor == "sqlite" and connection.features.can_return_columns_from_insert
+
+
+def _complete_sql():
+    """Возвращает текст условного UPDATE ... RETURNING для таблицы задач."""
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(field.column) for field in Task._meta.concrete_fields)
+    return (
+        f"UPDATE {qn(Task._meta.db_table)} "
+        f"SET {qn('completed')} = %s, {qn('version')} = {qn('version')} + 1, "
+        f"{qn('updated_at')} = %s "
+        f"WHERE {qn('id')} = %s AND {qn('assigned_to_id')} = %s AND {qn('completed')} = %s "
+        f"RETURNING {columns}"
+    )
+
+
+def _mark_completed(task_id, user_id, now):
+    """Отмечает задачу выполненной и возвращает её или None, если строка не изменилась."""
+    if supports_update_returning():
+        params = [True, connection.ops.adapt_datetimefield_value(now), task_id, user_id, False]
+        rows = list(Task.objects.raw(_complete_sql(), params))
+        return rows[0] if rows else None
+
+    updated = Task.objects.filter(id=task_id, assigned_to_id=user_id, completed=False).update(
+        completed=True, version=F("version") + 1, updated_at=now
+    )
+    return Task.objects.get(id=task_id) if updated else None
+
+
+def complete_task(task_id, user_id):
+    """
+    Отмечает задачу пользователя выполненной.
+
+    Args:
+        task_id (int): ID задачи
+        user_id (int): ID пользователя Django, которому назначена задача
+
+    Returns:
+        tuple: (Task | None, bool) — задача (None, если её нет или она
+            чужая) и признак того, что она отмечена этим вызовом
+    """
+    # Частичный откат не нужен, поэтому без точки сохранения
+    # внутри внешней транзакции
+    with transaction.atomic(savepoint=False):
+        task = _mark_completed(task_id, user_id, timezone.now())
+        if task is not None:
+            stats.apply_delta(user_id, completed=1)
+            return task, True
+
+    # Задача уже выполнена, не существует или назначена другому
+    task = Task.objects.filter(id=task_id, assigned_to_id=user_id).first()
+    return task, False
@@ -3,53 +3,63 @@ WebSocket потребители для приложения управлени
 
 Этот модуль содержит WebSocket потребители для обеспечения связи в реальном времени
 между сервером и клиентами. Используется Django Channels для отправки уведомлений
-об обновлениях задач всем подключенным пользователям.
+об изменениях задач их владельцам.
 """
 
 from channels.generic.websocket import AsyncWebsocketConsumer
 import json
 
+from .events import user_group_name
+
 
 class TaskConsumer(AsyncWebsocketConsumer):
     """
     WebSocket потребитель для обработки обновлений задач в реальном времени.
     
-    Этот класс управляет WebSocket соединениями клиентов и обеспечивает
-    рассылку уведомлений об изменениях задач всем подключенным пользователям.
-    Клиенты автоматически получают обновления когда задачи создаются, 
-    изменяются или удаляются.
+    Этот класс управляет WebSocket соединениями клиентов. Каждое соединение
+    подписывается на персональную группу аутентифицированного пользователя,
+    поэтому клиент получает только изменения собственных задач.
+    Анонимные соединения отклоняются.
     """
     
     async def connect(self):
         """
         Обрабатывает новое WebSocket соединение.
         
-        Добавляет клиента в группу "tasks" для получения уведомлений
-        и принимает WebSocket соединение.
+        Добавляет клиента в группу пользователя из scope и принимает
+        WebSocket соединение. Неаутентифицированные соединения закрываются.
         """
-        await self.channel_layer.group_add("tasks", self.channel_name)
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = user_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
         """
         Обрабатывает отключение WebSocket соединения.
         
-        Удаляет клиента из группы "tasks" при отключении.
+        Удаляет клиента из группы пользователя при отключении.
         
         Args:
             close_code: Код причины закрытия соединения
         """
-        await self.channel_layer.group_discard("tasks", self.channel_name)
+        group_name = getattr(self, "group_name", None)
+        if group_name:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
 
     async def send_task_update(self, event):
         """
         Отправляет обновление о задачах клиенту.
         
-        Этот метод вызывается когда в группу "tasks" отправляется
-        сообщение о обновлении задач. Пересылает данные клиенту
+        Этот метод вызывается когда в группу пользователя отправляется
+        событие об изменении задач. Пересылает данные клиенту
         в JSON формате.
         
         Args:
             event (dict): Событие с данными для отправки клиенту
         """
-        await self.send(text_data=json.dumps(event["data"]))
\ No newline at end of file
+        await self.send(text_data=json.dumps(event["data"]))
@@ -0,0 +1,241 @@
+"""
+События WebSocket для приложения управления задачами.
+
+Этот модуль отвечает за рассылку изменений задач через Django Channels.
+Каждый пользователь подписан на собственную группу, поэтому событие
+получают только клиенты владельца задачи. Событие содержит дельту
+(ID задачи, изменённые поля и версию строки), чтобы клиент мог обновить
+локальный список без повторного запроса к API.
+
+События порождаются записью данных: сигналами модели Task (см.
+tasks.signals) или явными вызовами publish() для массовых операций,
+которые сигналов не вызывают. События накапливаются до фиксации
+транзакции (transaction.on_commit) и отправляются одним сообщением
+на пользователя; если изменений много, клиент получает одно событие
+"task_updated" и перезагружает список. Откаченные изменения не
+рассылаются, а чтение данных событий не порождает.
+"""
+
+import threading
+import weakref
+from collections import defaultdict
+
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from django.db import transaction
+
+from . import metrics
+
+# Больше дельт за одну транзакцию — клиенту дешевле перезагрузить список
+COALESCE_LIMIT = 20
+
+_buffers = threading.local()
+
+
+def user_group_name(user_id):
+    """
+    Возвращает имя группы Channels для пользователя.
+
+    Args:
+        user_id (int): ID пользователя Django
+
+    Returns:
+        str: Имя группы, например "tasks_user_42"
+    """
+    return f"tasks_user_{user_id}"
+
+
+def send_to_user(user_id, data):
+    """
+    Немедленно отправляет событие во все WebSocket соединения пользователя.
+
+    Args:
+        user_id (int): ID пользователя Django
+        data (dict): Данные события, пересылаемые клиенту как есть
+    """
+    channel_layer = get_channel_layer()
+    with metrics.timer("publish"):
+        async_to_sync(channel_layer.group_send)(
+            user_group_name(user_id),
+            {
+                "type": "send_task_update",
+                "data": data,
+            }
+        )
+
+
+async def asend_to_user(user_id, data):
+    """
+    Отправляет событие пользователю из async кода без async_to_sync.
+
+    Args:
+        user_id (int): ID пользователя Django
+        data (dict): Данные события, пересылаемые клиенту как есть
+    """
+    with metrics.timer("publish"):
+        await get_channel_layer().group_send(
+            user_group_name(user_id),
+            {
+                "type": "send_task_update",
+                "data": data,
+            }
+        )
+
+
+def reload_event():
+    """Событие без дельты: клиент перезагружает список задач целиком."""
+    return {
+        "event": "task_updated",
+        "message": "Обновлены задачи",
+    }
+
+
+def coalesce(events):
+    """
+    Объединяет события одного пользователя за транзакцию в одно.
+
+    Args:
+        events (list): События в порядке возникновения
+
+    Returns:
+        dict: Одиночное событие, пакет "task_batch" или "task_updated"
+    """
+    if len(events) == 1:
+        return events[0]
+    if len(events) > COALESCE_LIMIT or any(e["event"] == "task_updated" for e in events):
+        return reload_event()
+    return {"event": "task_batch", "events": events}
+
+
+class EventBuffer:
+    """События, накопленные в текущей транзакции, по пользователям."""
+
+    def __init__(self):
+        self.events = defaultdict(list)
+        self.pending = True
+
+    def flush(self):
+        """Отправляет накопленные события после фиксации транзакции."""
+        self.pending = False
+        for user_id, events in self.events.items():
+            send_to_user(user_id, coalesce(events))
+
+
+def _current_buffer(connection):
+    """
+    Возвращает буфер текущей транзакции, создавая его при необходимости.
+
+    Буферы потока хранятся по соединению и текущей точке сохранения
+    (savepoint), в которой поставлен их flush. Единственная сильная
+    ссылка на буфер — очередь on_commit соединения: при откате точки
+    сохранения или всей транзакции Django снимает flush с очереди,
+    буфер удаляется из WeakValueDictionary, и следующий вызов создаёт
+    новый. Отправленный буфер помечается pending=False.
+    """
+    buffers = getattr(_buffers, "pending", None)
+    if buffers is None:
+        buffers = _buffers.pending = weakref.WeakValueDictionary()
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    buffer = buffers.get(key)
+    if buffer is None or not buffer.pending:
+        buffer = buffers[key] = EventBuffer()
+        transaction.on_commit(buffer.flush, using=connection.alias)
+    return buffer
+
+
+def publish(user_id, data):
+    """
+    Ставит событие для пользователя в очередь до фиксации транзакции.
+
+    Вне транзакции событие отправляется сразу.
+
+    Args:
+        user_id (int): ID пользователя Django
+        data (dict): Данные события
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        send_to_user(user_id, data)
+        return
+    _current_buffer(connection).events[user_id].append(data)
+
+
+def task_delta(event, task, changes):
+    """
+    Формирует дельту изменения задачи.
+
+    Args:
+        event (str): Тип события ("task_created", "task_completed", ...)
+        task (Task): Изменённая задача
+        changes (dict): Изменённые поля в сериализованном виде
+
+    Returns:
+        dict: Событие с ID задачи, изменёнными полями и версией строки
+    """
+    return {
+        "event": event,
+        "id": task.id,
+        "changes": changes,
+        "version": task.version,
+    }
+
+
+def task_created(task):
+    """
+    Публикует создание задачи.
+
+    Дельта содержит все сериализованные поля задачи, чтобы клиент
+    мог добавить её в список без дополнительного запроса.
+
+    Args:
+        task (Task): Созданная задача
+    """
+    from .serializers import TaskSerializer
+
+    publish(
+        task.assigned_to_id,
+        task_delta("task_created", task, TaskSerializer(task).data),
+    )
+
+
+def task_changed(task, fields):
+    """
+    Публикует изменение полей задачи.
+
+    Выполнение задачи публикуется как "task_completed", остальные
+    изменения — как "task_changed".
+
+    Args:
+        task (Task): Изменённая задача
+        fields (list): Имена изменённых полей
+    """
+    from .serializers import TaskSerializer
+
+    event = "task_completed" if fields == ["completed"] and task.completed else "task_changed"
+    publish(
+        task.assigned_to_id,
+        task_delta(event, task, TaskSerializer(task, fields=fields).data),
+    )
+
+
+def task_deleted(task):
+    """
+    Публикует удаление задачи.
+
+    Args:
+        task (Task): Удалённая задача
+    """
+    publish(task.assigned_to_id, task_delta("task_deleted", task, {}))
+
+
+def tasks_updated(user_id):
+    """
+    Публикует изменение задач пользователя без дельты.
+
+    Используется массовыми операциями (QuerySet.update, bulk_create),
+    которые не вызывают сигналов модели.
+
+    Args:
+        user_id (int): ID пользователя Django
+    """
+    publish(user_id, reload_event())
@@ -0,0 +1,101 @@
+"""
+Фильтрация и проекция полей для списков задач.
+
+Функции этого модуля разбирают параметры запроса списков задач
+(``completed``, ``deadline_after``, ``deadline_before``, ``fields``)
+и применяют их к queryset. Проекция ``fields`` сужает не только JSON,
+но и список столбцов в SELECT.
+"""
+
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Task
+
+TASK_FIELDS = tuple(field.name for field in Task._meta.concrete_fields)
+
+# Поля, без которых невозможно построить курсор страницы
+CURSOR_FIELDS = ("id", "deadline")
+
+TRUE_VALUES = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+
+
+def parse_fields(params):
+    """
+    Разбирает параметр ``fields`` (список полей через запятую).
+
+    Args:
+        params (QueryDict): Параметры запроса
+
+    Returns:
+        list | None: Запрошенные поля или None, если параметр не передан
+
+    Raises:
+        ValidationError: Если запрошено неизвестное поле
+    """
+    raw = params.get("fields")
+    if not raw:
+        return None
+
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in TASK_FIELDS]
+    if unknown:
+        raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}"})
+    return fields
+
+
+def _parse_deadline(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+
+    try:
+        value = parse_datetime(raw)
+    except ValueError:
+        # Формат верный, но дата невозможна (например, 13-й месяц)
+        value = None
+    if value is None:
+        raise ValidationError({name: "Expected an ISO 8601 datetime"})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_tasks(queryset, params):
+    """
+    Применяет к queryset фильтры и проекцию из параметров запроса.
+
+    Args:
+        queryset (QuerySet): Задачи пользователя
+        params (QueryDict): Параметры запроса
+
+    Returns:
+        tuple: (отфильтрованный QuerySet, список полей или None)
+
+    Raises:
+        ValidationError: Если параметры некорректны
+    """
+    completed = params.get("completed")
+    if completed is not None:
+        completed = completed.lower()
+        if completed in TRUE_VALUES:
+            queryset = queryset.filter(completed=True)
+        elif completed in FALSE_VALUES:
+            queryset = queryset.filter(completed=False)
+        else:
+            raise ValidationError({"completed": "Expected true or false"})
+
+    deadline_after = _parse_deadline(params, "deadline_after")
+    if deadline_after is not None:
+        queryset = queryset.filter(deadline__gte=deadline_after)
+
+    deadline_before = _parse_deadline(params, "deadline_before")
+    if deadline_before is not None:
+        queryset = queryset.filter(deadline__lt=deadline_before)
+
+    fields = parse_fields(params)
+    if fields is not None:
+        queryset = queryset.only(*{*fields, *CURSOR_FIELDS})
+    return queryset, fields
@@ -0,0 +1,85 @@
+"""
+Сравнение скорости сериализации списков задач.
+
+Команда создает во временной транзакции (она откатывается) пользователя
+с заданным числом задач и сравнивает два пути чтения списка:
+
+- экземпляры модели + TaskSerializer + стандартный JSONRenderer DRF;
+- ``.values()`` + функция из tasks.rows + рендерер на orjson.
+
+Перед замером проверяется, что оба пути дают одинаковые байты.
+
+Использование:
+    python manage.py benchserialize --rows 10000 --repeat 5
+"""
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task, TaskList
+from tasks.renderers import render_json
+from tasks.rows import task_rows
+from tasks.serializers import TaskSerializer
+
+
+def serializer_path(queryset):
+    """Рендерит список через экземпляры модели и TaskSerializer."""
+    return JSONRenderer().render(TaskSerializer(list(queryset), many=True).data)
+
+
+def fast_path(queryset):
+    """Рендерит список через .values() и orjson."""
+    rows, task_row = task_rows(queryset)
+    return render_json([task_row(row) for row in rows])
+
+
+def best_time(func, queryset, repeat):
+    """Возвращает лучшее время выполнения из repeat запусков, секунды."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(queryset)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Сравнивает TaskSerializer и быстрый путь чтения на списке задач."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        if rows < 1 or repeat < 1:
+            raise CommandError("--rows и --repeat должны быть положительными")
+
+        with transaction.atomic():
+            user = User.objects.create_user("benchserialize")
+            task_list = TaskList.objects.create(name="Bench", owner=user)
+            now = timezone.now()
+            Task.objects.bulk_create(
+                Task(
+                    title=f"Задача {i}", description="Описание " * 5,
+                    deadline=now, task_list=task_list, assigned_to=user,
+                )
+                for i in range(rows)
+            )
+            queryset = Task.objects.filter(assigned_to=user).order_by("deadline", "id")
+
+            if serializer_path(queryset) != fast_path(queryset):
+                raise CommandError("Ответы быстрого пути и TaskSerializer различаются")
+            slow = best_time(serializer_path, queryset, repeat)
+            fast = best_time(fast_path, queryset, repeat)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Строк: {rows}, лучший из {repeat} запусков")
+        self.stdout.write(f"TaskSerializer + JSONRenderer: {slow * 1000:.1f} мс")
+        self.stdout.write(f".values() + orjson: {fast * 1000:.1f} мс")
+        self.stdout.write(f"Ускорение: {slow / fast:.1f}x")
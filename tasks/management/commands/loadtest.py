@@ -0,0 +1,132 @@
+"""
+Нагрузочный тест HTTP эндпоинта.
+
+Команда отправляет запросы к URL с заданной конкурентностью в течение
+заданного времени и печатает пропускную способность, задержки и коды
+ответов. Подходит для сравнения способов запуска (runserver, gunicorn
+с разным числом воркеров) на одном и том же API.
+
+Использование:
+    python manage.py loadtest http://localhost:8000/api/my-tasks/ \\
+        --concurrency 100 --duration 30 --username alice --password secret
+"""
+
+import asyncio
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urljoin
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def obtain_token(session, url, username, password):
+    """
+    Получает JWT access токен через /api/token/ того же сервера.
+
+    Returns:
+        str: Access токен
+    """
+    try:
+        async with session.post(
+            urljoin(url, "/api/token/"), json={"username": username, "password": password}
+        ) as response:
+            if response.status != 200:
+                raise CommandError(f"Не удалось получить токен: HTTP {response.status}")
+            return (await response.json())["access"]
+    except aiohttp.ClientError as e:
+        raise CommandError(f"Не удалось получить токен: {e}")
+
+
+async def run_load(url, concurrency, duration, method="GET", token=None,
+                   username=None, password=None):
+    """
+    Нагружает URL в течение duration секунд.
+
+    Args:
+        url (str): Адрес эндпоинта
+        concurrency (int): Число одновременных запросов
+        duration (float): Длительность теста, секунды
+        method (str): HTTP метод
+        token (str | None): JWT access токен
+        username (str | None): Пользователь для получения токена
+        password (str | None): Пароль пользователя
+
+    Returns:
+        dict: elapsed, latencies (секунды), statuses (Counter), errors
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if token is None and username:
+            token = await obtain_token(session, url, username, password)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+        latencies = []
+        statuses = Counter()
+        errors = 0
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    async with session.request(method, url, headers=headers) as response:
+                        await response.read()
+                        statuses[response.status] += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return {
+            "elapsed": time.perf_counter() - started,
+            "latencies": latencies,
+            "statuses": statuses,
+            "errors": errors,
+        }
+
+
+class Command(BaseCommand):
+    help = "Нагружает HTTP эндпоинт и печатает запросы в секунду и задержки."
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--token", help="JWT access токен")
+        parser.add_argument("--username", help="Получить токен для этого пользователя")
+        parser.add_argument("--password", default="")
+
+    def handle(self, *args, **options):
+        result = asyncio.run(run_load(
+            options["url"],
+            concurrency=options["concurrency"],
+            duration=options["duration"],
+            method=options["method"],
+            token=options["token"],
+            username=options["username"],
+            password=options["password"],
+        ))
+
+        latencies = result["latencies"]
+        if len(latencies) < 2:
+            raise CommandError(f"Недостаточно ответов: {len(latencies)}, ошибок: {result['errors']}")
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"Запросов: {len(latencies)} за {result['elapsed']:.1f} с, "
+            f"конкурентность: {options['concurrency']}"
+        )
+        self.stdout.write(f"Пропускная способность: {len(latencies) / result['elapsed']:.0f} запросов/с")
+        self.stdout.write(
+            f"Задержка: p50 {quantiles[49] * 1000:.1f} мс, "
+            f"p90 {quantiles[89] * 1000:.1f} мс, p99 {quantiles[98] * 1000:.1f} мс"
+        )
+        self.stdout.write(
+            f"Коды ответов: {dict(sorted(result['statuses'].items()))}, "
+            f"ошибок соединения: {result['errors']}"
+        )
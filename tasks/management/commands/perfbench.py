@@ -0,0 +1,644 @@
+"""
+Бенчмарк REST API, WebSocket и API бота с проверкой регрессий.
+
+Команда полностью автономна: создает временную тестовую базу,
+заполняет её пользователями и задачами через bulk_create и прогоняет
+сценарии внутри процесса через ASGI приложение (config.asgi), как один
+воркер uvicorn. Сеть, Redis и Telegram не нужны: channel layer, кэш,
+брокер и бэкенд результатов Celery работают в памяти процесса,
+а Bot API заменен локальным сервером-заглушкой.
+
+Сценарии:
+- list: GET /api/my-tasks/
+- telegram-list: GET /api/telegram/tasks/
+- create: POST /api/create-task/
+- complete: PATCH /api/complete-task/<id>/
+- telegram-complete: POST /api/telegram/complete-task/
+- ws-fanout: задержка доставки task_completed на открытые соединения ws/tasks/
+- digest: сводки check_expired_tasks через сервер-заглушку Bot API
+
+Для каждого сценария печатаются p50/p95/p99, пропускная способность
+и число SQL запросов на запрос. С --save-baseline результаты
+сохраняются в JSON, с --baseline сравниваются с сохраненными:
+команда завершается ошибкой, если SQL запросов на запрос стало больше
+или p95 и пропускная способность ухудшились больше чем на --tolerance.
+
+Использование:
+    python manage.py perfbench --users 20 --tasks 100 --requests 200 \\
+        --concurrency 10 --ws-connections 100 --baseline benchmarks/perfbench.json
+"""
+
+import asyncio
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+from pathlib import Path
+from urllib.parse import urlencode
+
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tasks import stats, telegram
+from tasks.models import Task, TaskList, TelegramProfile
+from tasks.tasks import check_expired_tasks
+
+SCENARIOS = (
+    "list", "telegram-list", "create", "complete", "telegram-complete", "ws-fanout", "digest",
+)
+
+# Настройки, при которых приложение не обращается к внешним сервисам
+OFFLINE_SETTINGS = {
+    "DEBUG": False,
+    "ALLOWED_HOSTS": ["localhost"],
+    "CHANNEL_LAYERS": {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+}
+
+# Предел ожидания одного ответа или сообщения WebSocket, секунды
+RESPONSE_TIMEOUT = 30
+
+# Допуск на сравнение дробного числа SQL запросов на запрос
+QUERY_EPSILON = 0.01
+
+TELEGRAM_ID_BASE = 10_000_000
+
+
+class QueryCounter:
+    """
+    Считает SQL запросы всех соединений процесса.
+
+    Подключается к каждому соединению через execute_wrappers, в том
+    числе к соединениям, которые откроют потоки sync_to_async.
+
+    Attributes:
+        count (int): Число выполненных запросов
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        """Подключает счетчик к соединению (обработчик connection_created)."""
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    @contextmanager
+    def active(self):
+        """Считает запросы внутри блока with."""
+        connection_created.connect(self.install)
+        for conn in connections.all(initialized_only=True):
+            self.install(conn)
+        try:
+            yield self
+        finally:
+            connection_created.disconnect(self.install)
+            for conn in connections.all(initialized_only=True):
+                if self in conn.execute_wrappers:
+                    conn.execute_wrappers.remove(self)
+
+
+class StubBotAPIHandler(BaseHTTPRequestHandler):
+    """Сервер-заглушка Bot API: отвечает успехом на любой метод."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+        payload = b'{"ok":true,"result":{}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubBotAPIServer(ThreadingHTTPServer):
+    """Сервер-заглушка Bot API с очередью, рассчитанной на пакетную рассылку."""
+
+    # С очередью по умолчанию (5) часть одновременных подключений
+    # отбрасывается и повторяется клиентом только через секунду
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+@contextmanager
+def stub_bot_api():
+    """
+    Запускает сервер-заглушку Bot API и направляет на него отправителя Telegram.
+
+    Yields:
+        ThreadingHTTPServer: Сервер с числом принятых запросов в requests
+    """
+    server = StubBotAPIServer(("127.0.0.1", 0), StubBotAPIHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    previous = telegram._sender
+    telegram._sender = telegram.TelegramSender(
+        token="PERFBENCH",
+        api_url=f"http://127.0.0.1:{server.server_port}",
+        limiter=telegram.RateLimiter(global_rate=1_000_000, per_chat_rate=1_000_000),
+    )
+    try:
+        yield server
+    finally:
+        telegram._sender.close()
+        telegram._sender = previous
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Создает временную тестовую базу на время бенчмарка и удаляет её после.
+
+    SQLite база создается в файле, а не в памяти, чтобы потоки
+    с собственными соединениями работали с базой как в эксплуатации.
+    """
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    old_name = connection.settings_dict["NAME"]
+    old_test_name = test_settings.get("NAME")
+    tmpdir = None
+    if connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix="perfbench-")
+        test_settings["NAME"] = str(Path(tmpdir) / "perfbench.sqlite3")
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def seed(users, tasks_per_user, completed_every=5, overdue_every=10):
+    """
+    Быстро заполняет базу пользователями, профилями Telegram и задачами.
+
+    Сигналы моделей при bulk_create не вызываются, поэтому счетчики
+    статистики создаются одной сверкой в конце.
+
+    Args:
+        users (int): Число пользователей
+        tasks_per_user (int): Задач на пользователя
+        completed_every (int): Каждая такая задача создается выполненной
+        overdue_every (int): Каждая такая задача создается просроченной
+
+    Returns:
+        dict: users (список (id, access токен, telegram_id))
+            и open_tasks (ID невыполненных задач по ID пользователя)
+    """
+    # Одинаковый хеш для всех: пароли бенчмарку не нужны, а хеширование медленное
+    password = make_password(None)
+    created = User.objects.bulk_create(
+        User(username=f"perfbench{i}", password=password) for i in range(users)
+    )
+    task_lists = TaskList.objects.bulk_create(
+        TaskList(name="Мои задачи", owner=user, is_default=True) for user in created
+    )
+    TelegramProfile.objects.bulk_create(
+        TelegramProfile(user=user, telegram_id=TELEGRAM_ID_BASE + i)
+        for i, user in enumerate(created)
+    )
+
+    now = timezone.now()
+    for user, task_list in zip(created, task_lists):
+        Task.objects.bulk_create(
+            (
+                Task(
+                    title=f"Задача {j}",
+                    description="Описание задачи " * 4,
+                    deadline=now + timedelta(hours=-1 if j % overdue_every == 0 else j + 1),
+                    completed=j % completed_every == 1,
+                    task_list=task_list,
+                    assigned_to=user,
+                )
+                for j in range(tasks_per_user)
+            ),
+            batch_size=1000,
+        )
+    stats.reconcile()
+
+    open_tasks = {user.id: [] for user in created}
+    for task_id, user_id in (
+        Task.objects.filter(completed=False, deadline__gt=now)
+        .order_by("-id").values_list("id", "assigned_to_id")
+    ):
+        open_tasks[user_id].append(task_id)
+
+    return {
+        "users": [
+            (user.id, str(AccessToken.for_user(user)), TELEGRAM_ID_BASE + i)
+            for i, user in enumerate(created)
+        ],
+        "open_tasks": open_tasks,
+    }
+
+
+def take_open_task(fixture, user_id):
+    """Возвращает ещё не выполненную задачу пользователя."""
+    try:
+        return fixture["open_tasks"][user_id].pop()
+    except IndexError:
+        raise CommandError("Не хватает невыполненных задач: увеличьте --tasks")
+
+
+def request_headers(token=None, json_body=False):
+    """Заголовки ASGI запроса."""
+    headers = [(b"host", b"localhost")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    if json_body:
+        headers.append((b"content-type", b"application/json"))
+    return headers
+
+
+def build_requests(name, fixture, count):
+    """
+    Формирует запросы сценария.
+
+    Args:
+        name (str): Сценарий
+        fixture (dict): Результат seed
+        count (int): Число запросов
+
+    Returns:
+        list: Кортежи (метод, путь, заголовки, тело)
+    """
+    users = cycle(fixture["users"])
+    deadline = (timezone.now() + timedelta(days=1)).isoformat()
+    result = []
+    for i in range(count):
+        user_id, token, telegram_id = next(users)
+        if name == "list":
+            result.append(("GET", "/api/my-tasks/", request_headers(token), b""))
+        elif name == "telegram-list":
+            query = urlencode({"telegram_id": telegram_id})
+            result.append(("GET", f"/api/telegram/tasks/?{query}", request_headers(), b""))
+        elif name == "create":
+            body = json.dumps({"title": f"Новая задача {i}", "deadline": deadline}).encode()
+            result.append(("POST", "/api/create-task/", request_headers(token, True), body))
+        elif name == "complete":
+            path = f"/api/complete-task/{take_open_task(fixture, user_id)}/"
+            result.append(("PATCH", path, request_headers(token), b""))
+        elif name == "telegram-complete":
+            body = json.dumps(
+                {"telegram_id": telegram_id, "task_id": take_open_task(fixture, user_id)}
+            ).encode()
+            path = "/api/telegram/complete-task/"
+            result.append(("POST", path, request_headers(json_body=True), body))
+    return result
+
+
+async def send_request(application, method, path, headers, body):
+    """
+    Выполняет один HTTP запрос к ASGI приложению.
+
+    Returns:
+        int: HTTP статус ответа
+    """
+    if body:
+        headers = [*headers, (b"content-length", str(len(body)).encode())]
+    communicator = HttpCommunicator(application, method, path, body=body, headers=headers)
+    response = await communicator.get_response(timeout=RESPONSE_TIMEOUT)
+    # Django дочитывает http.disconnect уже после ответа
+    await communicator.wait(timeout=RESPONSE_TIMEOUT)
+    return response["status"]
+
+
+async def run_requests(application, requests, concurrency):
+    """
+    Выполняет запросы с заданной конкурентностью.
+
+    Returns:
+        dict: elapsed, latencies (секунды) и statuses (Counter)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def worker(request):
+        async with semaphore:
+            sent = time.perf_counter()
+            statuses[await send_request(application, *request)] += 1
+            latencies.append(time.perf_counter() - sent)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(request) for request in requests))
+    return {
+        "elapsed": time.perf_counter() - started,
+        "latencies": latencies,
+        "statuses": statuses,
+    }
+
+
+async def run_ws_fanout(application, fixture, connections_count, rounds, concurrency):
+    """
+    Измеряет задержку доставки событий на открытые соединения WebSocket.
+
+    Соединения распределяются по пользователям по кругу. В каждом раунде
+    каждый пользователь с соединениями отмечает задачу выполненной,
+    а задержка считается от отправки PATCH до получения события каждым
+    соединением этого пользователя.
+
+    Returns:
+        dict: elapsed, latencies (секунды) и statuses (Counter PATCH ответов)
+    """
+    users = fixture["users"][:connections_count]
+    sockets = {user_id: [] for user_id, _, _ in users}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(user_id, token):
+        async with semaphore:
+            communicator = WebsocketCommunicator(application, f"/ws/tasks/?token={token}")
+            connected, _ = await communicator.connect(timeout=RESPONSE_TIMEOUT)
+            if not connected:
+                raise CommandError("WebSocket соединение отклонено")
+            sockets[user_id].append(communicator)
+
+    user_cycle = cycle(users)
+    await asyncio.gather(*(
+        connect(user_id, token)
+        for user_id, token, _ in (next(user_cycle) for _ in range(connections_count))
+    ))
+
+    latencies = []
+    statuses = Counter()
+    started = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            sent_at = {}
+
+            async def receive(user_id, communicator):
+                await communicator.receive_from(timeout=RESPONSE_TIMEOUT)
+                latencies.append(time.perf_counter() - sent_at[user_id])
+
+            async def complete(user_id, token):
+                path = f"/api/complete-task/{take_open_task(fixture, user_id)}/"
+                async with semaphore:
+                    sent_at[user_id] = time.perf_counter()
+                    status = await send_request(
+                        application, "PATCH", path, request_headers(token), b""
+                    )
+                statuses[status] += 1
+                if status != 200:
+                    # Без события соединения пользователя ждали бы до таймаута
+                    raise CommandError(f"PATCH {path}: HTTP {status}")
+
+            await asyncio.gather(
+                *(receive(user_id, c) for user_id, group in sockets.items() for c in group),
+                *(complete(user_id, token) for user_id, token, _ in users),
+            )
+    finally:
+        elapsed = time.perf_counter() - started
+        for group in sockets.values():
+            for communicator in group:
+                # После таймаута приложение соединения уже остановлено
+                if not communicator.future.done():
+                    await communicator.disconnect()
+
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+
+def percentiles(latencies):
+    """Возвращает p50, p95 и p99 в миллисекундах."""
+    if not latencies:
+        return None, None, None
+    if len(latencies) == 1:
+        return (latencies[0] * 1000,) * 3
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return tuple(round(quantiles[i] * 1000, 2) for i in (49, 94, 98))
+
+
+def summarize(result, requests, queries):
+    """
+    Сводит результат сценария.
+
+    Args:
+        result (dict): elapsed, latencies и statuses
+        requests (int): Число запросов, на которое делятся SQL запросы
+        queries (int | None): Число SQL запросов или None, если не считается
+
+    Returns:
+        dict: requests, errors, rps, p50_ms, p95_ms, p99_ms, queries_per_request
+    """
+    count = len(result["latencies"]) or requests
+    p50, p95, p99 = percentiles(result["latencies"])
+    return {
+        "requests": count,
+        "errors": sum(n for status, n in result["statuses"].items() if status >= 400),
+        "rps": round(count / result["elapsed"], 1) if result["elapsed"] else None,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "queries_per_request": (
+            round(queries / requests, 2) if queries is not None and requests else None
+        ),
+    }
+
+
+def run_benchmarks(fixture, scenarios, requests, concurrency, ws_connections, ws_rounds):
+    """
+    Прогоняет сценарии на заполненной базе.
+
+    Должна вызываться с OFFLINE_SETTINGS.
+
+    Args:
+        fixture (dict): Результат seed
+        scenarios (list): Имена сценариев из SCENARIOS
+        requests (int): Запросов на HTTP сценарий
+        concurrency (int): Одновременных запросов
+        ws_connections (int): Соединений WebSocket
+        ws_rounds (int): Раундов событий в ws-fanout
+
+    Returns:
+        dict: Сводка summarize по имени сценария
+    """
+    from config.asgi import application
+
+    results = {}
+    with stub_bot_api() as server:
+        for name in scenarios:
+            with QueryCounter().active() as counter:
+                if name == "ws-fanout":
+                    result = asyncio.run(run_ws_fanout(
+                        application, fixture, ws_connections, ws_rounds, concurrency
+                    ))
+                    results[name] = summarize(result, len(result["latencies"]), None)
+                elif name == "digest":
+                    sent = server.requests
+                    started = time.perf_counter()
+                    check_expired_tasks()
+                    messages = server.requests - sent
+                    result = {
+                        "elapsed": time.perf_counter() - started,
+                        "latencies": [],
+                        "statuses": Counter({200: messages}),
+                    }
+                    results[name] = summarize(result, messages, counter.count)
+                else:
+                    result = asyncio.run(run_requests(
+                        application, build_requests(name, fixture, requests), concurrency
+                    ))
+                    results[name] = summarize(result, requests, counter.count)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Сравнивает результаты с сохраненными.
+
+    Args:
+        results (dict): Сводки текущего прогона по сценарию
+        baseline (dict): Сводки сохраненного прогона по сценарию
+        tolerance (float): Допустимое относительное ухудшение p95
+            и пропускной способности
+
+    Returns:
+        list: Описания регрессий
+    """
+    regressions = []
+    for name, current in results.items():
+        stored = baseline.get(name)
+        if stored is None:
+            continue
+        if None not in (current["queries_per_request"], stored["queries_per_request"]) and (
+            current["queries_per_request"] > stored["queries_per_request"] + QUERY_EPSILON
+        ):
+            regressions.append(
+                f"{name}: SQL запросов на запрос {current['queries_per_request']} "
+                f"(было {stored['queries_per_request']})"
+            )
+        if None not in (current["p95_ms"], stored["p95_ms"]) and (
+            current["p95_ms"] > stored["p95_ms"] * (1 + tolerance)
+        ):
+            regressions.append(f"{name}: p95 {current['p95_ms']} мс (было {stored['p95_ms']} мс)")
+        if None not in (current["rps"], stored["rps"]) and (
+            current["rps"] < stored["rps"] * (1 - tolerance)
+        ):
+            regressions.append(f"{name}: {current['rps']} запросов/с (было {stored['rps']})")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк REST, WebSocket и API бота на временной базе со сравнением с эталоном."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=100, help="Задач на пользователя")
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--ws-connections", type=int, default=100)
+        parser.add_argument("--ws-rounds", type=int, default=5)
+        parser.add_argument(
+            "--scenarios", default=",".join(SCENARIOS),
+            help=f"Сценарии через запятую: {', '.join(SCENARIOS)}",
+        )
+        parser.add_argument("--baseline", help="JSON с эталонными результатами для сравнения")
+        parser.add_argument("--save-baseline", help="Сохранить результаты как эталон")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="Допустимое ухудшение p95 и пропускной способности (0.5 = 50%%)",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+        for name in ("users", "tasks", "requests", "concurrency", "ws_connections", "ws_rounds"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} должно быть положительным")
+
+        params = {
+            "users": options["users"],
+            "tasks": options["tasks"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "ws_connections": options["ws_connections"],
+            "ws_rounds": options["ws_rounds"],
+            "database": connection.vendor,
+        }
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Не удалось прочитать эталон: {e}")
+            if baseline["params"] != params:
+                raise CommandError(
+                    f"Эталон снят с другими параметрами: {baseline['params']}"
+                )
+
+        with override_settings(**OFFLINE_SETTINGS), benchmark_database():
+            fixture = seed(options["users"], options["tasks"])
+            results = run_benchmarks(
+                fixture, scenarios, options["requests"], options["concurrency"],
+                options["ws_connections"], options["ws_rounds"],
+            )
+
+        self.write_report(results)
+
+        failed = [name for name, result in results.items() if result["errors"]]
+        if failed:
+            raise CommandError(f"Ошибочные ответы в сценариях: {', '.join(failed)}")
+
+        if options["save_baseline"]:
+            Path(options["save_baseline"]).write_text(
+                json.dumps({"params": params, "scenarios": results}, indent=2, ensure_ascii=False)
+                + "\n"
+            )
+            self.stdout.write(f"Эталон сохранен в {options['save_baseline']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline["scenarios"], options["tolerance"])
+            if regressions:
+                raise CommandError("Регрессии относительно эталона:\n" + "\n".join(regressions))
+            self.stdout.write("Регрессий относительно эталона нет")
+
+    def write_report(self, results):
+        """Печатает таблицу результатов."""
+        def cell(value, spec):
+            return format(value, spec) if value is not None else format("-", spec[:-3])
+
+        self.stdout.write(
+            f"{'сценарий':<18} {'запросов':>8} {'зап/с':>8} {'p50 мс':>8} "
+            f"{'p95 мс':>8} {'p99 мс':>8} {'SQL/зап':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18} {result['requests']:>8} {cell(result['rps'], '>8.0f')} "
+                f"{cell(result['p50_ms'], '>8.1f')} {cell(result['p95_ms'], '>8.1f')} "
+                f"{cell(result['p99_ms'], '>8.1f')} {cell(result['queries_per_request'], '>8.2f')}"
+            )
@@ -0,0 +1,408 @@
+"""
+Метрики производительности HTTP запросов и задач Celery.
+
+Для каждого запроса (RequestMetricsMiddleware) и каждой задачи Celery
+(сигналы task_prerun/task_postrun) собираются:
+
+- полное время выполнения;
+- число SQL запросов и время в базе (execute_wrappers всех соединений);
+- время кодирования ответа в JSON (tasks.renderers.render_json);
+- время отправки событий в channel layer (tasks.events).
+
+Измерение текущего запроса хранится в ContextVar, поэтому его видят
+и потоки sync_to_async, а вне запроса обертка SQL ничего не делает.
+
+Итоги накапливаются в гистограммах реестра процесса. Раз
+в REQUEST_METRICS['FLUSH_INTERVAL'] секунд фоновый поток процесса
+сохраняет снимок реестра в общий кэш (в продакшене Redis), поэтому
+запросы и задачи не ждут кэш. /metrics отдает сумму снимков всех
+воркеров gunicorn и Celery в текстовом формате Prometheus и требует
+токен REQUEST_METRICS['TOKEN']; без токена метрики недоступны.
+Снимок процесса, переставшего обновлять его, хранится
+REQUEST_METRICS['PROCESS_TTL'] секунд.
+
+Повторяющиеся SQL запросы одного вида (N+1) пишутся в лог
+с уровнем WARNING.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# Метрики: тип, описание и границы корзин гистограммы
+METRICS = {
+    "http_requests_total": ("counter", "HTTP запросы по коду ответа", None),
+    "http_request_duration_seconds": ("histogram", "Время обработки HTTP запроса", DURATION_BUCKETS),
+    "http_request_db_queries": ("histogram", "SQL запросов на HTTP запрос", QUERY_BUCKETS),
+    "http_request_db_duration_seconds": ("histogram", "Время SQL запросов HTTP запроса", DURATION_BUCKETS),
+    "http_request_serialize_duration_seconds": (
+        "histogram", "Время кодирования ответа в JSON", DURATION_BUCKETS,
+    ),
+    "http_request_publish_duration_seconds": (
+        "histogram", "Время отправки событий в channel layer", DURATION_BUCKETS,
+    ),
+    "http_request_n_plus_one_total": ("counter", "HTTP запросы с повторяющимися SQL запросами", None),
+    "celery_tasks_total": ("counter", "Задачи Celery по состоянию", None),
+    "celery_task_duration_seconds": ("histogram", "Время выполнения задачи Celery", DURATION_BUCKETS),
+    "celery_task_db_queries": ("histogram", "SQL запросов на задачу Celery", QUERY_BUCKETS),
+    "celery_task_db_duration_seconds": ("histogram", "Время SQL запросов задачи Celery", DURATION_BUCKETS),
+    "celery_task_serialize_duration_seconds": (
+        "histogram", "Время кодирования JSON в задаче Celery", DURATION_BUCKETS,
+    ),
+    "celery_task_publish_duration_seconds": (
+        "histogram", "Время отправки событий в channel layer из задачи Celery", DURATION_BUCKETS,
+    ),
+    "celery_task_n_plus_one_total": ("counter", "Задачи Celery с повторяющимися SQL запросами", None),
+}
+
+PROCESSES_KEY = "tasks:metrics:processes"
+
+
+class Measurement:
+    """
+    Измерение одного HTTP запроса или задачи Celery.
+
+    Attributes:
+        started (float): Момент начала по perf_counter
+        queries (int): Число SQL запросов
+        timings (defaultdict): Время по этапам ("db", "serialize", "publish"), секунды
+        shapes (Counter): Число выполнений каждого текста SQL
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = defaultdict(float)
+        self.shapes = Counter()
+
+    def elapsed(self):
+        """Время с начала измерения, секунды."""
+        return time.perf_counter() - self.started
+
+    def repeated_queries(self):
+        """
+        Возвращает SQL запросы, выполненные не меньше порога N+1 раз.
+
+        Returns:
+            list: Пары (sql, число выполнений)
+        """
+        threshold = settings.REQUEST_METRICS['N_PLUS_ONE_THRESHOLD']
+        return [(sql, count) for sql, count in self.shapes.items() if count >= threshold]
+
+
+_current = ContextVar("tasks_metrics_measurement", default=None)
+
+
+@contextmanager
+def measure():
+    """
+    Измеряет блок кода как один запрос.
+
+    Yields:
+        Measurement: Измерение
+    """
+    measurement = Measurement()
+    token = _current.set(measurement)
+    try:
+        yield measurement
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timer(stage):
+    """Добавляет время блока к этапу stage текущего измерения."""
+    measurement = _current.get()
+    if measurement is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        measurement.timings[stage] += time.perf_counter() - started
+
+
+def query_hook(execute, sql, params, many, context):
+    """Обертка execute_wrappers: считает SQL запросы текущего измерения."""
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.timings["db"] += time.perf_counter() - started
+        measurement.queries += 1
+        measurement.shapes[sql] += 1
+
+
+@receiver(connection_created)
+def install_query_hook(sender, connection, **kwargs):
+    """Подключает query_hook к новому соединению с базой."""
+    if query_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_hook)
+
+
+class Registry:
+    """
+    Потокобезопасный реестр счетчиков и гистограмм процесса.
+
+    Значения хранятся по ключу (имя метрики, кортеж пар меток):
+    у счетчика — число, у гистограммы — [счетчики корзин, сумма, число],
+    где последняя корзина — значения больше всех границ.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Обнуляет реестр (в том числе в дочернем процессе после fork)."""
+        self.values = {}
+
+    def inc(self, name, labels, amount=1):
+        """Увеличивает счетчик."""
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Добавляет значение в гистограмму."""
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            state[0][bisect_left(buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        """Возвращает копию значений реестра."""
+        with self.lock:
+            return {
+                key: [list(value[0]), value[1], value[2]] if isinstance(value, list) else value
+                for key, value in self.values.items()
+            }
+
+
+registry = Registry()
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _after_fork():
+    """Сбрасывает реестр и поток сохранения в дочернем процессе."""
+    global _flusher, _flusher_lock
+    registry.reset()
+    # Поток родителя в дочерний процесс не переходит
+    _flusher = None
+    _flusher_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def process_key():
+    """Ключ кэша со снимком реестра этого процесса."""
+    return f"tasks:metrics:{socket.gethostname()}:{os.getpid()}"
+
+
+def flush():
+    """Сохраняет снимок реестра процесса в общий кэш."""
+    config = settings.REQUEST_METRICS
+    key = process_key()
+    cache.set(key, registry.snapshot(), config['PROCESS_TTL'])
+    # Список процессов без блокировки: запись, потерянная при гонке,
+    # вернется со следующим сохранением этого процесса
+    processes = cache.get(PROCESSES_KEY) or {}
+    wall = time.time()
+    processes = {k: seen for k, seen in processes.items() if wall - seen < config['PROCESS_TTL']}
+    processes[key] = wall
+    cache.set(PROCESSES_KEY, processes, config['PROCESS_TTL'])
+
+
+def _flush_loop():
+    """Сохраняет снимок реестра раз в REQUEST_METRICS['FLUSH_INTERVAL'] секунд."""
+    while True:
+        time.sleep(settings.REQUEST_METRICS['FLUSH_INTERVAL'])
+        try:
+            flush()
+        except Exception:
+            logger.exception("Не удалось сохранить метрики процесса")
+
+
+def start_flusher():
+    """
+    Запускает фоновый поток сохранения снимков, если он еще не запущен.
+
+    Поток запускается при первом измерении в процессе (и заново после
+    fork), так что процессы без запросов и задач кэш не пишут. Итоги
+    последнего интервала завершающегося процесса теряются.
+    """
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flusher.start()
+
+
+def collect():
+    """
+    Суммирует снимки реестров всех процессов.
+
+    Returns:
+        dict: Значения по ключу (имя метрики, метки)
+    """
+    flush()
+    total = {}
+    for snapshot in cache.get_many(list(cache.get(PROCESSES_KEY) or {})).values():
+        for key, value in snapshot.items():
+            if key[0] not in METRICS:
+                continue
+            if not isinstance(value, list):
+                total[key] = total.get(key, 0) + value
+                continue
+            state = total.setdefault(key, [[0] * len(value[0]), 0.0, 0])
+            state[0] = [a + b for a, b in zip(state[0], value[0])]
+            state[1] += value[1]
+            state[2] += value[2]
+    return total
+
+
+def _labels(pairs):
+    """Форматирует метки Prometheus."""
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_prometheus(values):
+    """
+    Форматирует значения в текстовом формате Prometheus 0.0.4.
+
+    Args:
+        values (dict): Результат collect
+
+    Returns:
+        str: Текст для /metrics
+    """
+    by_name = defaultdict(list)
+    for (name, labels), value in values.items():
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name.get(name, ())):
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {value}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket in zip((*buckets, "+Inf"), counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_labels((*labels, ('le', bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def record(prefix, labels, measurement, elapsed):
+    """
+    Добавляет итоги измерения в реестр и пишет в лог N+1.
+
+    Кэш не используется: снимок сохраняет поток start_flusher.
+
+    Args:
+        prefix (str): "http_request" или "celery_task"
+        labels (tuple): Метки (пары имя-значение) гистограмм
+        measurement (Measurement): Измерение
+        elapsed (float): Полное время, секунды
+    """
+    registry.observe(f"{prefix}_duration_seconds", labels, elapsed)
+    registry.observe(f"{prefix}_db_queries", labels[:1], measurement.queries)
+    registry.observe(f"{prefix}_db_duration_seconds", labels[:1], measurement.timings["db"])
+    registry.observe(f"{prefix}_serialize_duration_seconds", labels[:1], measurement.timings["serialize"])
+    registry.observe(f"{prefix}_publish_duration_seconds", labels[:1], measurement.timings["publish"])
+
+    repeated = measurement.repeated_queries()
+    if repeated:
+        registry.inc(f"{prefix}_n_plus_one_total", labels[:1])
+        for sql, count in repeated:
+            logger.warning("Возможный N+1 в %s: %s раз %s", labels[0][1], count, sql[:500])
+    start_flusher()
+
+
+def server_timing(measurement, elapsed):
+    """
+    Формирует заголовок Server-Timing.
+
+    Args:
+        measurement (Measurement): Измерение запроса
+        elapsed (float): Полное время запроса, секунды
+
+    Returns:
+        str: Значение заголовка
+    """
+    timings = measurement.timings
+    return (
+        f'app;dur={elapsed * 1000:.1f}, '
+        f'db;dur={timings["db"] * 1000:.1f};desc="{measurement.queries} queries", '
+        f'serialize;dur={timings["serialize"] * 1000:.1f}, '
+        f'publish;dur={timings["publish"] * 1000:.1f}'
+    )
+
+
+_task_measurements = {}
+
+
+@task_prerun.connect
+def task_started(task_id=None, **kwargs):
+    """Начинает измерение задачи Celery."""
+    if settings.REQUEST_METRICS['ENABLED']:
+        measurement = Measurement()
+        _task_measurements[task_id] = (measurement, _current.set(measurement))
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    """Записывает итоги задачи Celery."""
+    entry = _task_measurements.pop(task_id, None)
+    if entry is None:
+        return
+    measurement, token = entry
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Пул потоков или gevent: задача завершилась в другом контексте
+        _current.set(None)
+    registry.inc("celery_tasks_total", (("task", task.name), ("state", state or "UNKNOWN")))
+    record("celery_task", (("task", task.name),), measurement, measurement.elapsed())
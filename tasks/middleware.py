@@ -0,0 +1,117 @@
+"""
+Middleware для WebSocket соединений и HTTP запросов.
+
+Веб-интерфейс аутентифицируется через JWT, а не через сессию, поэтому
+стандартный AuthMiddlewareStack не знает пользователя WebSocket соединения.
+Этот модуль добавляет аутентификацию по JWT токену, переданному
+в параметре строки запроса ``token``.
+
+RequestMetricsMiddleware измеряет HTTP запросы (см. tasks.metrics).
+"""
+
+from urllib.parse import parse_qs
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import metrics
+
+
+@database_sync_to_async
+def get_user_from_token(raw_token):
+    """
+    Возвращает пользователя по JWT access токену.
+
+    Args:
+        raw_token (str): JWT access токен
+
+    Returns:
+        User | None: Активный пользователь или None, если токен недействителен
+    """
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return User.objects.filter(
+        **{api_settings.USER_ID_FIELD: user_id}, is_active=True
+    ).first()
+
+
+class JWTAuthMiddleware:
+    """
+    ASGI middleware, устанавливающее scope["user"] по JWT токену.
+
+    Если токен не передан или недействителен, scope остаётся без изменений
+    (например, с пользователем из сессии).
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        raw_token = query.get("token", [None])[0]
+        if raw_token:
+            user = await get_user_from_token(raw_token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await self.inner(scope, receive, send)
+
+
+class RequestMetricsMiddleware:
+    """
+    Django middleware, измеряющее каждый HTTP запрос.
+
+    Записывает время, SQL запросы, кодирование ответа и отправку событий
+    в гистограммы tasks.metrics с меткой имени представления и добавляет
+    заголовок Server-Timing. Работает и в синхронном, и в асинхронном
+    стеке, поэтому не добавляет переключений потоков. Должно стоять
+    первым в MIDDLEWARE, чтобы измерять весь запрос.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with metrics.measure() as measurement:
+            response = self.get_response(request)
+            self.finish(request, response, measurement)
+        return response
+
+    async def __acall__(self, request):
+        with metrics.measure() as measurement:
+            response = await self.get_response(request)
+            self.finish(request, response, measurement)
+        return response
+
+    def finish(self, request, response, measurement):
+        """Записывает итоги запроса и добавляет Server-Timing."""
+        elapsed = measurement.elapsed()
+        match = request.resolver_match
+        view = match.view_name if match is not None else "unmatched"
+        metrics.registry.inc("http_requests_total", (
+            ("view", view), ("method", request.method), ("status", response.status_code),
+        ))
+        metrics.record(
+            "http_request", (("view", view), ("method", request.method)), measurement, elapsed
+        )
+        if settings.REQUEST_METRICS['SERVER_TIMING']:
+            response["Server-Timing"] = metrics.server_timing(measurement, elapsed)
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from tasks.operations import AddIndexConcurrently, RemoveFieldIndexConcurrently, atomic_migration
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся в PostgreSQL без блокировки записи (CONCURRENTLY)
+    atomic = atomic_migration()
+
+    dependencies = [
+        ('tasks', '0003_task_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Сначала строятся составные индексы, и только потом удаляются
+    # индексы внешних ключей, которые они заменяют. AlterField(db_index=False)
+    # меняет только состояние: в PostgreSQL он пересоздал бы ограничение FK
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'completed', 'deadline'], name='task_assignee_done_deadline'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['deadline'], name='task_open_deadline'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['task_list', 'created_at'], name='task_list_created'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='assigned_to',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AlterField(
+                    model_name='task',
+                    name='task_list',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='tasks.tasklist'),
+                ),
+            ],
+            database_operations=[
+                RemoveFieldIndexConcurrently(model_name='task', name='assigned_to'),
+                RemoveFieldIndexConcurrently(model_name='task', name='task_list'),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from tasks.operations import AddIndexConcurrently, atomic_migration
+
+
+class Migration(migrations.Migration):
+    # Индекс строится в PostgreSQL без блокировки записи (CONCURRENTLY)
+    atomic = atomic_migration()
+
+    dependencies = [
+        ('tasks', '0004_task_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'deadline', 'id'], name='task_assignee_deadline'),
+        ),
+    ]
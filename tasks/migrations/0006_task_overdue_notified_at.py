@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+from tasks.operations import AddIndexConcurrently, RemoveIndexConcurrently, atomic_migration
+
+
+class Migration(migrations.Migration):
+    # Индексы меняются в PostgreSQL без блокировки записи (CONCURRENTLY)
+    atomic = atomic_migration()
+
+    dependencies = [
+        ('tasks', '0005_task_assignee_deadline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Новый индекс строится до удаления старого, чтобы поиск
+    # просроченных задач ни на каком шаге не остался без индекса
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False), ('overdue_notified_at__isnull', True)), fields=['deadline'], name='task_overdue_pending'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='task',
+            name='task_open_deadline',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:05
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def mark_default_lists(apps, schema_editor):
+    """Назначает списком по умолчанию самый первый список каждого пользователя."""
+    TaskList = apps.get_model('tasks', 'TaskList')
+    first_ids = (
+        TaskList.objects.values('owner').annotate(first_id=Min('id')).values('first_id')
+    )
+    TaskList.objects.filter(id__in=first_ids).update(is_default=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_overdue_notified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasklist',
+            name='is_default',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_default_lists, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tasklist',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('owner',), name='tasklist_one_default_per_owner'),
+        ),
+    ]
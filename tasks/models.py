@@ -17,12 +17,28 @@ class TaskList(models.Model):
     Каждый пользователь может иметь несколько списков задач для организации
     своей работы.
     
+    Один из списков пользователя помечается как список по умолчанию:
+    в него попадают задачи, созданные без явного указания списка.
+    Уникальное ограничение гарантирует, что такой список у пользователя
+    один, даже при конкурентном создании.
+
     Attributes:
         name (str): Название списка задач (максимум 100 символов)
         owner (User): Владелец списка задач (связь с моделью User)
+        is_default (bool): Список по умолчанию для задач владельца
     """
     name = models.CharField(max_length=100)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    is_default = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner'],
+                condition=models.Q(is_default=True),
+                name='tasklist_one_default_per_owner',
+            ),
+        ]
 
     def __str__(self):
         """Строковое представление списка задач."""
@@ -45,20 +61,181 @@ class Task(models.Model):
         task_list (TaskList): Список задач, к которому принадлежит задача
         assigned_to (User): Пользователь, которому назначена задача
         created_at (datetime): Время создания задачи (автоматически)
+        updated_at (datetime): Время последнего изменения задачи; массовые
+            операции заполняют его явно (см. tasks.sync)
+        version (int): Версия строки, увеличивается при каждом сохранении
+        overdue_notified_at (datetime): Когда пользователь получил уведомление
+            о просрочке задачи (пусто, если ещё не уведомлён)
     """
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     deadline = models.DateTimeField()
     completed = models.BooleanField(default=False)
 
-    task_list = models.ForeignKey(TaskList, on_delete=models.CASCADE)
-    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
+    # Отдельные индексы внешних ключей не нужны: их покрывают
+    # составные индексы из Meta.indexes (ключ стоит первым столбцом)
+    task_list = models.ForeignKey(TaskList, on_delete=models.CASCADE, db_index=False)
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='tasks', db_index=False
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+    overdue_notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Списки задач пользователя с фильтром по статусу и сортировкой по сроку
+            models.Index(
+                fields=['assigned_to', 'completed', 'deadline'],
+                name='task_assignee_done_deadline',
+            ),
+            # Постраничный вывод всех задач пользователя по (deadline, id)
+            models.Index(
+                fields=['assigned_to', 'deadline', 'id'],
+                name='task_assignee_deadline',
+            ),
+            # Поиск просроченных задач: только невыполненные строки,
+            # о просрочке которых пользователь ещё не уведомлён
+            models.Index(
+                fields=['deadline'],
+                condition=models.Q(completed=False, overdue_notified_at__isnull=True),
+                name='task_overdue_pending',
+            ),
+            models.Index(
+                fields=['task_list', 'created_at'],
+                name='task_list_created',
+            ),
+            # Инкрементальная синхронизация: изменения пользователя по (updated_at, id)
+            models.Index(
+                fields=['assigned_to', 'updated_at', 'id'],
+                name='task_assignee_updated',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет задачу, увеличивая версию строки для существующих задач.
+
+        Версия передаётся клиентам в WebSocket событиях, чтобы они могли
+        отбрасывать устаревшие дельты. При переносе срока сбрасывается
+        отметка об уведомлении о просрочке, чтобы о новом сроке
+        пользователь тоже получил уведомление.
+        """
+        if not self._state.adding:
+            self.version += 1
+            changed = {'version', 'updated_at'}
+            if 'deadline' in self.changed_fields() and self.overdue_notified_at is not None:
+                self.overdue_notified_at = None
+                changed.add('overdue_notified_at')
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
+
+    # Значения полей на момент загрузки из базы (или последнего сохранения),
+    # по ним сигналы определяют, какие поля изменились
+    loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Загружает задачу и запоминает исходные значения полей."""
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_values = instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        """Возвращает значения загруженных (не отложенных) полей задачи."""
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def changed_fields(self):
+        """Возвращает имена полей, изменённых с момента загрузки."""
+        loaded = self.loaded_values or {}
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in loaded
+            and self.__dict__.get(field.attname) != loaded[field.attname]
+        ]
+
+    def __str__(self):
+        """
+        Строковое представление задачи.
+
+        Имя исполнителя берется, только если пользователь уже загружен
+        (select_related), иначе выводится его ID — без запроса на строку.
+        """
+        if Task.assigned_to.is_cached(self):
+            return f'{self.title} ({self.assigned_to.username})'
+        return f'{self.title} (#{self.assigned_to_id})'
+
+
+class UserTaskStats(models.Model):
+    """
+    Счетчики задач пользователя.
+
+    Обновляются инкрементально при сохранении и удалении задач
+    (см. tasks.stats) и периодически сверяются с таблицей задач.
+    Просроченные задачи и задачи на сегодня зависят от текущего
+    времени, поэтому не хранятся, а считаются по индексу
+    task_assignee_done_deadline.
+
+    Attributes:
+        user (User): Пользователь (первичный ключ)
+        total (int): Всего задач
+        completed (int): Выполненных задач
+        revision (int): Увеличивается при каждом изменении задач
+            пользователя (валидатор ETag списков задач)
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='task_stats'
+    )
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    revision = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        """Строковое представление счетчиков."""
+        return f'Статистика {self.user_id}: {self.completed}/{self.total}'
+
+
+class TaskTombstone(models.Model):
+    """
+    Отметка об удалении задачи для инкрементальной синхронизации.
+
+    Создается при удалении задачи, чтобы клиенты, синхронизирующие
+    изменения (см. tasks.sync), узнали об удалении. Хранится
+    TASK_SYNC['TOMBSTONE_TTL'] секунд, затем удаляется задачей
+    purge_task_tombstones.
+
+    Внешний ключ пользователя без ограничения в базе: отметки удаленных
+    вместе с пользователем задач создаются до удаления самого пользователя.
+
+    Attributes:
+        task_id (int): ID удаленной задачи
+        user (User): Пользователь, которому была назначена задача
+        deleted_at (datetime): Время удаления
+    """
+    task_id = models.BigIntegerField()
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False,
+        db_index=False, related_name='+',
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted'),
+        ]
 
     def __str__(self):
-        """Строковое представление задачи."""
-        return f'{self.title} ({self.assigned_to.username})'
+        """Строковое представление отметки об удалении."""
+        return f'Удалена задача {self.task_id}'
 
 
 class TelegramProfile(models.Model):
@@ -80,6 +257,18 @@ class TelegramProfile(models.Model):
     jwt_token = models.TextField(blank=True, null=True)  
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # telegram_id на момент загрузки из базы, нужен для сброса кэша
+    loaded_telegram_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Загружает профиль и запоминает исходный telegram_id."""
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_telegram_id = instance.__dict__.get('telegram_id')
+        return instance
+
     def __str__(self):
-        """Строковое представление профиля Telegram."""
-        return f'Telegram профиль {self.user.username} (ID: {self.telegram_id})'
\ No newline at end of file
+        """Строковое представление профиля Telegram (без запроса пользователя)."""
+        if TelegramProfile.user.is_cached(self):
+            return f'Telegram профиль {self.user.username} (ID: {self.telegram_id})'
+        return f'Telegram профиль #{self.user_id} (ID: {self.telegram_id})'
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Операции миграций приложения задач.
+
+Операции строят и удаляют индексы в PostgreSQL командами
+``CREATE INDEX CONCURRENTLY``/``DROP INDEX CONCURRENTLY``, которые
+не блокируют запись в таблицу. В отличие от
+django.contrib.postgres.operations они работают и с другими СУБД
+(как обычные операции с индексами), поэтому миграции остаются общими
+для SQLite и PostgreSQL.
+
+Порядок в миграции: сначала строится новый индекс, затем удаляется
+старый, чтобы запросы ни на каком шаге не остались без индекса.
+"""
+
+from django.db import connection, models
+from django.db.migrations.operations import AddIndex, RemoveIndex
+from django.db.migrations.operations.base import Operation
+
+
+def atomic_migration():
+    """
+    Признак атомарности миграции с операциями CONCURRENTLY.
+
+    CONCURRENTLY нельзя выполнять в транзакции, поэтому в PostgreSQL
+    такая миграция неатомарна; в остальных СУБД — атомарна.
+
+    Returns:
+        bool: Значение для Migration.atomic
+    """
+    return connection.vendor != "postgresql"
+
+
+def concurrently(schema_editor):
+    """Проверяет, строятся ли индексы CONCURRENTLY для СУБД соединения."""
+    return schema_editor.connection.vendor == "postgresql"
+
+
+def index_options(schema_editor):
+    """Аргументы add_index/remove_index для СУБД соединения."""
+    return {"concurrently": True} if concurrently(schema_editor) else {}
+
+
+class AddIndexConcurrently(AddIndex):
+    """AddIndex, который в PostgreSQL строит и удаляет индекс CONCURRENTLY."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, **index_options(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, **index_options(schema_editor))
+
+    def describe(self):
+        return f"Concurrently {super().describe().lower()}"
+
+
+class RemoveIndexConcurrently(RemoveIndex):
+    """RemoveIndex, который в PostgreSQL удаляет и строит индекс CONCURRENTLY."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = from_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.remove_index(model, index, **index_options(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = to_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.add_index(model, index, **index_options(schema_editor))
+
+    def describe(self):
+        return f"Concurrently {super().describe().lower()}"
+
+
+class RemoveFieldIndexConcurrently(Operation):
+    """
+    Удаляет одностолбцовый индекс поля только в базе.
+
+    Используется в SeparateDatabaseAndState вместе с AlterField(db_index=False)
+    в состоянии: сам AlterField внешнего ключа в PostgreSQL пересоздает
+    ограничение FK, а это проверка всей таблицы под блокировкой.
+    Индекс ищется по столбцу через интроспекцию, поэтому его имя
+    знать не нужно; при откате индекс строится заново.
+
+    Attributes:
+        model_name (str): Имя модели
+        name (str): Имя поля
+    """
+
+    def __init__(self, model_name, name):
+        self.model_name = model_name
+        self.name = name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [], {"model_name": self.model_name, "name": self.name}
+
+    def field_indexes(self, schema_editor, model):
+        """Возвращает имена индексов, построенных только по столбцу поля."""
+        column = model._meta.get_field(self.name).column
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        return [
+            name for name, info in constraints.items()
+            if info["index"] and info["columns"] == [column]
+            and not info["primary_key"] and not info["unique"]
+        ]
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        template = (
+            schema_editor.sql_delete_index_concurrently
+            if concurrently(schema_editor) else schema_editor.sql_delete_index
+        )
+        for name in self.field_indexes(schema_editor, model):
+            schema_editor.execute(template % {
+                "table": schema_editor.quote_name(model._meta.db_table),
+                "name": schema_editor.quote_name(name),
+            })
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        column = model._meta.get_field(self.name).column
+        index = models.Index(
+            fields=[self.name],
+            name=schema_editor._create_index_name(model._meta.db_table, [column], suffix=""),
+        )
+        schema_editor.add_index(model, index, **index_options(schema_editor))
+
+    def describe(self):
+        return f"Concurrently remove the index of {self.model_name}.{self.name} (database only)"
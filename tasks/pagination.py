@@ -0,0 +1,189 @@
+"""
+Курсорная (keyset) пагинация списков задач.
+
+Списки задач сортируются по (deadline, id), а страница выбирается условием
+"строго после/до позиции курсора" вместо OFFSET. Поэтому стоимость запроса
+не зависит от номера страницы, а вставка новых строк не сдвигает уже
+выданные страницы. Курсор непрозрачен для клиента: это base64 от
+направления и позиции последней (первой) строки страницы.
+"""
+
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+NEXT = "n"
+PREVIOUS = "p"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(direction, deadline, task_id):
+    """
+    Кодирует позицию в непрозрачный курсор.
+
+    Срок хранится как число микросекунд от эпохи, чтобы курсор был
+    коротким (он передаётся, в том числе, в callback-данных Telegram).
+
+    Args:
+        direction (str): NEXT или PREVIOUS
+        deadline (datetime): Срок строки на границе страницы
+        task_id (int): ID строки на границе страницы
+
+    Returns:
+        str: Курсор
+    """
+    micros = (deadline - EPOCH) // timedelta(microseconds=1)
+    raw = f"{direction}{micros}:{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Декодирует курсор, созданный encode_cursor.
+
+    Args:
+        cursor (str): Курсор из параметров запроса
+
+    Returns:
+        tuple: (направление, срок, ID задачи)
+
+    Raises:
+        NotFound: Если курсор повреждён
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, position = raw[0], raw[1:]
+        micros, task_id = position.split(":")
+        if direction not in (NEXT, PREVIOUS):
+            raise ValueError(direction)
+        deadline = EPOCH + timedelta(microseconds=int(micros))
+        return direction, deadline, int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, IndexError, OverflowError):
+        raise NotFound("Invalid cursor")
+
+
+def row_position(row):
+    """Возвращает (deadline, id) строки: экземпляра Task или словаря .values()."""
+    if isinstance(row, dict):
+        return row["deadline"], row["id"]
+    return row.deadline, row.id
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Возвращает срез queryset для страницы и курсоры соседних страниц.
+
+    Args:
+        queryset (QuerySet): Отфильтрованные задачи (без сортировки);
+            экземпляры модели или словари .values() с полями deadline и id
+        cursor (str | None): Курсор из запроса или None для первой страницы
+        page_size (int): Размер страницы
+
+    Returns:
+        tuple: QuerySet страницы (page_size + 1 строк, лишняя строка
+            показывает, есть ли продолжение) и функция
+            build_links(rows) -> (rows, next, previous), которая отрезает
+            лишнюю строку и строит курсоры соседних страниц
+    """
+    direction, deadline, task_id = decode_cursor(cursor) if cursor else (NEXT, None, None)
+
+    # Условие записано как "deadline >= X AND (deadline > X OR id > Y)",
+    # чтобы первая часть использовалась как диапазон по индексу
+    if direction == NEXT:
+        if deadline is not None:
+            queryset = queryset.filter(deadline__gte=deadline).filter(
+                Q(deadline__gt=deadline) | Q(id__gt=task_id)
+            )
+        queryset = queryset.order_by("deadline", "id")
+    else:
+        queryset = queryset.filter(deadline__lte=deadline).filter(
+            Q(deadline__lt=deadline) | Q(id__lt=task_id)
+        ).order_by("-deadline", "-id")
+
+    def build_links(rows):
+        rows = list(rows)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if direction == PREVIOUS:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if direction == PREVIOUS or has_more:
+                next_cursor = encode_cursor(NEXT, *row_position(last))
+            if (direction == NEXT and cursor) or (direction == PREVIOUS and has_more):
+                previous_cursor = encode_cursor(PREVIOUS, *row_position(first))
+        return rows, next_cursor, previous_cursor
+
+    return queryset[:page_size + 1], build_links
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Курсорная пагинация DRF для задач, упорядоченных по (deadline, id).
+
+    Ответ имеет вид {"next": курсор, "previous": курсор, "results": [...]},
+    где курсоры передаются обратно в параметре ``cursor``.
+
+    Attributes:
+        page_size: Размер страницы по умолчанию
+        max_page_size: Максимальный размер страницы, запрошенный клиентом
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, params):
+        """Возвращает размер страницы из параметров запроса."""
+        try:
+            size = int(params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает строки текущей страницы и запоминает курсоры."""
+        params = request.query_params
+        page, build_links = keyset_page(
+            queryset, params.get(self.cursor_query_param), self.get_page_size(params)
+        )
+        rows, self.next_cursor, self.previous_cursor = build_links(page)
+        return rows
+
+    async def apaginate_queryset(self, queryset, params):
+        """
+        Асинхронный вариант paginate_queryset для async представлений.
+
+        Args:
+            queryset (QuerySet): Отфильтрованные задачи
+            params (QueryDict): Параметры запроса
+
+        Returns:
+            list: Строки текущей страницы
+        """
+        page, build_links = keyset_page(
+            queryset, params.get(self.cursor_query_param), self.get_page_size(params)
+        )
+        rows, self.next_cursor, self.previous_cursor = build_links([row async for row in page])
+        return rows
+
+    def page_data(self, data):
+        """Возвращает тело ответа страницы: курсоры и сериализованные строки."""
+        return {
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        """Оборачивает сериализованные строки в ответ с курсорами."""
+        return Response(self.page_data(data))
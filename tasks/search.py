@@ -0,0 +1,136 @@
+"""
+Полнотекстовый поиск по заголовкам и описаниям задач.
+
+Индекс зависит от СУБД (см. миграцию 0009_task_search_index):
+
+- SQLite: таблица FTS5 ``tasks_task_fts`` с внешним содержимым
+  ``tasks_task``, которую триггеры синхронизируют при INSERT, UPDATE
+  заголовка или описания и DELETE. Ранжирование — bm25.
+- PostgreSQL: GIN индекс по выражению ``SEARCH_VECTOR_SQL`` (заголовок
+  с весом A, описание с весом B). Ранжирование — ts_rank.
+
+Индекс обновляет сама база, поэтому он синхронен и для save(),
+и для массовых операций. На других СУБД поиск сводится к icontains.
+
+Слова запроса ищутся по префиксу и объединяются через "И".
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Task
+
+# Больше слов в запросе не учитывается
+MAX_TERMS = 10
+
+# Выражение индекса tasks_task_search (должно совпадать с миграцией)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+# Веса столбцов (title, description) для bm25 в SQLite
+FTS_WEIGHTS = (10.0, 1.0)
+
+
+def search_terms(text):
+    """
+    Разбивает текст запроса на слова.
+
+    Знаки препинания и операторы языка запросов отбрасываются,
+    поэтому результат безопасно подставлять в MATCH и to_tsquery.
+
+    Args:
+        text (str): Текст запроса пользователя
+
+    Returns:
+        list: Слова в нижнем регистре (не более MAX_TERMS)
+    """
+    return re.findall(r"\w+", text.lower())[:MAX_TERMS]
+
+
+def _match_sql(terms):
+    """Возвращает условие поиска и его параметры для текущей СУБД."""
+    if connection.vendor == "sqlite":
+        query = " ".join(f'"{term}"*' for term in terms)
+        return "tasks_task_fts MATCH %s", [query]
+    query = " & ".join(f"{term}:*" for term in terms)
+    return f"({SEARCH_VECTOR_SQL}) @@ to_tsquery('simple', %s)", [query]
+
+
+def matching_tasks(text):
+    """
+    Возвращает условие Q для задач, подходящих под запрос (без ранжирования).
+
+    Используется там, где нужен фильтр queryset, например в админке.
+
+    Args:
+        text (str): Текст запроса
+
+    Returns:
+        Q: Условие фильтрации задач
+    """
+    terms = search_terms(text)
+    if not terms:
+        return Q(pk__in=[])
+
+    if connection.vendor == "sqlite":
+        where, params = _match_sql(terms)
+        return Q(id__in=RawSQL(f"SELECT rowid FROM tasks_task_fts WHERE {where}", params))
+    if connection.vendor == "postgresql":
+        where, params = _match_sql(terms)
+        return Q(id__in=RawSQL(f"SELECT id FROM tasks_task WHERE {where}", params))
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return condition
+
+
+def search_task_ids(text, user_id, limit):
+    """
+    Ищет задачи пользователя и возвращает их ID по убыванию релевантности.
+
+    Args:
+        text (str): Текст запроса
+        user_id (int): ID пользователя Django
+        limit (int): Максимальное число результатов
+
+    Returns:
+        list: ID задач, самые релевантные первыми
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+
+    if connection.vendor == "sqlite":
+        where, params = _match_sql(terms)
+        sql = (
+            "SELECT task.id FROM tasks_task_fts "
+            "JOIN tasks_task task ON task.id = tasks_task_fts.rowid "
+            f"WHERE {where} AND task.assigned_to_id = %s "
+            "ORDER BY bm25(tasks_task_fts, %s, %s), task.id LIMIT %s"
+        )
+        params = [*params, user_id, *FTS_WEIGHTS, limit]
+    elif connection.vendor == "postgresql":
+        where, params = _match_sql(terms)
+        sql = (
+            "SELECT id FROM tasks_task "
+            f"WHERE {where} AND assigned_to_id = %s "
+            f"ORDER BY ts_rank({SEARCH_VECTOR_SQL}, to_tsquery('simple', %s)) DESC, id "
+            "LIMIT %s"
+        )
+        params = [*params, user_id, params[0], limit]
+    else:
+        return list(
+            Task.objects.filter(matching_tasks(text), assigned_to_id=user_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -6,6 +6,7 @@
 обработки API запросов и ответов.
 """
 
+from django.conf import settings
 from rest_framework import serializers
 from .models import Task, TaskList
 
@@ -32,16 +33,101 @@ class TaskSerializer(serializers.ModelSerializer):
     Сериализатор для модели Task.
     
     Преобразует объекты Task в JSON формат для REST API.
-    Поля 'assigned_to' и 'task_list' помечены как read-only,
-    так как они устанавливаются автоматически в представлениях
-    на основе аутентифицированного пользователя.
+    Поле 'assigned_to' помечено как read-only, так как оно
+    устанавливается в представлениях на основе аутентифицированного
+    пользователя. Поле 'task_list' необязательно и принимает только
+    списки этого пользователя; без него задача попадает в список
+    по умолчанию.
+
+    Необязательный аргумент ``fields`` ограничивает набор выводимых
+    полей (используется для проекции в списках задач).
     
     Meta:
         model: Модель Task
         fields: Все поля модели включены в сериализацию
         read_only_fields: Поля, которые нельзя изменить через API
     """
+    task_list = serializers.PrimaryKeyRelatedField(
+        queryset=TaskList.objects.all(), required=False
+    )
+
     class Meta:
         model = Task
         fields = '__all__'
-        read_only_fields = ('assigned_to', 'task_list')
\ No newline at end of file
+        read_only_fields = ('assigned_to', 'version', 'overdue_notified_at')
+
+    def validate_task_list(self, value):
+        """Проверяет, что список задач принадлежит пользователю запроса."""
+        request = self.context.get('request')
+        if request is None or value.owner_id != request.user.id:
+            raise serializers.ValidationError('Task list not found.')
+        return value
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BulkTaskCreateSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор элемента массового создания задач.
+
+    Используется с many=True; ошибки валидации возвращаются по элементам.
+    """
+    class Meta:
+        model = Task
+        fields = ('title', 'description', 'deadline', 'completed')
+
+
+class BulkTaskCompleteSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса массовой отметки задач: {"ids": [...]}.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Предел читается при каждом запросе, чтобы учитывать настройки
+        self.fields['ids'].max_length = settings.BULK_TASKS_MAX_ITEMS
+
+
+class BulkTaskUpdateListSerializer(serializers.ListSerializer):
+    """
+    Пакет элементов массового обновления без повторяющихся ID.
+
+    Повтор ID отмечается ошибкой у каждого повторного элемента,
+    иначе поздний элемент молча перезаписал бы ранний.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        seen = set()
+        errors = []
+        for item in items:
+            if item["id"] in seen:
+                errors.append({"id": ["Duplicate task id in batch."]})
+            else:
+                seen.add(item["id"])
+                errors.append({})
+        if len(seen) != len(items):
+            raise serializers.ValidationError(errors)
+        return items
+
+
+class BulkTaskUpdateSerializer(serializers.Serializer):
+    """
+    Сериализатор элемента массового обновления задач.
+
+    Каждый элемент содержит ID задачи и изменяемые поля.
+    ID в пакете не повторяются (BulkTaskUpdateListSerializer).
+    """
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(allow_blank=True, required=False)
+    deadline = serializers.DateTimeField(required=False)
+    completed = serializers.BooleanField(required=False)
+
+    class Meta:
+        list_serializer_class = BulkTaskUpdateListSerializer
@@ -0,0 +1,81 @@
+"""
+Обработчики сигналов моделей приложения задач.
+
+Сигналы подключаются в TasksConfig.ready().
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events, stats
+from .cache import invalidate_default_task_list, invalidate_telegram_user
+from .models import Task, TaskList, TaskTombstone, TelegramProfile
+from .tasks import schedule_overdue_alert
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    """
+    Публикует событие о создании или изменении задачи.
+
+    Сохранение без изменений (кроме версии строки и времени изменения)
+    событий не порождает.
+    Для новой задачи и при переносе срока после фиксации транзакции
+    планируется уведомление о просрочке. Счетчики UserTaskStats
+    обновляются в той же транзакции.
+    """
+    if created:
+        fields = ["deadline"]
+        events.task_created(instance)
+    else:
+        fields = [
+            name for name in instance.changed_fields() if name not in ("version", "updated_at")
+        ]
+        if fields:
+            events.task_changed(instance, fields)
+    if "deadline" in fields and not instance.completed:
+        task_id, deadline = instance.id, instance.deadline
+        transaction.on_commit(lambda: schedule_overdue_alert(task_id, deadline))
+    stats.task_saved(instance, created)
+    instance.loaded_values = instance.snapshot()
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    """
+    Публикует событие об удалении задачи, обновляет счетчики и оставляет
+    отметку об удалении для инкрементальной синхронизации.
+    """
+    events.task_deleted(instance)
+    stats.task_deleted(instance)
+    TaskTombstone.objects.create(task_id=instance.id, user_id=instance.assigned_to_id)
+
+
+@receiver(post_save, sender=TelegramProfile)
+def telegram_profile_saved(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш соответствия telegram_id -> user_id после сохранения профиля.
+
+    Сбрасываются и новый, и прежний telegram_id (если он изменился).
+    """
+    invalidate_telegram_user(instance.telegram_id)
+    loaded = instance.loaded_telegram_id
+    if loaded is not None and loaded != instance.telegram_id:
+        invalidate_telegram_user(loaded)
+    instance.loaded_telegram_id = instance.telegram_id
+
+
+@receiver(post_delete, sender=TelegramProfile)
+def telegram_profile_deleted(sender, instance, **kwargs):
+    """Сбрасывает кэш соответствия telegram_id -> user_id после удаления профиля."""
+    invalidate_telegram_user(instance.telegram_id)
+    if instance.loaded_telegram_id is not None:
+        invalidate_telegram_user(instance.loaded_telegram_id)
+
+
+@receiver(post_delete, sender=TaskList)
+def task_list_deleted(sender, instance, **kwargs):
+    """Сбрасывает кэш ID списка по умолчанию после его удаления."""
+    if instance.is_default:
+        invalidate_default_task_list(instance.owner_id)
@@ -0,0 +1,242 @@
+"""
+Статистика задач пользователя.
+
+Счетчики всего/выполненных задач хранятся в UserTaskStats и обновляются
+одним UPDATE с F() выражениями при каждом изменении задач: сигналами
+модели Task для одиночных сохранений и явными вызовами apply_delta()
+в массовых операциях. Поэтому ответ /api/my-tasks/stats/ не зависит
+от числа задач.
+
+Поле revision увеличивается при любом изменении задач пользователя,
+а не только счетчиков, и служит валидатором (ETag) списков задач:
+совпадение revision означает, что список не изменился.
+
+Строка счетчиков создается лениво при первом чтении. Изменения, которые
+пришлись на отсутствующую строку или потерялись из-за гонки с её
+созданием, исправляет периодическая сверка reconcile().
+"""
+
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task, UserTaskStats
+
+
+def count_tasks(user_ids=None):
+    """
+    Считает задачи пользователей по таблице задач.
+
+    Args:
+        user_ids (list | None): ID пользователей (None — все пользователи)
+
+    Returns:
+        dict: {user_id: (total, completed)}
+    """
+    queryset = Task.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(assigned_to_id__in=user_ids)
+    rows = (
+        queryset.order_by()
+        .values("assigned_to_id")
+        .annotate(total=Count("id"), completed=Count("id", filter=Q(completed=True)))
+        .values_list("assigned_to_id", "total", "completed")
+    )
+    return {user_id: (total, completed) for user_id, total, completed in rows}
+
+
+def apply_delta(user_id, total=0, completed=0):
+    """
+    Изменяет счетчики пользователя на заданные величины и увеличивает revision.
+
+    Вызывается при любом изменении задач пользователя, в том числе
+    с нулевыми величинами. Отсутствующая строка счетчиков не создается:
+    её создаст первое чтение или сверка.
+
+    Args:
+        user_id (int): ID пользователя Django
+        total (int): Изменение числа задач
+        completed (int): Изменение числа выполненных задач
+    """
+    UserTaskStats.objects.filter(user_id=user_id).update(
+        total=F("total") + total,
+        completed=F("completed") + completed,
+        revision=F("revision") + 1,
+    )
+
+
+def task_saved(task, created):
+    """
+    Обновляет счетчики после сохранения задачи.
+
+    Вызывается сигналом post_save до обновления снимка loaded_values.
+
+    Args:
+        task (Task): Сохраненная задача
+        created (bool): Задача создана
+    """
+    if created:
+        apply_delta(task.assigned_to_id, total=1, completed=int(task.completed))
+        return
+
+    loaded = task.loaded_values or {}
+    old_user = loaded.get("assigned_to_id", task.assigned_to_id)
+    old_completed = loaded.get("completed", task.completed)
+    if old_user != task.assigned_to_id:
+        apply_delta(old_user, total=-1, completed=-int(old_completed))
+        apply_delta(task.assigned_to_id, total=1, completed=int(task.completed))
+    elif old_completed != task.completed:
+        apply_delta(task.assigned_to_id, completed=1 if task.completed else -1)
+    else:
+        apply_delta(task.assigned_to_id)
+
+
+def touch(user_ids):
+    """
+    Увеличивает revision пользователей без изменения счетчиков.
+
+    Используется, когда задачи меняются массовым UPDATE без сигналов
+    (например, отметка о просрочке).
+
+    Args:
+        user_ids (Iterable | QuerySet): ID пользователей или подзапрос с ними
+    """
+    UserTaskStats.objects.filter(user_id__in=user_ids).update(revision=F("revision") + 1)
+
+
+def task_deleted(task):
+    """
+    Обновляет счетчики после удаления задачи.
+
+    Args:
+        task (Task): Удаленная задача
+    """
+    apply_delta(task.assigned_to_id, total=-1, completed=-int(task.completed))
+
+
+def get_stats(user_id):
+    """
+    Возвращает строку счетчиков пользователя, создавая её при необходимости.
+
+    Args:
+        user_id (int): ID пользователя Django
+
+    Returns:
+        UserTaskStats: Счетчики пользователя
+    """
+    stats = UserTaskStats.objects.filter(user_id=user_id).first()
+    if stats is not None:
+        return stats
+
+    total, completed = count_tasks([user_id]).get(user_id, (0, 0))
+    try:
+        with transaction.atomic():
+            return UserTaskStats.objects.create(
+                user_id=user_id, total=total, completed=completed
+            )
+    except IntegrityError:
+        return UserTaskStats.objects.get(user_id=user_id)
+
+
+def get_revision(user_id):
+    """
+    Возвращает revision пользователя одним запросом по первичному ключу.
+
+    Args:
+        user_id (int): ID пользователя Django
+
+    Returns:
+        int: Текущая revision
+    """
+    revision = (
+        UserTaskStats.objects.filter(user_id=user_id)
+        .values_list("revision", flat=True)
+        .first()
+    )
+    return get_stats(user_id).revision if revision is None else revision
+
+
+async def aget_revision(user_id):
+    """Асинхронный вариант get_revision для async представлений."""
+    revision = await (
+        UserTaskStats.objects.filter(user_id=user_id)
+        .values_list("revision", flat=True)
+        .afirst()
+    )
+    if revision is None:
+        revision = (await sync_to_async(get_stats)(user_id)).revision
+    return revision
+
+
+def due_tasks(user_id, until):
+    """
+    Невыполненные задачи пользователя со сроком раньше until.
+
+    Запрос читает диапазон индекса task_assignee_done_deadline.
+
+    Args:
+        user_id (int): ID пользователя Django
+        until (datetime): Верхняя граница срока (не включительно)
+
+    Returns:
+        QuerySet: Задачи пользователя
+    """
+    return Task.objects.filter(assigned_to_id=user_id, completed=False, deadline__lt=until)
+
+
+def deadline_counts(user_id, now=None):
+    """
+    Считает просроченные задачи и задачи со сроком сегодня.
+
+    Args:
+        user_id (int): ID пользователя Django
+        now (datetime | None): Текущее время (по умолчанию timezone.now())
+
+    Returns:
+        dict: {"overdue": int, "due_today": int}
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return due_tasks(user_id, start + timedelta(days=1)).aggregate(
+        overdue=Count("id", filter=Q(deadline__lt=now)),
+        due_today=Count("id", filter=Q(deadline__gte=start)),
+    )
+
+
+def reconcile():
+    """
+    Сверяет счетчики всех пользователей с таблицей задач.
+
+    Расходящиеся строки перезаписываются (с увеличением revision),
+    отсутствующие создаются.
+
+    Returns:
+        int: Число исправленных и созданных строк
+    """
+    counts = count_tasks()
+    stored = {
+        user_id: (total, completed)
+        for user_id, total, completed
+        in UserTaskStats.objects.values_list("user_id", "total", "completed")
+    }
+
+    fixed = 0
+    for user_id, values in stored.items():
+        total, completed = counts.get(user_id, (0, 0))
+        if values != (total, completed):
+            fixed += UserTaskStats.objects.filter(user_id=user_id).update(
+                total=total, completed=completed, revision=F("revision") + 1
+            )
+
+    missing = [
+        UserTaskStats(user_id=user_id, total=total, completed=completed)
+        for user_id, (total, completed) in counts.items()
+        if user_id not in stored
+    ]
+    UserTaskStats.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+    return fixed + len(missing)
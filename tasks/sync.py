@@ -0,0 +1,117 @@
+"""
+Инкрементальная синхронизация задач.
+
+Клиент один раз загружает все задачи, а дальше запрашивает только
+изменения после водяного знака ``since``: задачи с updated_at позже
+него и отметки об удалении (TaskTombstone). Стоимость запроса
+пропорциональна числу изменений, а не числу задач.
+
+Водяной знак — непрозрачный курсор (updated_at, id) последней выданной
+строки. Транзакция может зафиксироваться позже, чем записанное ей
+updated_at, поэтому последняя страница возвращает водяной знак на
+TASK_SYNC['LAG'] секунд раньше момента запроса: изменения из этого окна
+приходят повторно, и клиент отбрасывает их по version.
+
+Массовые операции, обходящие save(), обязаны сами заполнять updated_at.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .models import Task, TaskTombstone
+from .pagination import NEXT, decode_cursor, encode_cursor
+from .rows import task_rows
+
+# Поля, по которым строится водяной знак
+SYNC_CURSOR_FIELDS = ("id", "updated_at")
+
+
+class SyncExpired(Exception):
+    """Водяной знак старше срока хранения отметок об удалении."""
+
+
+def parse_since(since):
+    """
+    Декодирует водяной знак.
+
+    Args:
+        since (str | None): Водяной знак из запроса
+
+    Returns:
+        tuple | None: (updated_at, id) или None для первой синхронизации
+
+    Raises:
+        ValidationError: Если водяной знак поврежден
+        SyncExpired: Если отметки об удалениях после него уже удалены
+    """
+    if not since:
+        return None
+    try:
+        _, updated_at, task_id = decode_cursor(since)
+    except NotFound:
+        raise ValidationError({"since": "Invalid watermark"})
+    if updated_at < timezone.now() - timedelta(seconds=settings.TASK_SYNC['TOMBSTONE_TTL']):
+        raise SyncExpired()
+    return updated_at, task_id
+
+
+def changes_since(user_id, since, limit, fields=None):
+    """
+    Возвращает изменения задач пользователя после водяного знака.
+
+    Args:
+        user_id (int): ID пользователя Django
+        since (tuple | None): Результат parse_since
+        limit (int): Максимальное число измененных задач в ответе
+        fields (list | None): Проекция полей задач
+
+    Returns:
+        dict: changed (задачи в порядке updated_at), deleted (ID удаленных
+            задач), since (следующий водяной знак) и has_more
+    """
+    now = timezone.now()
+    queryset = Task.objects.filter(assigned_to_id=user_id)
+    tombstones = TaskTombstone.objects.filter(user_id=user_id)
+    if since is not None:
+        updated_at, task_id = since
+        queryset = queryset.filter(updated_at__gte=updated_at).filter(
+            Q(updated_at__gt=updated_at) | Q(id__gt=task_id)
+        )
+        tombstones = tombstones.filter(deleted_at__gt=updated_at)
+    else:
+        # Первая синхронизация выдает все задачи, удалять клиенту нечего
+        tombstones = tombstones.none()
+
+    rows, task_row = task_rows(queryset.order_by("updated_at", "id"), fields, SYNC_CURSOR_FIELDS)
+    rows = list(rows[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        watermark = (rows[-1]["updated_at"], rows[-1]["id"])
+        tombstones = tombstones.filter(deleted_at__lte=watermark[0])
+    else:
+        watermark = (now - timedelta(seconds=settings.TASK_SYNC['LAG']), 0)
+
+    return {
+        "changed": [task_row(row) for row in rows],
+        "deleted": list(tombstones.values_list("task_id", flat=True)),
+        "since": encode_cursor(NEXT, *watermark),
+        "has_more": has_more,
+    }
+
+
+def purge_tombstones():
+    """
+    Удаляет отметки об удалении старше TASK_SYNC['TOMBSTONE_TTL'].
+
+    Returns:
+        int: Число удаленных отметок
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_SYNC['TOMBSTONE_TTL'])
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -4,15 +4,146 @@ Celery задачи для системы управления задачами.
 Этот модуль содержит фоновые задачи, выполняемые асинхронно с помощью Celery.
 Включает функции для проверки просроченных задач и отправки уведомлений
 в Telegram.
+
+Уведомления о просрочке управляются событиями: при создании задачи или
+изменении её срока планируется таймер notify_task_overdue с eta на срок
+задачи. Сработавший таймер сверяет срок, на который он поставлен,
+с текущим, поэтому выполненные и перенесённые задачи таймеры не
+отменяют явно — устаревший таймер просто ничего не делает.
+Периодический check_expired_tasks остаётся страховкой для потерянных
+таймеров и неудачных отправок.
 """
 
+import html
+import logging
+from itertools import groupby
+from operator import itemgetter
+
 from celery import shared_task
+from . import stats
+from .sync import purge_tombstones
 from .models import Task, TelegramProfile
+from .telegram import MESSAGE_LIMIT, send_many, send_message
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
-import requests
-import os
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Размер порции строк, читаемых из базы при обходе просроченных задач
+OVERDUE_CHUNK_SIZE = 2000
+
+
+def build_digests(header, rows):
+    """
+    Формирует сводные сообщения о задачах одного пользователя.
+
+    Задачи укладываются в сообщения не длиннее лимита Telegram;
+    каждое сообщение начинается с заголовка.
+
+    Args:
+        header (str): Заголовок сводки
+        rows (list): Кортежи (id, title, deadline) задач
+
+    Returns:
+        list: Пары (текст сообщения, список ID задач в нём)
+    """
+    digests = []
+    text, ids = header, []
+    for task_id, title, deadline in rows:
+        line = (
+            f"\n• <b>{html.escape(title)}</b> — "
+            f"срок: {deadline.strftime('%Y-%m-%d %H:%M')}"
+        )
+        if ids and len(text) + len(line) > MESSAGE_LIMIT:
+            digests.append((text, ids))
+            text, ids = header, []
+        text += line
+        ids.append(task_id)
+    if ids:
+        digests.append((text, ids))
+    return digests
+
+
+def build_overdue_digests(rows):
+    """Формирует сводки о просроченных задачах (см. build_digests)."""
+    return build_digests(f"⏰ Просроченные задачи ({len(rows)}):\n", rows)
+
+
+def schedule_overdue_alert(task_id, deadline):
+    """
+    Планирует уведомление о просрочке задачи на её срок.
+
+    Args:
+        task_id (int): ID задачи
+        deadline (datetime): Срок задачи, на который ставится таймер
+    """
+    notify_task_overdue.apply_async((task_id, deadline.isoformat()), eta=deadline)
+
+
+@shared_task
+def schedule_overdue_alerts(task_ids):
+    """
+    Планирует уведомления о просрочке для пакета задач.
+
+    Используется массовыми операциями, которые не вызывают сигналов
+    модели: в запросе ставится одна эта задача, а таймеры создаются
+    уже в воркере.
 
-TELEGRAM_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
+    Args:
+        task_ids (list): ID созданных или перенесённых задач
+    """
+    rows = Task.objects.filter(id__in=task_ids, completed=False).values_list("id", "deadline")
+    for task_id, deadline in rows:
+        schedule_overdue_alert(task_id, deadline)
+
+
+@shared_task
+def notify_task_overdue(task_id, deadline):
+    """
+    Отправляет уведомление о просрочке одной задачи.
+
+    Уведомление сначала "занимается" условным UPDATE: он проходит только
+    для невыполненной и ещё не объявленной задачи, срок которой совпадает
+    с тем, на который поставлен таймер. Поэтому устаревшие и повторно
+    доставленные брокером таймеры ничего не делают. Если отправка не
+    удалась, отметка снимается, и задачу подберёт check_expired_tasks.
+
+    Args:
+        task_id (int): ID задачи
+        deadline (str): Срок задачи в ISO 8601, на который поставлен таймер
+
+    Returns:
+        bool: True, если уведомление отправлено
+    """
+    now = timezone.now()
+    claimed = Task.objects.filter(
+        id=task_id,
+        deadline=parse_datetime(deadline),
+        completed=False,
+        overdue_notified_at__isnull=True,
+        assigned_to__telegramprofile__isnull=False,
+    )
+    if not claimed.update(overdue_notified_at=now, updated_at=now):
+        return False
+
+    task_id, title, deadline, user_id, chat_id = (
+        Task.objects.filter(id=task_id)
+        .values_list(
+            "id", "title", "deadline", "assigned_to_id", "assigned_to__telegramprofile__telegram_id"
+        )
+        .get()
+    )
+    stats.touch([user_id])
+    (text, _), = build_digests("⏰ Просрочена задача:\n", [(task_id, title, deadline)])
+    if send_message(chat_id, text):
+        return True
+    if Task.objects.filter(id=task_id, overdue_notified_at=now).update(
+        overdue_notified_at=None, updated_at=timezone.now()
+    ):
+        stats.touch([user_id])
+    return False
 
 
 @shared_task
@@ -20,38 +151,94 @@ def check_expired_tasks():
     """
     Проверяет просроченные задачи и отправляет уведомления в Telegram.
     
-    Эта задача предназначена для периодического выполнения (например, через cron).
-    Находит все невыполненные задачи с истекшим сроком и отправляет уведомления
-    пользователям через Telegram бота, если у них настроена интеграция.
+    Выполняется периодически (CELERY_BEAT_SCHEDULE) как страховка
+    к таймерам notify_task_overdue: подбирает задачи, таймер которых
+    потерян или отправка по которому не удалась.
+    Просроченные задачи пользователей с привязанным Telegram читаются
+    порциями по OVERDUE_CHUNK_SIZE строк (keyset по assigned_to_id, id):
+    каждая порция читается целиком до того, как её строки меняются, и
+    списки ID в запросах не превышают размер порции. Задачи порции
+    группируются по чату (чат, задачи которого попали в две порции,
+    получит две сводки). Перед отправкой задачи "занимаются" условным
+    UPDATE, как в notify_task_overdue: отметка ставится только тем,
+    у кого overdue_notified_at ещё пуст, поэтому при пересечении
+    запусков (или с таймером) задача объявляется один раз. Сводки по
+    занятым задачам отправляются конкурентными пакетами через общий
+    TelegramSender; для чатов, куда отправить не удалось, отметка
+    снимается, и задачи подберёт следующий запуск.
     
     Returns:
-        None: Функция не возвращает значения, но может печатать ошибки
+        int: Количество задач, о которых отправлены уведомления
     """
-    now = timezone.now()
-    expired_tasks = Task.objects.filter(completed=False, deadline__lt=now)
-
-    for task in expired_tasks:
-        user = task.assigned_to
-        try:
-            profile = TelegramProfile.objects.get(user=user)
-        except TelegramProfile.DoesNotExist:
-            continue  # Telegram не привязан — пропускаем
-
-        message = (
-            f"⏰ Задача просрочена: <b>{task.title}</b>\n"
-            f"Срок: {task.deadline.strftime('%Y-%m-%d %H:%M')}"
+    overdue = (
+        Task.objects
+        .filter(
+            completed=False,
+            overdue_notified_at__isnull=True,
+            deadline__lt=timezone.now(),
+            assigned_to__telegramprofile__isnull=False,
+        )
+        .order_by("assigned_to_id", "id")
+        .values_list(
+            "id", "title", "deadline", "assigned_to_id", "assigned_to__telegramprofile__telegram_id"
+        )
+    )
+
+    def flush(batch):
+        # Время отметки служит и меткой этой порции: по нему находятся
+        # задачи, которые занял именно этот вызов
+        now = timezone.now()
+        pending = [task_id for _, tasks in batch for task_id, _, _ in tasks]
+        Task.objects.filter(
+            id__in=pending, completed=False, overdue_notified_at__isnull=True
+        ).update(overdue_notified_at=now, updated_at=now)
+        claimed = set(
+            Task.objects.filter(id__in=pending, overdue_notified_at=now).values_list("id", flat=True)
         )
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
-                data={
-                    "chat_id": profile.telegram_id,
-                    "text": message,
-                    "parse_mode": "HTML"
-                }
+        messages = [
+            (chat_id, text, ids)
+            for chat_id, tasks in batch
+            for text, ids in build_overdue_digests(
+                sorted((row for row in tasks if row[0] in claimed), key=itemgetter(2))
             )
-        except Exception as e:
-            print(f"Ошибка отправки уведомления: {e}")
+        ]
+        if not messages:
+            return 0
+        stats.touch(Task.objects.filter(id__in=claimed).values("assigned_to_id"))
+
+        delivered = send_many([(chat_id, text) for chat_id, text, _ in messages])
+        failed = [task_id for (_, _, ids), ok in zip(messages, delivered) if not ok for task_id in ids]
+        if failed:
+            released = Task.objects.filter(id__in=failed, overdue_notified_at=now)
+            released.update(overdue_notified_at=None, updated_at=timezone.now())
+            stats.touch(Task.objects.filter(id__in=failed).values("assigned_to_id"))
+        return len(claimed) - len(failed)
+
+    notified = 0
+    last = None
+    while True:
+        chunk = overdue
+        if last is not None:
+            user_id, task_id = last
+            chunk = chunk.filter(
+                Q(assigned_to_id__gt=user_id) | Q(assigned_to_id=user_id, id__gt=task_id)
+            )
+        rows = list(chunk[:OVERDUE_CHUNK_SIZE])
+        if not rows:
+            break
+        last = rows[-1][3], rows[-1][0]
+
+        batch = [
+            (chat_id, [row[:3] for row in chat_rows])
+            for chat_id, chat_rows in groupby(rows, key=itemgetter(4))
+        ]
+        for start in range(0, len(batch), settings.TELEGRAM_BATCH_SIZE):
+            notified += flush(batch[start:start + settings.TELEGRAM_BATCH_SIZE])
+        if len(rows) < OVERDUE_CHUNK_SIZE:
+            break
+
+    logger.info("Отправлены уведомления о %s просроченных задачах", notified)
+    return notified
 
 
 @shared_task
@@ -67,27 +254,82 @@ def send_new_task_notification(user_id, task_id):
         task_id (int): ID созданной задачи
         
     Returns:
-        None: Функция не возвращает значения, но может печатать ошибки
+        None: Функция не возвращает значения
     """
     try:
         task = Task.objects.get(id=task_id)
         profile = TelegramProfile.objects.get(user_id=user_id)
-        
-        message = (
-            f"📋 Новая задача: <b>{task.title}</b>\n"
-            f"Описание: {task.description}\n"
-            f"Срок: {task.deadline.strftime('%Y-%m-%d %H:%M')}"
-        )
-        
-        requests.post(
-            f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
-            data={
-                "chat_id": profile.telegram_id,
-                "text": message,
-                "parse_mode": "HTML"
-            }
-        )
     except (Task.DoesNotExist, TelegramProfile.DoesNotExist):
-        print(f"Не удалось найти задачу {task_id} или профиль пользователя {user_id}")
-    except Exception as e:
-        print(f"Ошибка отправки уведомления о новой задаче: {e}")
\ No newline at end of file
+        logger.info("Не удалось найти задачу %s или профиль пользователя %s", task_id, user_id)
+        return
+
+    message = (
+        f"📋 Новая задача: <b>{html.escape(task.title)}</b>\n"
+        f"Описание: {html.escape(task.description)}\n"
+        f"Срок: {task.deadline.strftime('%Y-%m-%d %H:%M')}"
+    )
+    send_message(profile.telegram_id, message)
+
+
+@shared_task
+def send_new_tasks_notification(user_id, task_ids):
+    """
+    Отправляет одну сводку о пакете новых задач в Telegram.
+
+    Используется массовым созданием задач вместо отдельного
+    уведомления на каждую задачу.
+
+    Args:
+        user_id (int): ID пользователя Django
+        task_ids (list): ID созданных задач
+
+    Returns:
+        None: Функция не возвращает значения
+    """
+    telegram_id = (
+        TelegramProfile.objects.filter(user_id=user_id)
+        .values_list("telegram_id", flat=True)
+        .first()
+    )
+    if telegram_id is None:
+        return
+
+    rows = list(
+        Task.objects.filter(id__in=task_ids, assigned_to_id=user_id)
+        .order_by("deadline", "id")
+        .values_list("id", "title", "deadline")
+    )
+    if rows:
+        send_many([
+            (telegram_id, text)
+            for text, _ in build_digests(f"📋 Новые задачи ({len(rows)}):\n", rows)
+        ])
+
+
+@shared_task
+def reconcile_task_stats():
+    """
+    Исправляет расхождения счетчиков UserTaskStats с таблицей задач.
+
+    Выполняется периодически (CELERY_BEAT_SCHEDULE).
+
+    Returns:
+        int: Число исправленных строк счетчиков
+    """
+    fixed = stats.reconcile()
+    if fixed:
+        logger.warning("Исправлены счетчики задач %s пользователей", fixed)
+    return fixed
+
+
+@shared_task
+def purge_task_tombstones():
+    """
+    Удаляет устаревшие отметки об удалении задач.
+
+    Выполняется периодически (CELERY_BEAT_SCHEDULE).
+
+    Returns:
+        int: Число удаленных отметок
+    """
+    return purge_tombstones()
@@ -0,0 +1,390 @@
+"""
+Отправка сообщений в Telegram из фоновых задач.
+
+Модуль предоставляет TelegramSender — общий для всех Celery задач клиент
+Bot API. Отправитель держит одну HTTP сессию с пулом keep-alive соединений
+на процесс воркера, ограничивает время ожидания, повторяет запросы при
+ответах 429/5xx (с учётом ``retry_after`` от Telegram) и соблюдает лимиты
+скорости через token bucket: около 30 сообщений в секунду на бота
+и одно сообщение в секунду в один чат.
+
+Для массовых рассылок есть асинхронный пакетный API (``asend_many``
+и синхронная обёртка ``send_many``), который отправляет сотни сообщений
+конкурентно из одного воркера. Пакетный API держит одну aiohttp сессию
+на цикл событий, а ``send_many`` выполняет пакеты в постоянном цикле
+отправителя, поэтому соединения переиспользуются между пакетами.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
+
+# Максимальная длина текста одного сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+
+class TokenBucket:
+    """
+    Ограничитель скорости "ведро с токенами".
+
+    Ведро пополняется со скоростью ``rate`` токенов в секунду и вмещает
+    не более ``capacity`` токенов. Каждая отправка забирает один токен.
+
+    Attributes:
+        rate (float): Скорость пополнения, токенов в секунду
+        capacity (float): Вместимость ведра
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """
+        Забирает токен и возвращает, сколько нужно подождать до отправки.
+
+        Returns:
+            float: Время ожидания в секундах (0, если токен доступен сразу)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Ограничитель скорости с общим лимитом и лимитом на чат.
+
+    Вёдра отдельных чатов хранятся в LRU словаре ограниченного размера,
+    чтобы длинные рассылки не накапливали состояние без предела.
+    """
+
+    def __init__(self, global_rate, per_chat_rate, max_chats=10000):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.max_chats = max_chats
+        self.chats = OrderedDict()
+        self.lock = threading.Lock()
+
+    def reserve(self, chat_id):
+        """
+        Резервирует отправку в чат и возвращает время ожидания.
+
+        Args:
+            chat_id (int): ID чата Telegram
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        with self.lock:
+            bucket = self.chats.pop(chat_id, None)
+            if bucket is None:
+                bucket = TokenBucket(self.per_chat_rate, capacity=1)
+            self.chats[chat_id] = bucket
+            if len(self.chats) > self.max_chats:
+                self.chats.popitem(last=False)
+            return max(self.global_bucket.reserve(), bucket.reserve())
+
+    def acquire(self, chat_id):
+        """Блокирует поток, пока отправка в чат не станет разрешена."""
+        delay = self.reserve(chat_id)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, chat_id):
+        """Асинхронно ждёт, пока отправка в чат не станет разрешена."""
+        delay = self.reserve(chat_id)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class TelegramSender:
+    """
+    Клиент метода sendMessage Bot API с пулом соединений и повторами.
+
+    Значения по умолчанию берутся из настроек TELEGRAM_* в settings.
+
+    Attributes:
+        api_url (str): Базовый URL Bot API
+        timeout (tuple): Таймауты (соединение, чтение) в секундах
+        max_retries (int): Число повторов после неудачной попытки
+        backoff (float): Базовая задержка экспоненциального отката
+        max_retry_after (float): Наибольший retry_after, который стоит ждать;
+            при большем значении сообщение считается неотправленным
+        concurrency (int): Предел одновременных запросов пакетного API
+    """
+
+    def __init__(self, token=None, api_url=None, timeout=None, max_retries=None,
+                 backoff=None, max_retry_after=None, concurrency=None,
+                 pool_size=None, limiter=None):
+        self.token = token if token is not None else TELEGRAM_TOKEN
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip("/")
+        self.timeout = timeout or (
+            settings.TELEGRAM_CONNECT_TIMEOUT, settings.TELEGRAM_READ_TIMEOUT
+        )
+        self.max_retries = settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.TELEGRAM_RETRY_BACKOFF if backoff is None else backoff
+        self.max_retry_after = (
+            settings.TELEGRAM_MAX_RETRY_AFTER if max_retry_after is None else max_retry_after
+        )
+        self.concurrency = concurrency or settings.TELEGRAM_CONCURRENCY
+        self.pool_size = pool_size or settings.TELEGRAM_POOL_SIZE
+        self.limiter = limiter or RateLimiter(
+            global_rate=settings.TELEGRAM_GLOBAL_RATE,
+            per_chat_rate=settings.TELEGRAM_PER_CHAT_RATE,
+        )
+        self._session = None
+        # aiohttp сессии по циклам событий и собственный цикл send_many
+        self._async_sessions = {}
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def url(self):
+        """URL метода sendMessage."""
+        return f"{self.api_url}/bot{self.token}/sendMessage"
+
+    @property
+    def session(self):
+        """HTTP сессия с пулом keep-alive соединений (создаётся лениво)."""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def async_session(self):
+        """
+        Возвращает aiohttp сессию текущего цикла событий (создаётся лениво).
+
+        Сессия привязана к циклу, в котором создана, поэтому для каждого
+        цикла держится своя; сессии закрытых циклов отбрасываются.
+
+        Returns:
+            aiohttp.ClientSession: Сессия пакетной отправки
+        """
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            self._async_sessions = {
+                other: other_session for other, other_session in self._async_sessions.items()
+                if not other.is_closed()
+            }
+            connect_timeout, read_timeout = self.timeout
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            )
+            self._async_sessions[loop] = session
+        return session
+
+    async def aclose(self):
+        """Закрывает aiohttp сессию текущего цикла событий."""
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def close(self):
+        """
+        Закрывает HTTP сессии, их соединения и цикл событий send_many.
+
+        aiohttp сессии циклов, которые сейчас выполняются, закрываются
+        через aclose() из самого цикла.
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        for loop, session in list(self._async_sessions.items()):
+            if not loop.is_closed() and not loop.is_running():
+                loop.run_until_complete(session.close())
+                del self._async_sessions[loop]
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.close()
+                self._loop = None
+
+    def retry_delay(self, attempt, status=None, payload=None):
+        """
+        Возвращает задержку перед повтором или None, если повторять не нужно.
+
+        Args:
+            attempt (int): Номер неудачной попытки, начиная с 0
+            status (int | None): HTTP статус ответа (None при сетевой ошибке)
+            payload (dict | None): Тело ответа Telegram
+
+        Returns:
+            float | None: Задержка в секундах
+        """
+        if attempt >= self.max_retries:
+            return None
+        if status == 429:
+            retry_after = ((payload or {}).get("parameters") or {}).get("retry_after")
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        elif status is not None and status < 500:
+            return None
+        return self.backoff * 2 ** attempt
+
+    @staticmethod
+    def message_data(chat_id, text):
+        """Параметры запроса sendMessage."""
+        return {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML",
+        }
+
+    def send_message(self, chat_id, text):
+        """
+        Отправляет сообщение в чат Telegram.
+
+        Args:
+            chat_id (int): ID чата Telegram
+            text (str): Текст сообщения в HTML разметке
+
+        Returns:
+            bool: True, если Telegram принял сообщение
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire(chat_id)
+            status = payload = None
+            try:
+                response = self.session.post(
+                    self.url, data=self.message_data(chat_id, text), timeout=self.timeout
+                )
+                if response.ok:
+                    return True
+                status = response.status_code
+                payload = _json_or_none(response.json)
+            except requests.RequestException as e:
+                logger.warning("Ошибка отправки сообщения в чат %s: %s", chat_id, e)
+
+            delay = self.retry_delay(attempt, status, payload)
+            if delay is None:
+                logger.warning("Telegram не принял сообщение в чат %s: %s %s", chat_id, status, payload)
+                return False
+            time.sleep(delay)
+            attempt += 1
+
+    async def asend_message(self, session, chat_id, text):
+        """
+        Асинхронно отправляет сообщение через переданную aiohttp сессию.
+
+        Args:
+            session (aiohttp.ClientSession): Сессия пакетной отправки
+            chat_id (int): ID чата Telegram
+            text (str): Текст сообщения в HTML разметке
+
+        Returns:
+            bool: True, если Telegram принял сообщение
+        """
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(chat_id)
+            status = payload = None
+            try:
+                async with session.post(self.url, data=self.message_data(chat_id, text)) as response:
+                    if response.status < 400:
+                        return True
+                    status = response.status
+                    payload = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning("Ошибка отправки сообщения в чат %s: %s", chat_id, e)
+
+            delay = self.retry_delay(attempt, status, payload)
+            if delay is None:
+                logger.warning("Telegram не принял сообщение в чат %s: %s %s", chat_id, status, payload)
+                return False
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def asend_many(self, messages):
+        """
+        Конкурентно отправляет пакет сообщений.
+
+        Args:
+            messages (list): Пары (chat_id, text)
+
+        Returns:
+            list: Результат отправки (bool) для каждого сообщения по порядку
+        """
+        session = self.async_session()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(chat_id, text):
+            async with semaphore:
+                return await self.asend_message(session, chat_id, text)
+
+        return await asyncio.gather(*(send(chat_id, text) for chat_id, text in messages))
+
+    def send_many(self, messages):
+        """
+        Синхронная обёртка над asend_many для Celery задач.
+
+        Пакеты выполняются в постоянном цикле событий отправителя, чтобы
+        сессия и её keep-alive соединения жили между пакетами; вызовы
+        из разных потоков выполняются по очереди.
+        """
+        if not messages:
+            return []
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(self.asend_many(messages))
+
+
+def _json_or_none(load):
+    try:
+        return load()
+    except ValueError:
+        return None
+
+
+_sender = None
+
+
+def get_sender():
+    """
+    Возвращает отправителя текущего процесса.
+
+    Отправитель создаётся лениво, поэтому каждый процесс воркера Celery
+    (после fork) получает собственный пул соединений.
+
+    Returns:
+        TelegramSender: Отправитель сообщений
+    """
+    global _sender
+    if _sender is None:
+        _sender = TelegramSender()
+    return _sender
+
+
+def send_message(chat_id, text):
+    """Отправляет одно сообщение через отправителя процесса."""
+    return get_sender().send_message(chat_id, text)
+
+
+def send_many(messages):
+    """Отправляет пакет сообщений через отправителя процесса."""
+    return get_sender().send_many(messages)
@@ -1,3 +1,1874 @@
-from django.test import TestCase
+import importlib
+import json
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.core.management import call_command
+from django.test import (
+    AsyncClient, LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.database import database_config
+
+from .cache import default_task_list_key, get_user_id_for_telegram, local_cache
+from . import metrics
+from .completion import complete_task
+from .admin import EstimatedCountPaginator, TaskAdmin
+from .events import user_group_name
+from .management.commands.perfbench import OFFLINE_SETTINGS, compare, run_benchmarks, seed
+from .models import Task, TaskList, TaskTombstone, TelegramProfile, UserTaskStats
+from .renderers import ORJSONRenderer, render_json
+from .rows import task_rows
+from .serializers import TaskSerializer
+from .stats import deadline_counts, due_tasks, reconcile
+from .tasks import check_expired_tasks, notify_task_overdue, purge_task_tombstones
+from .telegram import RateLimiter, TelegramSender
+from .views import TelegramCompleteTask, TelegramTaskList
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+}
+
+
+def patch_overdue_timers(test):
+    """
+    Подменяет постановку таймеров просрочки в брокер Celery.
+
+    Returns:
+        tuple: Моки notify_task_overdue.apply_async и schedule_overdue_alerts.delay
+    """
+    mocks = []
+    for target in (
+        "tasks.tasks.notify_task_overdue.apply_async",
+        "tasks.tasks.schedule_overdue_alerts.delay",
+    ):
+        patcher = mock.patch(target)
+        mocks.append(patcher.start())
+        test.addCleanup(patcher.stop)
+    return tuple(mocks)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TaskEventsTests(TestCase):
+    """События WebSocket отправляются только в группу владельца задачи."""
+
+    def setUp(self):
+        self.apply_async, self.schedule_many = patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        self.other = User.objects.create_user("bob", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task_list = TaskList.objects.create(name="Default", owner=self.user)
+        self.channel_layer = get_channel_layer()
+
+    def subscribe(self, user):
+        channel = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(user_group_name(user.id), channel)
+        return channel
+
+    def receive(self, channel):
+        return async_to_sync(self.channel_layer.receive)(channel)["data"]
+
+    def create_task(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Task.objects.create(**{
+                "title": "Ship",
+                "deadline": timezone.now(),
+                "task_list": self.task_list,
+                "assigned_to": self.user,
+                **kwargs,
+            })
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_create_sends_delta_to_owner_only(self, delay):
+        own = self.subscribe(self.user)
+        foreign = self.subscribe(self.other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/create-task/", {
+                "title": "Write report",
+                "deadline": (timezone.now() + timedelta(days=1)).isoformat(),
+            }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        data = self.receive(own)
+        self.assertEqual(data["event"], "task_created")
+        self.assertEqual(data["id"], response.data["id"])
+        self.assertEqual(data["changes"]["title"], "Write report")
+        self.assertEqual(data["version"], 1)
+        self.assertNotIn(foreign, self.channel_layer.channels)
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_create_ignores_client_service_fields(self, delay):
+        response = self.client.post("/api/create-task/", {
+            "title": "Write report",
+            "deadline": (timezone.now() + timedelta(days=1)).isoformat(),
+            "version": 7,
+            "overdue_notified_at": timezone.now().isoformat(),
+        }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["version"], 1)
+        task = Task.objects.get(id=response.data["id"])
+        self.assertEqual((task.version, task.overdue_notified_at), (1, None))
+
+    def test_complete_sends_delta_with_new_version(self):
+        task = self.create_task()
+        own = self.subscribe(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/complete-task/{task.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.receive(own), {
+            "event": "task_completed",
+            "id": task.id,
+            "changes": {"completed": True},
+            "version": 2,
+        })
+
+    def test_bot_completion_notifies_and_reads_do_not(self):
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        task = self.create_task()
+        own = self.subscribe(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.get("/api/telegram/tasks/", {"telegram_id": 111})
+            self.client.get("/api/my-tasks/")
+        self.assertEqual(callbacks, [])
+        self.assertNotIn(own, self.channel_layer.channels)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/telegram/complete-task/", {"telegram_id": 111, "task_id": task.id}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.receive(own)["event"], "task_completed")
+
+    def test_events_are_coalesced_per_transaction(self):
+        tasks = [self.create_task(title=f"Task {i}") for i in range(30)]
+        own = self.subscribe(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for task in tasks[:3]:
+                task.completed = True
+                task.save()
+        self.assertEqual(len(callbacks), 1)
+        batch = self.receive(own)
+        self.assertEqual(batch["event"], "task_batch")
+        self.assertEqual([e["id"] for e in batch["events"]], [t.id for t in tasks[:3]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for task in tasks[3:]:
+                task.delete()
+        self.assertEqual(self.receive(own)["event"], "task_updated")
+        self.assertNotIn(own, self.channel_layer.channels)
+
+    def test_rolled_back_changes_are_not_sent(self):
+        task = self.create_task()
+        own = self.subscribe(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    task.completed = True
+                    task.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertNotIn(own, self.channel_layer.channels)
+
+    def test_changes_after_rolled_back_savepoint_are_sent(self):
+        tasks = [self.create_task(title=f"Task {i}") for i in range(3)]
+        own = self.subscribe(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks[0].completed = True
+            tasks[0].save()
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                tasks[1].completed = True
+                tasks[1].save()
+                raise RuntimeError
+            with transaction.atomic():
+                tasks[2].completed = True
+                tasks[2].save()
+        self.assertEqual(self.receive(own)["id"], tasks[0].id)
+        self.assertEqual(self.receive(own)["id"], tasks[2].id)
+        self.assertNotIn(own, self.channel_layer.channels)
+
+
+class TaskQueryIndexTests(TestCase):
+    """Горячие запросы к Task обслуживаются индексами, а не полным сканированием."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", password="pass")
+        cls.task_list = TaskList.objects.create(name="Default", owner=cls.user)
+        cls.task = Task.objects.create(
+            title="Ship", deadline=timezone.now(), task_list=cls.task_list, assigned_to=cls.user
+        )
+
+    def assertUsesIndex(self, queryset, *index_names):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # На пустой таблице планировщик предпочёл бы seq scan
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            self.assertIn("Index", plan)
+        else:
+            plan = queryset.explain()
+            self.assertNotRegex(plan, r"SCAN tasks_task\b(?! USING)")
+        self.assertTrue(any(name in plan for name in index_names), plan)
+
+    def test_user_task_page_uses_assignee_index(self):
+        # MyTaskListView.get_queryset и TelegramTaskList.get
+        self.assertUsesIndex(
+            Task.objects.filter(assigned_to=self.user).order_by("deadline", "id"),
+            "task_assignee_deadline",
+        )
+
+    def test_open_tasks_by_deadline_use_assignee_index(self):
+        self.assertUsesIndex(
+            Task.objects.filter(assigned_to=self.user, completed=False).order_by("deadline"),
+            "task_assignee_done_deadline",
+            "task_assignee_deadline",
+        )
+
+    def test_expired_scan_uses_partial_index(self):
+        # check_expired_tasks
+        self.assertUsesIndex(
+            Task.objects.filter(
+                completed=False, overdue_notified_at__isnull=True, deadline__lt=timezone.now()
+            ),
+            "task_overdue_pending",
+        )
+
+    def test_stats_deadline_counts_use_index(self):
+        # stats.deadline_counts
+        self.assertUsesIndex(
+            due_tasks(self.user.id, timezone.now()),
+            "task_assignee_done_deadline",
+            "task_assignee_deadline",
+        )
+
+    def test_task_list_by_creation_uses_index(self):
+        self.assertUsesIndex(
+            Task.objects.filter(task_list=self.task_list).order_by("created_at"),
+            "task_list_created",
+        )
+
+    def test_complete_lookup_uses_primary_key(self):
+        # TelegramCompleteTask.post
+        plan = Task.objects.filter(id=self.task.id, assigned_to=self.user).explain()
+        if connection.vendor == "sqlite":
+            self.assertIn("PRIMARY KEY", plan)
+        else:
+            self.assertIn("pkey", plan)
+
+
+class TaskPaginationTests(TestCase):
+    """Курсорная пагинация, фильтры и проекция списков задач."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", password="pass")
+        cls.task_list = TaskList.objects.create(name="Default", owner=cls.user)
+        cls.start = timezone.now()
+        cls.tasks = [
+            Task.objects.create(
+                title=f"Task {i}",
+                deadline=cls.start + timedelta(hours=i // 2),
+                completed=i % 3 == 0,
+                task_list=cls.task_list,
+                assigned_to=cls.user,
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect(self, url, **params):
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, page_size=3, **({"cursor": cursor} if cursor else {}))
+            data = self.client.get(url, query).data
+            ids += [task["id"] for task in data["results"]]
+            pages += 1
+            cursor = data["next"]
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_follow_deadline_then_id(self):
+        ids, pages = self.collect("/api/my-tasks/")
+        expected = [t.id for t in sorted(self.tasks, key=lambda t: (t.deadline, t.id))]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_cursor_is_stable_when_rows_are_inserted(self):
+        first = self.client.get("/api/my-tasks/", {"page_size": 3}).data
+        Task.objects.create(
+            title="Earlier", deadline=self.start - timedelta(days=1),
+            task_list=self.task_list, assigned_to=self.user,
+        )
+        second = self.client.get("/api/my-tasks/", {"page_size": 3, "cursor": first["next"]}).data
+        self.assertEqual(
+            [task["id"] for task in second["results"]],
+            [task.id for task in self.tasks[3:6]],
+        )
+
+        previous = self.client.get(
+            "/api/my-tasks/", {"page_size": 3, "cursor": second["previous"]}
+        ).data
+        self.assertEqual(previous["results"], first["results"])
+
+    def test_filters_and_projection(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/my-tasks/", {
+                "completed": "false",
+                "deadline_after": (self.start + timedelta(hours=1)).isoformat(),
+                "fields": "id,title",
+            })
+        self.assertEqual(response.status_code, 200)
+        task_select = next(q["sql"] for q in queries if 'FROM "tasks_task"' in q["sql"])
+        self.assertNotIn('"description"', task_select)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": t.id, "title": t.title} for t in self.tasks[2:] if not t.completed],
+        )
+
+    def test_invalid_parameters_are_rejected(self):
+        self.assertEqual(self.client.get("/api/my-tasks/", {"fields": "secret"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/my-tasks/", {"completed": "maybe"}).status_code, 400)
+        response = self.client.get("/api/my-tasks/", {"deadline_after": "2024-13-45T00:00:00"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("deadline_after", response.data)
+        self.assertEqual(self.client.get("/api/my-tasks/", {"cursor": "garbage!"}).status_code, 404)
+
+
+def deliver_all(messages):
+    return [True] * len(messages)
+
+
+@mock.patch("tasks.tasks.send_many", side_effect=deliver_all)
+class CheckExpiredTasksTests(TestCase):
+    """Просроченные задачи объявляются одной сводкой на чат и только один раз."""
+
+    @classmethod
+    def setUpTestData(cls):
+        past = timezone.now() - timedelta(hours=1)
+        for name, telegram_id, count in (("alice", 111, 3), ("bob", 222, 1), ("carol", None, 2)):
+            user = User.objects.create_user(name, password="pass")
+            if telegram_id:
+                TelegramProfile.objects.create(user=user, telegram_id=telegram_id)
+            task_list = TaskList.objects.create(name="Default", owner=user)
+            for i in range(count):
+                Task.objects.create(
+                    title=f"<{name} {i}>", deadline=past, task_list=task_list, assigned_to=user
+                )
+            Task.objects.create(
+                title="done", deadline=past, completed=True, task_list=task_list, assigned_to=user
+            )
+
+    def test_one_digest_per_chat(self, send_many):
+        # Выборка, отметка задач, чтение отмеченных и revision пользователей
+        with self.assertNumQueries(4):
+            self.assertEqual(check_expired_tasks(), 4)
+
+        messages = dict(send_many.call_args.args[0])
+        self.assertEqual(sorted(messages), [111, 222])
+        self.assertIn("(3)", messages[111])
+        self.assertIn("&lt;alice 0&gt;", messages[111])
+
+    def test_tasks_are_announced_once(self, send_many):
+        check_expired_tasks()
+        send_many.reset_mock()
+
+        self.assertEqual(check_expired_tasks(), 0)
+        send_many.assert_not_called()
+
+    def test_overlapping_runs_announce_once(self, send_many):
+        overlapping = []
+
+        def deliver_after_overlap(messages):
+            # Второй запуск стартует, пока первый отправляет сводки
+            if not overlapping:
+                overlapping.append(check_expired_tasks())
+            return deliver_all(messages)
+
+        send_many.side_effect = deliver_after_overlap
+        self.assertEqual(check_expired_tasks(), 4)
+        self.assertEqual(overlapping, [0])
+        self.assertEqual(send_many.call_count, 1)
+
+    def test_failed_delivery_is_retried_next_run(self, send_many):
+        send_many.side_effect = lambda messages: [chat_id == 222 for chat_id, _ in messages]
+        self.assertEqual(check_expired_tasks(), 1)
+        self.assertEqual(
+            Task.objects.filter(completed=False, overdue_notified_at__isnull=True).count(), 5
+        )
+
+        send_many.side_effect = deliver_all
+        self.assertEqual(check_expired_tasks(), 3)
+
+    def test_small_chunks_announce_every_task(self, send_many):
+        # Чат alice попадает в две порции и получает две сводки
+        with mock.patch("tasks.tasks.OVERDUE_CHUNK_SIZE", 2):
+            self.assertEqual(check_expired_tasks(), 4)
+        self.assertEqual(send_many.call_count, 2)
+        self.assertFalse(
+            Task.objects.filter(completed=False, overdue_notified_at__isnull=True)
+            .exclude(assigned_to__username="carol").exists()
+        )
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    """Обработчик локального сервера, имитирующего Bot API."""
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        data = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, data))
+            status, body = server.responses.pop(0) if server.responses else (200, {"ok": True})
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TelegramSenderTests(SimpleTestCase):
+    """TelegramSender против локального сервера-заглушки Bot API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTelegramHandler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.responses = []
+        self.sender = TelegramSender(
+            token="TOKEN",
+            api_url=f"http://127.0.0.1:{self.server.server_port}",
+            max_retries=2,
+            backoff=0,
+            limiter=RateLimiter(global_rate=10000, per_chat_rate=10000),
+        )
+        self.addCleanup(self.sender.close)
+
+    def test_send_message(self):
+        self.assertTrue(self.sender.send_message(111, "hello"))
+        self.assertEqual(self.server.requests, [
+            ("/botTOKEN/sendMessage", {"chat_id": "111", "text": "hello", "parse_mode": "HTML"}),
+        ])
+
+    def test_retries_server_errors_and_rate_limits(self):
+        self.server.responses = [
+            (500, {"ok": False}),
+            (429, {"ok": False, "parameters": {"retry_after": 0}}),
+        ]
+        self.assertTrue(self.sender.send_message(111, "hello"))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_on_client_errors_and_long_retry_after(self):
+        with self.assertLogs("tasks.telegram", "WARNING"):
+            self.server.responses = [(400, {"ok": False, "description": "chat not found"})]
+            self.assertFalse(self.sender.send_message(111, "hello"))
+
+            self.server.responses = [(429, {"ok": False, "parameters": {"retry_after": 3600}})]
+            self.assertFalse(self.sender.send_message(111, "hello"))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_send_many_delivers_concurrently_with_retries(self):
+        self.server.responses = [(503, {"ok": False})]
+        messages = [(chat_id, f"digest {chat_id}") for chat_id in range(200)]
+
+        self.assertEqual(self.sender.send_many(messages), [True] * 200)
+        delivered = {data["chat_id"] for _, data in self.server.requests}
+        self.assertEqual(delivered, {str(chat_id) for chat_id, _ in messages})
+        self.assertEqual(len(self.server.requests), 201)
+
+    def test_send_many_reuses_session_until_closed(self):
+        sessions = []
+        client_session = aiohttp.ClientSession
+
+        def create_session(*args, **kwargs):
+            sessions.append(client_session(*args, **kwargs))
+            return sessions[-1]
+
+        with mock.patch("tasks.telegram.aiohttp.ClientSession", side_effect=create_session):
+            self.assertEqual(self.sender.send_many([(111, "first")]), [True])
+            self.assertEqual(self.sender.send_many([(222, "second")]), [True])
+        self.assertEqual(len(sessions), 1)
+        self.assertFalse(sessions[0].closed)
+
+        self.sender.close()
+        self.assertTrue(sessions[0].closed)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TelegramProfileCacheTests(TestCase):
+    """Соответствие telegram_id -> user_id кэшируется и сбрасывается сигналами."""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        self.client = APIClient()
+
+    def test_lookup_is_cached(self):
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_id_for_telegram(111), self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_id_for_telegram(111), self.user.id)
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_id_for_telegram(111), self.user.id)
+
+    def test_missing_ids_are_cached_negatively(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/telegram/tasks/", {"telegram_id": 999}).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/telegram/tasks/", {"telegram_id": 999}).status_code, 404)
+
+    def test_linking_invalidates_old_and_new_ids(self):
+        self.assertIsNone(get_user_id_for_telegram(222))
+        self.client.force_authenticate(self.user)
+
+        self.client.post("/api/link-telegram/", {"telegram_id": "111"}, format="json")
+        self.assertEqual(get_user_id_for_telegram(111), self.user.id)
+
+        self.client.post("/api/link-telegram/", {"telegram_id": "222"}, format="json")
+        self.assertEqual(get_user_id_for_telegram(222), self.user.id)
+        self.assertIsNone(get_user_id_for_telegram(111))
+
+    def test_delete_invalidates(self):
+        profile = TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        self.assertEqual(get_user_id_for_telegram(111), self.user.id)
+
+        profile.delete()
+        self.assertIsNone(get_user_id_for_telegram(111))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TelegramBotViewsTests(TestCase):
+    """Эндпоинты бота — async представления без async_to_sync."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user)
+        self.task = Task.objects.create(
+            title="Отчёт", assigned_to=self.user, task_list=self.task_list,
+            deadline=timezone.now() + timedelta(days=1),
+        )
+        self.client = AsyncClient()
+
+    def test_views_are_async(self):
+        self.assertTrue(TelegramTaskList.view_is_async)
+        self.assertTrue(TelegramCompleteTask.view_is_async)
+
+    async def test_list_pages_with_projection(self):
+        response = await self.client.get(
+            "/api/telegram/tasks/", {"telegram_id": 111, "fields": "id,title"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "next": None,
+            "previous": None,
+            "results": [{"id": self.task.id, "title": "Отчёт"}],
+        })
+        self.assertIn("Отчёт", response.content.decode())
+
+    async def test_list_errors(self):
+        response = await self.client.get("/api/telegram/tasks/", {"telegram_id": 111, "cursor": "bad"})
+        self.assertEqual(response.status_code, 404)
+        response = await self.client.get("/api/telegram/tasks/", {"telegram_id": 111, "completed": "maybe"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.client.get(
+            "/api/telegram/tasks/", {"telegram_id": 111, "deadline_before": "2024-02-30T00:00:00"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.client.get("/api/telegram/tasks/", {"telegram_id": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_complete_with_json_body(self):
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(user_group_name(self.user.id), channel)
+        await UserTaskStats.objects.acreate(user=self.user, total=1)
+
+        response = await self.client.post(
+            "/api/telegram/complete-task/",
+            {"telegram_id": 111, "task_id": self.task.id},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await channel_layer.receive(channel))["data"], {
+            "event": "task_completed",
+            "id": self.task.id,
+            "changes": {"completed": True},
+            "version": 2,
+        })
+        await self.task.arefresh_from_db()
+        self.assertEqual((self.task.completed, self.task.version), (True, 2))
+        stats = await UserTaskStats.objects.aget(user=self.user)
+        self.assertEqual((stats.completed, stats.revision), (1, 1))
+
+    async def test_complete_is_idempotent_and_checks_owner(self):
+        body = {"telegram_id": 111, "task_id": self.task.id}
+        for _ in range(2):
+            response = await self.client.post(
+                "/api/telegram/complete-task/", body, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+        await self.task.arefresh_from_db()
+        self.assertEqual(self.task.version, 2)
+
+        other = await User.objects.acreate(username="bob")
+        foreign = await Task.objects.acreate(
+            title="Чужая", assigned_to=other, task_list=self.task_list,
+            deadline=self.task.deadline,
+        )
+        response = await self.client.post(
+            "/api/telegram/complete-task/",
+            {"telegram_id": 111, "task_id": foreign.id},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
+        response = await self.client.post(
+            "/api/telegram/complete-task/", "{", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class BulkTaskTests(TestCase):
+    """Массовые операции выполняются одной транзакцией с одним событием."""
+
+    def setUp(self):
+        self.apply_async, self.schedule_many = patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        self.other = User.objects.create_user("bob", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.channel_layer = get_channel_layer()
+        self.channel = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(user_group_name(self.user.id), self.channel)
+        self.deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def make_tasks(self, user, count):
+        task_list = TaskList.objects.create(name="Default", owner=user)
+        return Task.objects.bulk_create(
+            Task(title=f"Task {i}", deadline=timezone.now(), task_list=task_list, assigned_to=user)
+            for i in range(count)
+        )
+
+    def receive_all(self):
+        events = []
+        while self.channel in self.channel_layer.channels:
+            events.append(async_to_sync(self.channel_layer.receive)(self.channel)["data"])
+        return events
+
+    @mock.patch("tasks.views.send_new_tasks_notification.delay")
+    def test_create(self, delay):
+        items = [{"title": f"Task {i}", "deadline": self.deadline} for i in range(100)]
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/bulk/create-tasks/", items, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["ids"]), 100)
+        self.assertEqual(Task.objects.filter(assigned_to=self.user).count(), 100)
+        self.assertLess(len(queries), 10)
+        self.assertEqual(self.receive_all(), [{"event": "task_updated", "message": "Обновлены задачи"}])
+        delay.assert_called_once_with(self.user.id, response.data["ids"])
+        self.schedule_many.assert_called_once_with(response.data["ids"])
+
+    @mock.patch("tasks.views.send_new_tasks_notification.delay")
+    def test_invalid_items_reject_the_whole_batch(self, delay):
+        items = [
+            {"title": "Ok", "deadline": self.deadline},
+            {"title": "No deadline"},
+            {"title": "Ok", "deadline": self.deadline},
+            {"deadline": "tomorrow"},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/bulk/create-tasks/", items, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.data["errors"]], [1, 3])
+        self.assertIn("deadline", response.data["errors"][0]["errors"])
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(self.receive_all(), [])
+        delay.assert_not_called()
+
+        self.assertEqual(self.client.post("/api/bulk/create-tasks/", [], format="json").status_code, 400)
+        with override_settings(BULK_TASKS_MAX_ITEMS=2):
+            response = self.client.post("/api/bulk/create-tasks/", items[:3], format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_complete(self):
+        tasks = self.make_tasks(self.user, 50)
+        foreign = self.make_tasks(self.other, 1)[0]
+        ids = [task.id for task in tasks]
+
+        response = self.client.post(
+            "/api/bulk/complete-tasks/", {"ids": ids + [foreign.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["id"], foreign.id)
+        self.assertFalse(Task.objects.filter(completed=True).exists())
+
+        # SAVEPOINT, проверка ID, UPDATE задач, UPDATE счетчиков, RELEASE
+        with self.assertNumQueries(5):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/bulk/complete-tasks/", {"ids": ids}, format="json")
+
+        self.assertEqual(response.data, {"completed": 50})
+        self.assertEqual(Task.objects.filter(completed=True, version=2).count(), 50)
+        self.assertEqual([e["event"] for e in self.receive_all()], ["task_updated"])
+
+    def test_update(self):
+        tasks = self.make_tasks(self.user, 30)
+        foreign = self.make_tasks(self.other, 1)[0]
+
+        response = self.client.patch("/api/bulk/update-tasks/", [
+            {"id": tasks[0].id, "title": "Renamed"},
+            {"id": foreign.id, "title": "Stolen"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.data["errors"]], [1])
+        self.assertEqual(Task.objects.get(id=foreign.id).title, "Task 0")
+
+        items = [{"id": task.id, "title": f"Renamed {task.id}"} for task in tasks]
+        items[0]["completed"] = True
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch("/api/bulk/update-tasks/", items, format="json")
+
+        self.assertEqual(response.data, {"updated": 30})
+        first = Task.objects.get(id=tasks[0].id)
+        self.assertEqual((first.title, first.completed, first.version), (f"Renamed {first.id}", True, 2))
+        self.assertEqual(Task.objects.filter(completed=True).count(), 1)
+        self.assertEqual([e["event"] for e in self.receive_all()], ["task_updated"])
+
+    def test_update_rejects_repeated_id(self):
+        task = Task.objects.create(
+            title="Report", deadline=timezone.now(),
+            task_list=TaskList.objects.create(name="Default", owner=self.user),
+            assigned_to=self.user,
+        )
+
+        response = self.client.patch("/api/bulk/update-tasks/", [
+            {"id": task.id, "completed": True},
+            {"id": task.id, "title": "Renamed"},
+            {"id": task.id, "completed": True},
+        ], format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.data["errors"]], [1, 2])
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        task.refresh_from_db()
+        self.assertEqual((task.title, task.completed, task.version), ("Report", False, 1))
+        stats = self.client.get("/api/my-tasks/stats/").data
+        self.assertEqual((stats["completed"], stats["open"]), (0, 1))
+
+    def test_complete_rejects_non_object_body(self):
+        task = self.make_tasks(self.user, 1)[0]
+
+        response = self.client.post("/api/bulk/complete-tasks/", [task.id], format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/bulk/complete-tasks/", {"ids": "1"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ids", response.data["errors"])
+        self.assertFalse(Task.objects.filter(completed=True).exists())
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class DefaultTaskListTests(TestCase):
+    """Список по умолчанию создается один раз, а его ID берется из кэша."""
+
+    def setUp(self):
+        self.apply_async, self.schedule_many = patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def create(self, **data):
+        return self.client.post(
+            "/api/create-task/", {"title": "Task", "deadline": self.deadline, **data}, format="json"
+        )
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_create_skips_default_list_lookup(self, delay):
+        first = self.create()
+        default = TaskList.objects.get(owner=self.user)
+        self.assertTrue(default.is_default)
+        self.assertEqual(first.data["task_list"], default.id)
+
+        # INSERT задачи и UPDATE счетчиков UserTaskStats
+        with self.assertNumQueries(2):
+            second = self.create()
+        self.assertEqual(second.data["task_list"], default.id)
+        self.assertEqual(delay.call_count, 2)
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_explicit_task_list_must_be_owned(self, delay):
+        own = TaskList.objects.create(name="Work", owner=self.user)
+        foreign = TaskList.objects.create(
+            name="Default", owner=User.objects.create_user("bob", password="pass")
+        )
+
+        self.assertEqual(self.create(task_list=own.id).data["task_list"], own.id)
+        response = self.create(task_list=foreign.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("task_list", response.data)
+        self.assertFalse(TaskList.objects.filter(owner=self.user, is_default=True).exists())
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_deleted_default_list_is_recreated(self, delay):
+        old_id = self.create().data["task_list"]
+        TaskList.objects.get(id=old_id).delete()
+
+        new_id = self.create().data["task_list"]
+        self.assertNotEqual(new_id, old_id)
+        self.assertEqual(TaskList.objects.filter(owner=self.user, is_default=True).count(), 1)
+
+    @mock.patch("tasks.views.send_new_task_notification.delay")
+    def test_deleted_default_list_is_not_served_from_local_cache(self, delay):
+        old_id = self.create().data["task_list"]
+        TaskList.objects.get(id=old_id).delete()
+        # Локальный кэш другого процесса сигналом не сбрасывается
+        local_cache.set(default_task_list_key(self.user.id), old_id, 60)
+
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(response.data["task_list"], old_id)
+
+    def test_one_default_list_per_owner(self):
+        TaskList.objects.create(name="Default", owner=self.user, is_default=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TaskList.objects.create(name="Other", owner=self.user, is_default=True)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class OverdueAlertTests(TestCase):
+    """Уведомление о просрочке планируется на срок задачи и не повторяется."""
+
+    def setUp(self):
+        self.apply_async, _ = patch_overdue_timers(self)
+        self.user = User.objects.create_user("alice", password="pass")
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        self.task_list = TaskList.objects.create(name="Default", owner=self.user)
+        self.deadline = timezone.now() - timedelta(minutes=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = Task.objects.create(
+                title="Report", deadline=self.deadline,
+                task_list=self.task_list, assigned_to=self.user,
+            )
+
+    def fire(self, deadline=None):
+        return notify_task_overdue(self.task.id, (deadline or self.deadline).isoformat())
+
+    def test_timer_is_scheduled_for_deadline(self):
+        self.apply_async.assert_called_once_with(
+            (self.task.id, self.deadline.isoformat()), eta=self.deadline
+        )
+
+        self.apply_async.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = "Renamed"
+            self.task.save()
+        self.apply_async.assert_not_called()
+
+        new_deadline = self.deadline + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.deadline = new_deadline
+            self.task.save()
+        self.apply_async.assert_called_once_with(
+            (self.task.id, new_deadline.isoformat()), eta=new_deadline
+        )
+
+    @mock.patch("tasks.tasks.send_message", return_value=True)
+    def test_alert_is_sent_once(self, send_message):
+        self.assertTrue(self.fire())
+        self.assertFalse(self.fire())
+        send_message.assert_called_once()
+        self.assertEqual(send_message.call_args.args[0], 111)
+        self.assertEqual(check_expired_tasks(), 0)
+
+    @mock.patch("tasks.tasks.send_message", return_value=True)
+    def test_stale_timers_do_nothing(self, send_message):
+        self.task.deadline = self.deadline + timedelta(hours=1)
+        self.task.save()
+        self.assertFalse(self.fire())
+
+        self.task.completed = True
+        self.task.save()
+        self.assertFalse(self.fire(self.task.deadline))
+        send_message.assert_not_called()
+
+    @mock.patch("tasks.tasks.send_message", return_value=True)
+    def test_rescheduling_rearms_the_alert(self, send_message):
+        self.assertTrue(self.fire())
+
+        self.task.refresh_from_db()
+        self.task.deadline = self.deadline + timedelta(minutes=30)
+        self.task.save()
+        self.assertIsNone(Task.objects.get(id=self.task.id).overdue_notified_at)
+        self.assertTrue(self.fire(self.task.deadline))
+        self.assertEqual(send_message.call_count, 2)
+
+    @mock.patch("tasks.tasks.send_message", return_value=False)
+    def test_failed_alert_is_left_for_the_sweep(self, send_message):
+        self.assertFalse(self.fire())
+        self.assertIsNone(Task.objects.get(id=self.task.id).overdue_notified_at)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TaskStatsTests(TestCase):
+    """Счетчики задач обновляются инкрементально и сверяются с таблицей."""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        patch_overdue_timers(self)
+        self.user = User.objects.create_user("alice", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task_list = TaskList.objects.create(name="Default", owner=self.user)
+
+    def create_task(self, **kwargs):
+        return Task.objects.create(**{
+            "title": "Task",
+            "deadline": timezone.now() + timedelta(days=7),
+            "task_list": self.task_list,
+            "assigned_to": self.user,
+            **kwargs,
+        })
+
+    def get_stats(self):
+        response = self.client.get("/api/my-tasks/stats/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counters_follow_task_changes(self):
+        self.create_task(completed=True)
+        self.assertEqual(self.get_stats()["total"], 1)
+
+        task = self.create_task()
+        self.create_task()
+        task.completed = True
+        task.save()
+        task.title = "Renamed"
+        task.save()
+        self.create_task().delete()
+
+        with self.assertNumQueries(2):
+            data = self.get_stats()
+        self.assertEqual(
+            {key: data[key] for key in ("total", "open", "completed")},
+            {"total": 3, "open": 1, "completed": 2},
+        )
+        self.assertEqual(data["revision"], 6)
+
+    @mock.patch("tasks.views.send_new_tasks_notification.delay")
+    def test_bulk_operations_update_counters(self, delay):
+        self.get_stats()
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+        ids = self.client.post("/api/bulk/create-tasks/", [
+            {"title": f"Task {i}", "deadline": deadline, "completed": i == 0} for i in range(5)
+        ], format="json").data["ids"]
+        self.client.post("/api/bulk/complete-tasks/", {"ids": ids[:3]}, format="json")
+        self.client.patch("/api/bulk/update-tasks/", [
+            {"id": ids[0], "completed": False}, {"id": ids[4], "completed": True},
+        ], format="json")
+
+        data = self.get_stats()
+        self.assertEqual((data["total"], data["completed"]), (5, 3))
+        self.assertEqual(reconcile(), 0)
+
+    def test_deadline_counts(self):
+        now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.create_task(deadline=now - timedelta(days=2))
+        self.create_task(deadline=now - timedelta(hours=1))
+        self.create_task(deadline=now + timedelta(hours=1))
+        self.create_task(deadline=now + timedelta(days=2))
+        self.create_task(deadline=now - timedelta(hours=1), completed=True)
+
+        self.assertEqual(deadline_counts(self.user.id, now=now), {"overdue": 2, "due_today": 2})
+
+    def test_reconcile_fixes_drift(self):
+        self.create_task()
+        self.get_stats()
+        UserTaskStats.objects.filter(user=self.user).update(total=10, completed=4)
+        other = User.objects.create_user("bob", password="pass")
+        Task.objects.create(
+            title="Task", deadline=timezone.now(), assigned_to=other,
+            task_list=TaskList.objects.create(name="Default", owner=other),
+        )
+
+        self.assertEqual(reconcile(), 2)
+        self.assertEqual((self.get_stats()["total"], self.get_stats()["completed"]), (1, 0))
+        self.assertEqual(UserTaskStats.objects.get(user=other).total, 1)
+        self.assertEqual(reconcile(), 0)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TaskSearchTests(TestCase):
+    """Поиск идет по полнотекстовому индексу, который обновляет база."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pass")
+        self.other = User.objects.create_user("bob", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task_list = TaskList.objects.create(name="Default", owner=self.user)
+
+    def create_task(self, title, description="", user=None):
+        return Task.objects.create(
+            title=title, description=description, deadline=timezone.now(),
+            task_list=self.task_list, assigned_to=user or self.user,
+        )
+
+    def search(self, q, **params):
+        response = self.client.get("/api/my-tasks/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [task["id"] for task in response.data["results"]]
+
+    def test_results_are_ranked_and_private(self):
+        in_description = self.create_task("Звонок", "Подготовить квартальный отчёт")
+        in_title = self.create_task("Квартальный отчёт", "Для бухгалтерии")
+        self.create_task("Отпуск")
+        self.create_task("Квартальный отчёт", user=self.other)
+
+        self.assertEqual(self.search("отчёт"), [in_title.id, in_description.id])
+        self.assertEqual(self.search("КВАРТ отч"), [in_title.id, in_description.id])
+        self.assertEqual(self.search("отчёт бухгалтерии"), [in_title.id])
+        self.assertEqual(self.search("отчёт", limit=1), [in_title.id])
+
+    def test_index_follows_writes(self):
+        task = self.create_task("Report")
+        task.title = "Invoice"
+        task.save()
+        self.assertEqual(self.search("report"), [])
+        self.assertEqual(self.search("invoice"), [task.id])
+
+        Task.objects.filter(id=task.id).update(description="urgent payment")
+        self.assertEqual(self.search("payment"), [task.id])
+
+        task.delete()
+        self.assertEqual(self.search("invoice"), [])
+
+    def test_projection_and_validation(self):
+        task = self.create_task("Report")
+        response = self.client.get("/api/my-tasks/search/", {"q": "report", "fields": "id,title"})
+        self.assertEqual(response.data["results"], [{"id": task.id, "title": "Report"}])
+
+        for params in ({"q": ""}, {"q": "!!"}, {"q": "report", "limit": "x"},
+                       {"q": "report", "limit": "0"}, {"q": "report", "fields": "secret"}):
+            self.assertEqual(self.client.get("/api/my-tasks/search/", params).status_code, 400)
+
+    def test_admin_search_uses_index(self):
+        report = self.create_task("Report", "quarterly numbers")
+        other = self.create_task("Holiday", user=self.other)
+        self.create_task("Holiday")
+        model_admin = TaskAdmin(Task, admin.site)
+
+        def found(term):
+            queryset, _ = model_admin.get_search_results(None, Task.objects.all(), term)
+            return set(queryset.values_list("id", flat=True))
+
+        self.assertEqual(found("quarter"), {report.id})
+        self.assertEqual(found("bob"), {other.id})
+
+
+class TaskIndexMigrationTests(TransactionTestCase):
+    """Индексы внешних ключей Task заменены составными индексами в обе стороны миграций."""
+
+    def field_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Task._meta.db_table)
+        return {
+            tuple(info["columns"]): name for name, info in constraints.items()
+            if info["index"] and not info["primary_key"] and not info["unique"]
+        }
+
+    def test_foreign_key_indexes_are_replaced(self):
+        indexes = self.field_indexes()
+        self.assertNotIn(("assigned_to_id",), indexes)
+        self.assertNotIn(("task_list_id",), indexes)
+        self.assertEqual(indexes[("task_list_id", "created_at")], "task_list_created")
+
+    def test_foreign_key_indexes_return_on_rollback(self):
+        executor = MigrationExecutor(connection)
+        leaf = executor.loader.graph.leaf_nodes("tasks")
+        executor.migrate([("tasks", "0003_task_version")])
+        indexes = self.field_indexes()
+        self.assertIn(("assigned_to_id",), indexes)
+        self.assertIn(("task_list_id",), indexes)
+
+        executor.loader.build_graph()
+        executor.migrate(leaf)
+        self.assertNotIn(("assigned_to_id",), self.field_indexes())
+
+
+@skipUnless(connection.vendor == "sqlite", "Триггеры FTS5 есть только в SQLite")
+class SearchTriggerTests(TransactionTestCase):
+    """Триггеры FTS индекса задач на месте после миграций в обе стороны."""
+
+    TRIGGERS = ["tasks_task_fts_delete", "tasks_task_fts_insert", "tasks_task_fts_update"]
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'tasks_task'"
+            )
+            return sorted(name for name, in cursor.fetchall())
+
+    def test_triggers_exist(self):
+        self.assertEqual(self.triggers(), self.TRIGGERS)
+
+    def test_triggers_survive_unapplying_migrations(self):
+        executor = MigrationExecutor(connection)
+        leaf = executor.loader.graph.leaf_nodes("tasks")
+        executor.migrate([("tasks", "0009_task_search_index")])
+        self.assertEqual(self.triggers(), self.TRIGGERS)
+
+        executor.loader.build_graph()
+        executor.migrate(leaf)
+        self.assertEqual(self.triggers(), self.TRIGGERS)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TaskListETagTests(TestCase):
+    """Списки задач отвечают 304 на совпадающий If-None-Match."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user("alice", password="pass")
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user)
+        self.task = Task.objects.create(
+            title="Report", deadline=timezone.now() + timedelta(days=1),
+            task_list=self.task_list, assigned_to=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get("/api/my-tasks/")
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/my-tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get("/api/my-tasks/", {"fields": "id"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_any_task_change_changes_etag(self):
+        etag = self.client.get("/api/my-tasks/")["ETag"]
+        self.task.title = "Renamed"
+        self.task.save()
+
+        response = self.client.get("/api/my-tasks/", HTTP_IF_NONE_MATCH=f'"stale", W/{etag}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["title"], "Renamed")
+        etag = response["ETag"]
+
+        with mock.patch("tasks.tasks.send_message", return_value=False):
+            Task.objects.filter(id=self.task.id).update(deadline=timezone.now() - timedelta(minutes=1))
+            self.task.refresh_from_db()
+            notify_task_overdue(self.task.id, self.task.deadline.isoformat())
+        response = self.client.get("/api/my-tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bot_list_is_not_modified(self):
+        response = self.client.get("/api/telegram/tasks/", {"telegram_id": 111})
+        etag = response["ETag"]
+        response = self.client.get(
+            "/api/telegram/tasks/", {"telegram_id": 111}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(
+            "/api/telegram/complete-task/",
+            {"telegram_id": 111, "task_id": self.task.id}, format="json",
+        )
+        response = self.client.get(
+            "/api/telegram/tasks/", {"telegram_id": 111}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["results"][0]["completed"])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, TASK_SYNC={"LAG": 0, "TOMBSTONE_TTL": 86400})
+class TaskSyncTests(TestCase):
+    """Синхронизация выдает только изменения после водяного знака."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        self.user = User.objects.create_user("alice", password="pass")
+        TelegramProfile.objects.create(user=self.user, telegram_id=111)
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user)
+        self.tasks = [self.create_task(f"Task {i}") for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, title):
+        return Task.objects.create(
+            title=title, deadline=timezone.now() + timedelta(days=1),
+            task_list=self.task_list, assigned_to=self.user,
+        )
+
+    def sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get("/api/my-tasks/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def full_sync(self):
+        data = self.sync()
+        self.assertFalse(data["has_more"])
+        return data["since"]
+
+    def test_first_sync_returns_all_tasks_in_pages(self):
+        first = self.sync(limit=2, fields="id,title")
+        self.assertTrue(first["has_more"])
+        self.assertEqual(first["changed"], [{"id": t.id, "title": t.title} for t in self.tasks[:2]])
+        rest = self.sync(first["since"], limit=2)
+        self.assertFalse(rest["has_more"])
+        self.assertEqual([row["id"] for row in rest["changed"]], [self.tasks[2].id])
+
+    def test_only_changes_after_watermark(self):
+        since = self.full_sync()
+        self.assertEqual(self.sync(since)["changed"], [])
+
+        self.client.patch(f"/api/complete-task/{self.tasks[0].id}/")
+        self.client.post("/api/bulk/complete-tasks/", {"ids": [self.tasks[1].id]}, format="json")
+        self.client.post(
+            "/api/telegram/complete-task/", {"telegram_id": 111, "task_id": self.tasks[2].id},
+            format="json",
+        )
+        data = self.sync(since)
+        self.assertEqual([row["id"] for row in data["changed"]], [t.id for t in self.tasks])
+        self.assertTrue(all(row["completed"] for row in data["changed"]))
+        self.assertEqual(self.sync(data["since"])["changed"], [])
+
+    def test_bulk_update_and_deletes(self):
+        since = self.full_sync()
+        response = self.client.patch(
+            "/api/bulk/update-tasks/", [{"id": self.tasks[1].id, "title": "Renamed"}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        deleted_id = self.tasks[2].id
+        self.tasks[2].delete()
+
+        data = self.sync(since)
+        self.assertEqual([row["title"] for row in data["changed"]], ["Renamed"])
+        self.assertEqual(data["deleted"], [deleted_id])
+        self.assertEqual(self.sync(data["since"])["deleted"], [])
+
+    def test_invalid_and_expired_watermarks(self):
+        response = self.client.get("/api/my-tasks/changes/", {"since": "bad"})
+        self.assertEqual(response.status_code, 400)
+
+        since = self.full_sync()
+        with mock.patch("tasks.sync.timezone.now", return_value=timezone.now() + timedelta(days=2)):
+            response = self.client.get("/api/my-tasks/changes/", {"since": since})
+        self.assertEqual(response.status_code, 410)
+
+    def test_old_tombstones_are_purged(self):
+        self.tasks[0].delete()
+        self.assertEqual(purge_task_tombstones(), 0)
+        TaskTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_task_tombstones(), 1)
+
+    def test_deleting_user_keeps_tombstones_valid(self):
+        self.user.delete()
+        self.assertEqual(TaskTombstone.objects.count(), 3)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TaskCompletionTests(TestCase):
+    """Задача отмечается выполненной одним условным UPDATE."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        self.user = User.objects.create_user("alice", password="pass")
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user)
+        self.task = Task.objects.create(
+            title="Report", deadline=timezone.now() + timedelta(days=1),
+            task_list=self.task_list, assigned_to=self.user,
+        )
+        UserTaskStats.objects.create(user=self.user, total=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_single_statement_and_idempotent(self):
+        with self.assertNumQueries(2):
+            response = self.client.patch(f"/api/complete-task/{self.task.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["completed"], response.data["version"]), (True, 2))
+
+        response = self.client.patch(f"/api/complete-task/{self.task.id}/")
+        self.assertEqual((response.data["completed"], response.data["version"]), (True, 2))
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.completed, stats.revision), (1, 1))
+
+    def test_returned_row_matches_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task, completed = complete_task(self.task.id, self.user.id)
+        self.assertTrue(completed)
+        self.assertEqual(TaskSerializer(task).data, TaskSerializer(Task.objects.get()).data)
+        self.assertEqual(task.loaded_values["completed"], True)
+
+    def test_fallback_without_returning(self):
+        with mock.patch("tasks.completion.supports_update_returning", return_value=False):
+            task, completed = complete_task(self.task.id, self.user.id)
+            self.assertEqual((task.completed, task.version, completed), (True, 2, True))
+            self.assertEqual(complete_task(self.task.id, self.user.id)[1], False)
+
+    def test_foreign_tasks_are_not_found(self):
+        other = User.objects.create_user("bob")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.patch(f"/api/complete-task/{self.task.id}/").status_code, 404)
+        self.assertEqual(self.client.put(f"/api/complete-task/{self.task.id}/").status_code, 405)
+        self.assertFalse(Task.objects.get().completed)
+
+
+class FastReadPathTests(TestCase):
+    """Быстрый путь чтения совпадает с TaskSerializer байт в байт."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        self.user = User.objects.create_user("alice", password="pass")
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user)
+        now = timezone.now().replace(microsecond=123456)
+        for i, title in enumerate(["Отчёт", "Line\u2028break", 'Quote " \\ tab\t']):
+            Task.objects.create(
+                title=title, description="é" * i, deadline=now + timedelta(hours=i),
+                task_list=self.task_list, assigned_to=self.user,
+                overdue_notified_at=now if i == 1 else None,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queryset(self):
+        return Task.objects.order_by("deadline", "id")
+
+    def test_rows_render_like_serializer(self):
+        for fields in (None, ["title", "deadline"], ["overdue_notified_at", "id"]):
+            with self.subTest(fields=fields):
+                rows, task_row = task_rows(self.queryset(), fields)
+                expected = JSONRenderer().render(
+                    TaskSerializer(list(self.queryset()), many=True, fields=fields).data
+                )
+                self.assertEqual(render_json([task_row(row) for row in rows]), expected)
+
+    @override_settings(TIME_ZONE="Europe/Moscow")
+    def test_rows_use_current_timezone(self):
+        rows, task_row = task_rows(self.queryset(), ["deadline"])
+        expected = TaskSerializer(list(self.queryset()), many=True, fields=["deadline"]).data
+        self.assertEqual([task_row(row) for row in rows], expected)
+        self.assertTrue(expected[0]["deadline"].endswith("+03:00"))
+
+    def test_list_endpoint_matches_serializer(self):
+        response = self.client.get("/api/my-tasks/", {"page_size": 2})
+        expected = JSONRenderer().render({
+            "next": response.data["next"],
+            "previous": None,
+            "results": TaskSerializer(list(self.queryset()[:2]), many=True).data,
+        })
+        self.assertEqual(response.content, expected)
+
+        response = self.client.get("/api/my-tasks/", {"cursor": response.data["next"], "fields": "title"})
+        self.assertEqual(response.data["results"], [{"title": 'Quote " \\ tab\t'}])
+
+    def test_renderer_matches_drf(self):
+        data = {
+            "text": "Привет\u2028\u2029", 1: [1.5, None, True], "when": timezone.now(),
+            "amount": Decimal("1.10"), "label": gettext_lazy("Задача"),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+    def test_other_endpoints_render_like_drf(self):
+        # ORJSONRenderer задан глобально в REST_FRAMEWORK, поэтому
+        # ответы остальных API не должны отличаться от JSONRenderer
+        task = Task.objects.first()
+        responses = [
+            self.client.get("/api/my-tasks/stats/"),
+            self.client.patch(f"/api/complete-task/{task.id}/"),
+            self.client.post("/api/create-task/", {"title": ""}, format="json"),
+            APIClient().get("/api/my-tasks/"),
+        ]
+        self.assertEqual([r.status_code for r in responses], [200, 200, 400, 401])
+        for response in responses:
+            with self.subTest(path=response.request["PATH_INFO"]):
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchserialize", rows=20, repeat=1, stdout=out)
+        self.assertIn("Ускорение", out.getvalue())
+        self.assertFalse(User.objects.filter(username="benchserialize").exists())
+
+
+@override_settings(
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class AdminQueryCountTests(TestCase):
+    """Списки админки выполняют постоянное число запросов."""
+
+    changelists = ("task", "tasklist", "telegramprofile", "usertaskstats")
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        self.admin = User.objects.create_superuser("admin", password="pass")
+        self.client.force_login(self.admin)
+        self.next_user = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.next_user += 1
+            user = User.objects.create_user(f"user{self.next_user}")
+            task_list = TaskList.objects.create(name="Inbox", owner=user)
+            Task.objects.create(
+                title="Task", assigned_to=user, task_list=task_list, deadline=timezone.now()
+            )
+            TelegramProfile.objects.create(user=user, telegram_id=self.next_user)
+            UserTaskStats.objects.create(user=user, total=1)
+
+    def count_queries(self, model_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/admin/tasks/{model_name}/")
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        baseline = {name: self.count_queries(name) for name in self.changelists}
+        self.add_rows(5)
+        for name in self.changelists:
+            with self.subTest(changelist=name):
+                self.assertEqual(self.count_queries(name), baseline[name])
+
+    def test_str_does_not_query_user(self):
+        self.add_rows(1)
+        task = Task.objects.get()
+        profile = TelegramProfile.objects.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(str(task), f"Task (#{task.assigned_to_id})")
+            self.assertIn(f"#{profile.user_id}", str(profile))
+        self.assertEqual(str(Task.objects.select_related("assigned_to").get()), "Task (user1)")
+
+    def test_paginator_estimates_unfiltered_count(self):
+        self.add_rows(1)
+        with mock.patch("tasks.admin.estimated_row_count", return_value=5_000_000) as estimate:
+            self.assertEqual(EstimatedCountPaginator(Task.objects.order_by("id"), 100).count, 5_000_000)
+            self.assertEqual(
+                EstimatedCountPaginator(Task.objects.filter(completed=False).order_by("id"), 100).count, 1
+            )
+        estimate.assert_called_once()
+        with mock.patch("tasks.admin.estimated_row_count", return_value=10):
+            self.assertEqual(EstimatedCountPaginator(Task.objects.order_by("id"), 100).count, 1)
+        # SQLite не дает оценку — используется точный COUNT(*)
+        self.assertEqual(EstimatedCountPaginator(Task.objects.order_by("id"), 100).count, 1)
+
+    def test_task_stats_are_read_only(self):
+        self.add_rows(1)
+        stats_row = UserTaskStats.objects.get()
+        url = f"/admin/tasks/usertaskstats/{stats_row.pk}/change/"
+
+        self.assertEqual(self.client.get("/admin/tasks/usertaskstats/add/").status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.post(url, {"total": 100}).status_code, 403)
+        stats_row.refresh_from_db()
+        self.assertEqual(stats_row.total, 1)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    """Настройки базы данных собираются из переменных окружения."""
+
+    base_dir = Path("/app")
+
+    def test_sqlite_by_default(self):
+        config = database_config({}, self.base_dir)
+        self.assertEqual(config["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(config["NAME"], self.base_dir / "db.sqlite3")
+        self.assertIn("journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+        config = database_config({"DATABASE_URL": "sqlite:////data/tasks.db"}, self.base_dir)
+        self.assertEqual(config["NAME"], "/data/tasks.db")
+
+    def test_postgres_with_persistent_connections(self):
+        config = database_config(
+            {"DATABASE_URL": "postgres://task%40manager:p%2Fss@db:6432/tasks"}, self.base_dir
+        )
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(
+            (config["USER"], config["PASSWORD"], config["HOST"], config["PORT"], config["NAME"]),
+            ("task@manager", "p/ss", "db", "6432", "tasks"),
+        )
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", config["OPTIONS"])
+
+    def test_pool_and_pgbouncer_modes(self):
+        url = "postgresql://user:pass@db/tasks"
+        pooled = database_config({"DATABASE_URL": url, "DB_POOL": "1", "DB_POOL_MAX_SIZE": "20"}, self.base_dir)
+        self.assertEqual(pooled["CONN_MAX_AGE"], 0)
+        self.assertEqual(pooled["OPTIONS"]["pool"]["max_size"], 20)
+
+        bouncer = database_config({"DATABASE_URL": url, "DB_PGBOUNCER": "true"}, self.base_dir)
+        self.assertTrue(bouncer["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertIsNone(bouncer["OPTIONS"]["prepare_threshold"])
+        self.assertNotIn("pool", bouncer["OPTIONS"])
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            database_config({"DATABASE_URL": "mysql://db/tasks"}, self.base_dir)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """Команда loadtest нагружает API с JWT аутентификацией."""
+
+    def test_reports_throughput(self):
+        User.objects.create_user("alice", password="pass")
+        out = StringIO()
+
+        call_command(
+            "loadtest", f"{self.live_server_url}/api/my-tasks/",
+            "--concurrency", "4", "--duration", "0.5",
+            "--username", "alice", "--password", "pass",
+            stdout=out,
+        )
+
+        self.assertIn("запросов/с", out.getvalue())
+        self.assertIn("{200:", out.getvalue())
+
+
+@override_settings(**OFFLINE_SETTINGS)
+class PerfBenchTests(TransactionTestCase):
+    """Бенчмарк perfbench работает без внешних сервисов и находит регрессии."""
+
+    def setUp(self):
+        local_cache.clear()
+
+    def test_runs_all_scenarios_offline(self):
+        fixture = seed(users=3, tasks_per_user=20)
+        results = run_benchmarks(
+            fixture, ["list", "telegram-list", "create", "complete", "telegram-complete",
+                      "ws-fanout", "digest"],
+            # Запросы выполняются в отдельных потоках, а SQLite в памяти
+            # не ждет блокировок, поэтому без конкурентности
+            requests=6, concurrency=1, ws_connections=6, ws_rounds=2,
+        )
+
+        for name, result in results.items():
+            self.assertEqual(result["errors"], 0, name)
+        # Два соединения на каждого из трех пользователей, два раунда
+        self.assertEqual(results["ws-fanout"]["requests"], 12)
+        # Одна сводка на пользователя с просроченными задачами
+        self.assertEqual(results["digest"]["requests"], 3)
+        self.assertEqual(results["complete"]["queries_per_request"], 4)
+        self.assertEqual(Task.objects.filter(title__startswith="Новая задача").count(), 6)
+
+    def test_compare_reports_regressions(self):
+        stored = {"p95_ms": 10.0, "rps": 100.0, "queries_per_request": 3.0}
+        baseline = {"list": stored, "digest": {**stored, "p95_ms": None}}
+
+        self.assertEqual(compare({"list": {**stored, "p95_ms": 14.0, "rps": 60.0}}, baseline, 0.5), [])
+        regressions = compare({
+            "list": {"p95_ms": 16.0, "rps": 40.0, "queries_per_request": 4.0},
+            "digest": {**stored, "p95_ms": None},
+            "new": {**stored, "rps": 1.0},
+        }, baseline, 0.5)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(line.startswith("list:") for line in regressions))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class RequestMetricsTests(TestCase):
+    """Метрики запросов и задач Celery: Server-Timing, /metrics и N+1."""
+
+    def setUp(self):
+        patch_overdue_timers(self)
+        cache.clear()
+        local_cache.clear()
+        metrics.registry.reset()
+        # Фоновое сохранение снимков в тестах не нужно: collect сохраняет сам
+        patcher = mock.patch("tasks.metrics.start_flusher")
+        self.start_flusher = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user("alice")
+        self.task_list = TaskList.objects.create(name="Inbox", owner=self.user, is_default=True)
+        self.task = Task.objects.create(
+            title="Report", deadline=timezone.now() + timedelta(days=1),
+            task_list=self.task_list, assigned_to=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(REQUEST_METRICS={**settings.REQUEST_METRICS, "TOKEN": "secret"})
+    def test_server_timing_and_prometheus_histograms(self):
+        with mock.patch("tasks.metrics.cache") as metrics_cache:
+            response = self.client.patch(f"/api/complete-task/{self.task.id}/")
+        # Запрос не обращается к кэшу: снимок сохраняет фоновый поток
+        metrics_cache.set.assert_not_called()
+        self.start_flusher.assert_called()
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", '
+            r'serialize;dur=[\d.]+, publish;dur=[\d.]+$',
+        )
+        text = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").content.decode()
+        self.assertIn(
+            'http_requests_total{view="complete-task",method="PATCH",status="200"} 1', text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="complete-task",method="PATCH",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('http_request_publish_duration_seconds_count{view="complete-task"} 1', text)
+        self.assertIn("# TYPE http_request_db_queries histogram", text)
+
+    def test_celery_tasks_are_measured(self):
+        purge_task_tombstones.apply()
+
+        values = metrics.collect()
+        labels = (("task", "tasks.tasks.purge_task_tombstones"),)
+        self.assertEqual(values[("celery_tasks_total", (*labels, ("state", "SUCCESS")))], 1)
+        counts, _, count = values[("celery_task_db_queries", labels)]
+        self.assertEqual(count, 1)
+        self.assertEqual(counts[0], 1)
+
+    def test_repeated_queries_are_logged(self):
+        with self.assertLogs("tasks.metrics", "WARNING") as logs:
+            with metrics.measure() as measurement:
+                for _ in range(10):
+                    Task.objects.filter(id=self.task.id).first()
+            metrics.record("http_request", (("view", "test"), ("method", "GET")), measurement, 0.1)
+
+        self.assertIn("10 раз", logs.output[0])
+        snapshot = metrics.registry.snapshot()
+        self.assertEqual(snapshot[("http_request_n_plus_one_total", (("view", "test"),))], 1)
+
+    @override_settings(REQUEST_METRICS={**settings.REQUEST_METRICS, "TOKEN": ""})
+    def test_metrics_are_closed_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(REQUEST_METRICS={**settings.REQUEST_METRICS, "TOKEN": "secret"})
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+
+def import_bot():
+    """
+    Импортирует модуль Telegram бота.
+
+    Настройки бота читаются из окружения при импорте, а aiogram
+    проверяет формат токена, поэтому подставляется тестовый токен.
+    """
+    with mock.patch.dict(os.environ, {"BOT_TOKEN": "42:TEST"}), \
+            mock.patch.object(logging, "basicConfig"):
+        return importlib.import_module("bot.bot")
+
+
+class FakeTaskAPI:
+    """Django API задач для бота: отдает страницу с ETag и учитывает If-None-Match."""
+
+    def __init__(self):
+        self.etag = '"1"'
+        self.title = "Report"
+        self.conditions = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/telegram/tasks/", self.tasks)
+        app.router.add_post("/api/telegram/complete-task/", self.complete)
+        return app
+
+    async def tasks(self, request):
+        condition = request.headers.get("If-None-Match")
+        self.conditions.append(condition)
+        if condition == self.etag:
+            return web.Response(status=304, headers={"ETag": self.etag})
+        data = {"results": [{"id": 1, "title": self.title}], "next": None, "previous": None}
+        return web.json_response(data, headers={"ETag": self.etag})
+
+    async def complete(self, request):
+        self.etag, self.title = '"2"', "Done"
+        return web.json_response({"status": "ok"})
+
+
+class BotPageCacheTests(SimpleTestCase):
+    """Страницы задач бота всегда перепроверяются в Django API по ETag."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bot = import_bot()
+
+    @asynccontextmanager
+    async def bot_api(self):
+        api = FakeTaskAPI()
+        server = TestServer(api.app())
+        await server.start_server()
+        session = aiohttp.ClientSession()
+        try:
+            with mock.patch.multiple(
+                self.bot,
+                DJANGO_API_URL=str(server.make_url("/api/")),
+                api_session=session,
+                tasks_cache=self.bot.TTLCache(30, 100),
+            ):
+                yield api
+        finally:
+            await session.close()
+            await server.close()
+
+    async def test_cached_page_is_revalidated(self):
+        async with self.bot_api() as api:
+            first = await self.bot.fetch_tasks(111)
+            second = await self.bot.fetch_tasks(111)
+
+            self.assertEqual(first, second)
+            self.assertEqual(api.conditions, [None, '"1"'])
+
+    async def test_page_changed_elsewhere_is_not_served_from_cache(self):
+        async with self.bot_api() as api:
+            await self.bot.fetch_tasks(111)
+            # Задачу изменила другая реплика бота или веб-интерфейс
+            api.etag, api.title = '"2"', "Renamed"
+
+            status, data = await self.bot.fetch_tasks(111)
+            self.assertEqual((status, data["results"][0]["title"]), (200, "Renamed"))
+
+    async def test_complete_invalidates_pages(self):
+        async with self.bot_api() as api:
+            await self.bot.fetch_tasks(111)
+            self.assertEqual(await self.bot.complete(111, 1), 200)
+
+            status, data = await self.bot.fetch_tasks(111)
+            self.assertEqual(data["results"][0]["title"], "Done")
+            self.assertEqual(api.conditions, [None, None])
+
+
+class BotWebhookTests(SimpleTestCase):
+    """Webhook бота отклоняет некорректные тела и переполнение очереди."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bot = import_bot()
+
+    @asynccontextmanager
+    async def webhook(self, queue_size=10):
+        # Обработчики не запускаются: обновления остаются в очереди
+        pool = self.bot.UpdateWorkerPool(self.bot.dp, self.bot.bot, 1, queue_size)
+        app = web.Application()
+        app.router.add_post("/webhook", pool.handle)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                yield lambda **kwargs: session.post(server.make_url("/webhook"), **kwargs)
+        finally:
+            await server.close()
+
+    @staticmethod
+    def update(update_id):
+        return {"update_id": update_id}
+
+    async def test_invalid_body_is_rejected(self):
+        async with self.webhook() as post:
+            for kwargs in (
+                {"data": b"{not json", "headers": {"Content-Type": "application/json"}},
+                {"json": [1, 2]},
+                {"json": {"update_id": "first"}},
+            ):
+                async with post(**kwargs) as resp:
+                    self.assertEqual(resp.status, 400, kwargs)
+            async with post(json=self.update(1)) as resp:
+                self.assertEqual(resp.status, 200)
+
+    async def test_full_queue_returns_503(self):
+        async with self.webhook(queue_size=1) as post:
+            async with post(json=self.update(1)) as resp:
+                self.assertEqual(resp.status, 200)
+            async with post(json=self.update(2)) as resp:
+                self.assertEqual(resp.status, 503)
+                self.assertEqual(resp.headers["Retry-After"], "1")
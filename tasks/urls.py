@@ -5,23 +5,36 @@ URL конфигурация для приложения управления з
 включая веб-интерфейс и интеграцию с Telegram ботом.
 
 URL паттерны:
-- my-tasks/ - Получение списка задач пользователя (GET)
+- my-tasks/ - Постраничное получение задач пользователя (GET)
+- my-tasks/stats/ - Статистика задач пользователя (GET)
+- my-tasks/search/ - Полнотекстовый поиск по задачам пользователя (GET)
+- my-tasks/changes/ - Изменения задач после водяного знака since (GET)
 - create-task/ - Создание новой задачи (POST)
 - complete-task/<id>/ - Отметка задачи как выполненной (PATCH)
+- bulk/create-tasks/ - Массовое создание задач (POST)
+- bulk/complete-tasks/ - Массовая отметка задач как выполненных (POST)
+- bulk/update-tasks/ - Массовое изменение задач (PATCH)
 - link-telegram/ - Привязка Telegram аккаунта (POST)
-- telegram/tasks/ - API для бота: получение задач по Telegram ID (GET)
+- telegram/tasks/ - API для бота: страница задач по Telegram ID (GET)
 - telegram/complete-task/ - API для бота: завершение задачи (POST)
 - '' - Главная страница с веб-интерфейсом
 """
 
 from django.urls import path
-from .views import MyTaskListView, TaskCreateView, TaskCompleteView,index, LinkTelegramView
+from .views import MyTaskChangesView, MyTaskListView, MyTaskSearchView, MyTaskStatsView, TaskCreateView, TaskCompleteView,index, LinkTelegramView
 from .views import TelegramTaskList, TelegramCompleteTask
+from .views import BulkTaskCreateView, BulkTaskCompleteView, BulkTaskUpdateView
 
 urlpatterns = [
     path('my-tasks/', MyTaskListView.as_view(), name='my-tasks'),
+    path('my-tasks/stats/', MyTaskStatsView.as_view(), name='my-tasks-stats'),
+    path('my-tasks/search/', MyTaskSearchView.as_view(), name='my-tasks-search'),
+    path('my-tasks/changes/', MyTaskChangesView.as_view(), name='my-tasks-changes'),
     path('create-task/', TaskCreateView.as_view(), name='create-task'),
     path('complete-task/<int:pk>/', TaskCompleteView.as_view(), name='complete-task'),
+    path('bulk/create-tasks/', BulkTaskCreateView.as_view(), name='bulk-create-tasks'),
+    path('bulk/complete-tasks/', BulkTaskCompleteView.as_view(), name='bulk-complete-tasks'),
+    path('bulk/update-tasks/', BulkTaskUpdateView.as_view(), name='bulk-update-tasks'),
     path('link-telegram/', LinkTelegramView.as_view(), name='link-telegram'),
     path('telegram/tasks/', TelegramTaskList.as_view(), name='telegram-tasks'),
     path('telegram/complete-task/', TelegramCompleteTask.as_view(), name='telegram-complete-task'),
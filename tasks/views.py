@@ -6,64 +6,278 @@
 создания, просмотра и обновления задач, а также для связи аккаунтов с Telegram.
 """
 
+import hashlib
+import hmac
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from rest_framework import generics, permissions
-from .models import Task, TaskList, TelegramProfile
-from .serializers import TaskSerializer
+from rest_framework.exceptions import APIException, NotFound
+from . import events, metrics, stats
+from .models import Task, TelegramProfile
+from .serializers import (
+    BulkTaskCompleteSerializer, BulkTaskCreateSerializer, BulkTaskUpdateSerializer, TaskSerializer,
+)
+from .cache import aget_user_id_for_telegram, get_default_task_list_id
+from .filters import filter_tasks, parse_fields
+from .pagination import TaskCursorPagination
+from .renderers import render_json
+from .rows import task_rows
+from .completion import complete_task
+from .search import search_task_ids, search_terms
+from .sync import SyncExpired, changes_since, parse_since
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.http import parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .tasks import send_new_task_notification
+from .tasks import schedule_overdue_alerts, send_new_task_notification, send_new_tasks_notification
+
+# Размер порции строк в одном INSERT/UPDATE массовых операций
+BULK_BATCH_SIZE = 1000
+
+# Число результатов поиска по умолчанию и максимальное
+SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+
+# Число измененных задач в ответе синхронизации по умолчанию и максимальное
+SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 1000
 
 
-def notify_tasks_updated():
+def task_list_etag(user_id, revision, request):
     """
-    Отправляет уведомление о обновлении задач через WebSocket.
-    
-    Функция использует Django Channels для отправки сообщения всем подключенным
-    клиентам в группе "tasks" о том, что список задач был обновлен.
-    Это позволяет обновлять интерфейс в реальном времени.
-    """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        "tasks",
-        {
-            "type": "send_task_update",
-            "data": {
-                "event": "task_updated",
-                "message": "Обновлены задачи",
-            }
-        }
-    )
+    Строит ETag страницы списка задач.
+
+    Ответ зависит от revision пользователя и параметров запроса (фильтры,
+    курсор, проекция), поэтому ETag строится по ним, без чтения задач.
+
+    Args:
+        user_id (int): ID пользователя Django
+        revision (int): Текущая revision пользователя (см. tasks.stats)
+        request (HttpRequest): Запрос списка
+
+    Returns:
+        str: ETag в кавычках
+    """
+    key = f"{user_id}:{revision}:{request.META.get('QUERY_STRING', '')}"
+    return f'"{revision}-{hashlib.blake2s(key.encode(), digest_size=8).hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    """Проверяет If-None-Match запроса (слабое сравнение, как в RFC 9110)."""
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or any(tag.removeprefix("W/") == etag for tag in etags)
+
+
+def set_validator(response, etag):
+    """Добавляет ETag и требует перепроверки закэшированного ответа."""
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
 
 class MyTaskListView(generics.ListAPIView):
     """
     Представление для получения списка задач текущего пользователя.
     
-    Возвращает только задачи, назначенные аутентифицированному пользователю.
+    Возвращает только задачи, назначенные аутентифицированному пользователю,
+    постранично в порядке (deadline, id). Поддерживает фильтры ``completed``,
+    ``deadline_after``, ``deadline_before`` и проекцию ``fields``.
     Используется для отображения персональных задач в веб-интерфейсе.
+
+    Ответ содержит ETag по revision пользователя: запрос с совпадающим
+    If-None-Match получает 304 без чтения задач.
     
     Attributes:
         serializer_class: Сериализатор для задач
         permission_classes: Требуется аутентификация
+        pagination_class: Курсорная пагинация по (deadline, id)
     """
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskCursorPagination
 
     def get_queryset(self):
-        """Возвращает задачи, назначенные текущему пользователю."""
-        return Task.objects.filter(assigned_to=self.request.user)
+        """Возвращает отфильтрованные задачи, назначенные текущему пользователю."""
+        queryset, self.projected_fields = filter_tasks(
+            Task.objects.filter(assigned_to=self.request.user),
+            self.request.query_params,
+        )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает страницу задач по быстрому пути чтения.
+
+        Строки читаются через .values() и преобразуются в JSON без
+        сериализатора (см. tasks.rows); формат ответа тот же.
+        """
+        # revision читается до задач: если задачи изменятся между
+        # запросами, ETag окажется старым и следующий запрос получит 200
+        etag = task_list_etag(request.user.id, stats.get_revision(request.user.id), request)
+        if etag_matches(request, etag):
+            return set_validator(Response(status=304), etag)
+
+        rows, task_row = task_rows(self.get_queryset(), self.projected_fields)
+        page = self.paginate_queryset(rows)
+        return set_validator(self.get_paginated_response([task_row(row) for row in page]), etag)
+
+class MyTaskStatsView(APIView):
+    """
+    API статистики задач текущего пользователя.
+
+    Число всех, открытых и выполненных задач берется из счетчиков
+    UserTaskStats, число просроченных задач и задач со сроком сегодня —
+    из одного запроса по индексу (assigned_to, completed, deadline).
+    Время ответа не зависит от общего числа задач.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Возвращает статистику задач пользователя.
+
+        Args:
+            request: HTTP запрос
+
+        Returns:
+            Response: total, open, completed, overdue, due_today и revision
+        """
+        user_stats = stats.get_stats(request.user.id)
+        return Response({
+            "total": user_stats.total,
+            "open": user_stats.total - user_stats.completed,
+            "completed": user_stats.completed,
+            **stats.deadline_counts(request.user.id),
+            "revision": user_stats.revision,
+        })
+
+
+class MyTaskSearchView(APIView):
+    """
+    API полнотекстового поиска по задачам текущего пользователя.
+
+    Ищет слова запроса ``q`` (по префиксу) в заголовках и описаниях
+    по полнотекстовому индексу (см. tasks.search) и возвращает до
+    ``limit`` задач по убыванию релевантности. Поддерживает проекцию
+    ``fields``.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Возвращает найденные задачи.
+
+        Args:
+            request: HTTP запрос с параметрами q, limit и fields
+
+        Returns:
+            Response: {"results": [...]} или ошибка 400
+        """
+        query = request.query_params.get("q", "")
+        if not search_terms(query):
+            return Response({"q": "Search query is required"}, status=400)
+        try:
+            limit = min(int(request.query_params.get("limit", SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        except ValueError:
+            return Response({"limit": "Expected an integer"}, status=400)
+        if limit < 1:
+            return Response({"limit": "Expected a positive integer"}, status=400)
+        fields = parse_fields(request.query_params)
+
+        ids = search_task_ids(query, request.user.id, limit)
+        rows, task_row = task_rows(Task.objects.filter(id__in=ids), fields)
+        tasks = {row["id"]: row for row in rows}
+        return Response({"results": [task_row(tasks[task_id]) for task_id in ids if task_id in tasks]})
+
+
+class MyTaskChangesView(APIView):
+    """
+    API инкрементальной синхронизации задач текущего пользователя.
+
+    Возвращает задачи, измененные после водяного знака ``since``, и ID
+    удаленных задач (см. tasks.sync). Без ``since`` возвращает все задачи
+    порциями. Пока ``has_more`` истинно, клиент повторяет запрос с новым
+    ``since``; последний водяной знак сохраняется до следующей
+    синхронизации. Поддерживает проекцию ``fields``.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Возвращает изменения задач.
+
+        Args:
+            request: HTTP запрос с параметрами since, limit и fields
+
+        Returns:
+            Response: changed, deleted, since и has_more; 410, если
+                водяной знак старше срока хранения удалений и нужна
+                полная синхронизация
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", SYNC_LIMIT)), MAX_SYNC_LIMIT)
+        except ValueError:
+            return Response({"limit": "Expected an integer"}, status=400)
+        if limit < 1:
+            return Response({"limit": "Expected a positive integer"}, status=400)
+        fields = parse_fields(request.query_params)
+        try:
+            since = parse_since(request.query_params.get("since"))
+        except SyncExpired:
+            return Response({"since": "Watermark expired, full sync required"}, status=410)
+
+        return Response(changes_since(request.user.id, since, limit, fields))
+
+
+def item_errors(serializer):
+    """
+    Возвращает ошибки валидации пакета только для невалидных элементов.
+
+    Args:
+        serializer: Сериализатор с many=True после is_valid()
+
+    Returns:
+        list | dict: [{"index": i, "errors": {...}}, ...] или ошибка пакета целиком
+    """
+    errors = serializer.errors
+    if isinstance(errors, dict):
+        # DRF возвращает ошибки элементов словарем {индекс: ошибки}
+        if not all(isinstance(key, int) for key in errors):
+            return errors
+        errors = [errors.get(index) for index in range(max(errors) + 1)]
+    return [
+        {"index": index, "errors": item}
+        for index, item in enumerate(errors)
+        if item
+    ]
+
 
 class TaskCreateView(generics.CreateAPIView):
     """
     Представление для создания новых задач.
     
     Создает новую задачу для аутентифицированного пользователя.
-    Автоматически создает список задач по умолчанию, если у пользователя
-    его еще нет. После создания отправляет уведомления через WebSocket
-    и планирует отправку уведомления в Telegram.
+    Задача попадает в переданный список task_list (он должен
+    принадлежать пользователю) или в список по умолчанию, ID которого
+    берется из кэша. После создания планирует отправку уведомления в Telegram.
     
     Attributes:
         serializer_class: Сериализатор для задач
@@ -74,59 +288,237 @@ class TaskCreateView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         """
-        Создает задачу с автоматическим назначением пользователя и списка.
+        Создает задачу с назначением пользователя и списка по умолчанию.
         
         Args:
             serializer: Сериализатор с валидными данными задачи
         """
         user = self.request.user
-        task_list = TaskList.objects.filter(owner=user).first()
-
-        if not task_list:
-            task_list = TaskList.objects.create(name="Default", owner=user)
+        extra = {}
+        if serializer.validated_data.get('task_list') is None:
+            extra['task_list_id'] = get_default_task_list_id(user.id)
 
-        task = serializer.save(
-            assigned_to=user,
-            task_list=task_list
-        )
-        notify_tasks_updated()
+        task = serializer.save(assigned_to=user, **extra)
         send_new_task_notification.delay(user.id, task.id)
 
-class TaskCompleteView(generics.UpdateAPIView):
+class TaskCompleteView(APIView):
     """
     Представление для отметки задач как выполненных.
     
     Позволяет пользователям отмечать свои задачи как выполненные
-    через PATCH запрос. После обновления отправляет уведомление
-    через WebSocket для обновления интерфейса в реальном времени.
+    через PATCH запрос. Задача отмечается одним условным UPDATE
+    (см. tasks.completion), повторный запрос ничего не меняет.
+    Событие WebSocket для обновления интерфейса отправляется после
+    фиксации транзакции.
     
     Attributes:
-        queryset: Все задачи в системе
-        serializer_class: Сериализатор для задач
         permission_classes: Требуется аутентификация
     """
-    queryset = Task.objects.all()
-    serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def patch(self, request, *args, **kwargs):
+    def patch(self, request, pk):
         """
         Отмечает задачу как выполненную.
         
         Args:
             request: HTTP запрос
-            *args, **kwargs: Дополнительные аргументы
+            pk: ID задачи
             
         Returns:
-            Response: Обновленные данные задачи
+            Response: Обновленные данные задачи или 404 для чужой задачи
         """
-        task = self.get_object()
-        task.completed = True
-        task.save()
-        notify_tasks_updated()
-        return self.retrieve(request, *args, **kwargs)
-        
-    
+        task, completed = complete_task(pk, request.user.id)
+        if task is None:
+            raise NotFound()
+        if completed:
+            events.publish(
+                request.user.id, events.task_delta("task_completed", task, {"completed": True})
+            )
+        return Response(TaskSerializer(task).data)
+
+
+class BulkTaskCreateView(APIView):
+    """
+    API для массового создания задач.
+
+    Принимает массив задач, проверяет каждую и создает все задачи
+    одним bulk_create в одной транзакции в списке по умолчанию.
+    Если хотя бы одна задача невалидна, ничего не создается, а в ответе
+    перечисляются ошибки по индексам элементов. После фиксации
+    отправляется одно событие WebSocket и одно пакетное уведомление
+    в Telegram.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Создает пакет задач.
+
+        Args:
+            request: HTTP запрос с массивом задач в data
+
+        Returns:
+            Response: ID созданных задач (201) или ошибки по элементам (400)
+        """
+        serializer = BulkTaskCreateSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=settings.BULK_TASKS_MAX_ITEMS,
+        )
+        if not serializer.is_valid():
+            return Response({"errors": item_errors(serializer)}, status=400)
+
+        user = request.user
+        with transaction.atomic():
+            task_list_id = get_default_task_list_id(user.id)
+            tasks = Task.objects.bulk_create(
+                [
+                    Task(**item, assigned_to=user, task_list_id=task_list_id)
+                    for item in serializer.validated_data
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            ids = [task.id for task in tasks]
+            stats.apply_delta(
+                user.id, total=len(tasks), completed=sum(task.completed for task in tasks)
+            )
+            events.tasks_updated(user.id)
+            transaction.on_commit(
+                lambda: send_new_tasks_notification.delay(user.id, ids)
+            )
+            transaction.on_commit(lambda: schedule_overdue_alerts.delay(ids))
+        return Response({"ids": ids}, status=201)
+
+
+class BulkTaskCompleteView(APIView):
+    """
+    API для массовой отметки задач как выполненных.
+
+    Все задачи отмечаются одним UPDATE. Если среди ID есть чужие
+    или несуществующие задачи, ничего не меняется, а в ответе
+    перечисляются ошибочные ID. Повторная отметка выполненной задачи
+    ошибкой не считается.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Отмечает пакет задач как выполненные.
+
+        Args:
+            request: HTTP запрос с {"ids": [...]} в data
+
+        Returns:
+            Response: Число измененных задач, ошибки по ID
+                или 400 для тела другого вида
+        """
+        serializer = BulkTaskCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"errors": serializer.errors}, status=400)
+        ids = set(serializer.validated_data["ids"])
+
+        user = request.user
+        with transaction.atomic():
+            tasks = Task.objects.filter(assigned_to=user, id__in=ids)
+            found = set(tasks.values_list("id", flat=True))
+            missing = ids - found
+            if missing:
+                return Response({"errors": [
+                    {"id": task_id, "errors": "Task not found or not yours"}
+                    for task_id in sorted(missing)
+                ]}, status=400)
+
+            updated = tasks.filter(completed=False).update(
+                completed=True, version=F("version") + 1, updated_at=timezone.now()
+            )
+            if updated:
+                stats.apply_delta(user.id, completed=updated)
+                events.tasks_updated(user.id)
+        return Response({"completed": updated})
+
+
+class BulkTaskUpdateView(APIView):
+    """
+    API для массового изменения задач.
+
+    Принимает массив объектов {"id": ..., <поля>}; изменяются только
+    переданные поля. Все задачи сохраняются одним bulk_update в одной
+    транзакции. Ошибки валидации и чужие/несуществующие ID
+    возвращаются по индексам элементов, и тогда ничего не меняется.
+    Для задач с перенесённым сроком заново планируются уведомления
+    о просрочке.
+
+    Attributes:
+        permission_classes: Требуется аутентификация
+    """
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request):
+        """
+        Изменяет пакет задач.
+
+        Args:
+            request: HTTP запрос с массивом изменений в data
+
+        Returns:
+            Response: Число измененных задач или ошибки по элементам
+        """
+        serializer = BulkTaskUpdateSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=settings.BULK_TASKS_MAX_ITEMS,
+        )
+        if not serializer.is_valid():
+            return Response({"errors": item_errors(serializer)}, status=400)
+
+        items = serializer.validated_data
+        user = request.user
+        with transaction.atomic():
+            tasks = Task.objects.select_for_update().in_bulk(
+                [item["id"] for item in items]
+            )
+            errors = [
+                {"index": index, "errors": {"id": ["Task not found or not yours"]}}
+                for index, item in enumerate(items)
+                if item["id"] not in tasks or tasks[item["id"]].assigned_to_id != user.id
+            ]
+            if errors:
+                return Response({"errors": errors}, status=400)
+
+            fields = {"version", "updated_at"}
+            rescheduled = []
+            completed = 0
+            now = timezone.now()
+            for item in items:
+                task = tasks[item["id"]]
+                for name, value in item.items():
+                    if name != "id":
+                        setattr(task, name, value)
+                        fields.add(name)
+            # Итог считается по задаче, а не по элементу: сравнивается
+            # конечное состояние с загруженным из базы
+            for task in tasks.values():
+                task.updated_at = now
+                task.version += 1
+                changed = task.changed_fields()
+                if "deadline" in changed:
+                    task.overdue_notified_at = None
+                    fields.add("overdue_notified_at")
+                    rescheduled.append(task.id)
+                if "completed" in changed:
+                    completed += 1 if task.completed else -1
+            Task.objects.bulk_update(tasks.values(), fields, batch_size=BULK_BATCH_SIZE)
+            stats.apply_delta(user.id, completed=completed)
+            events.tasks_updated(user.id)
+            if rescheduled:
+                transaction.on_commit(lambda: schedule_overdue_alerts.delay(rescheduled))
+        return Response({"updated": len(tasks)})
+
+
 class LinkTelegramView(APIView):
     """
     API для привязки аккаунта пользователя к Telegram.
@@ -153,6 +545,10 @@ class LinkTelegramView(APIView):
         telegram_id = request.data.get("telegram_id")
         if not telegram_id:
             return Response({"error": "telegram_id is required"}, status=400)
+        try:
+            telegram_id = int(telegram_id)
+        except (TypeError, ValueError):
+            return Response({"error": "telegram_id must be an integer"}, status=400)
 
         profile, created = TelegramProfile.objects.get_or_create(
             user=request.user,
@@ -166,78 +562,153 @@ class LinkTelegramView(APIView):
         return Response({"message": "Telegram-аккаунт привязан!"})
 
 
-class TelegramTaskList(APIView):
+def json_response(data, status=200):
+    """Возвращает JSON ответ async представления в том же виде, что и у DRF."""
+    return HttpResponse(render_json(data), status=status, content_type="application/json")
+
+
+def error_response(exc):
+    """Преобразует исключение DRF в JSON ответ того же вида, что у APIView."""
+    data = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return json_response(data, status=exc.status_code)
+
+
+def request_data(request):
+    """
+    Разбирает тело POST запроса async представления.
+
+    Args:
+        request (HttpRequest): Запрос с JSON или form-data телом
+
+    Returns:
+        dict | None: Данные запроса или None, если JSON некорректен
+    """
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+# Отметка выполнения выполняется в потоке, как и запросы async ORM Django
+acomplete_task = sync_to_async(complete_task)
+
+
+class AsyncBotView(View):
+    """
+    Базовое async представление для эндпоинтов Telegram бота.
+
+    Обслуживается прямо в цикле событий ASGI сервера без перехода
+    в поток: запросы к кэшу и базе идут через async API Django,
+    события отправляются в channel layer через await. Бот
+    не аутентифицируется и не передает CSRF токен.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+
+class TelegramTaskList(AsyncBotView):
     """
     API для получения списка задач через Telegram бота.
     
-    Позволяет Telegram боту получать список задач пользователя
+    Позволяет Telegram боту постранично получать задачи пользователя
     по его Telegram ID. Используется для отображения задач
-    непосредственно в Telegram чате.
+    непосредственно в Telegram чате. Пользователь по Telegram ID
+    определяется через кэш (см. tasks.cache). Как и MyTaskListView,
+    отвечает 304 на совпадающий If-None-Match.
     """
     
-    def get(self, request):
+    async def get(self, request):
         """
-        Возвращает список задач пользователя по Telegram ID.
+        Возвращает страницу задач пользователя по Telegram ID.
+        
+        Принимает те же параметры пагинации, фильтрации и проекции,
+        что и MyTaskListView.
         
         Args:
             request: HTTP запрос с telegram_id в параметрах
             
         Returns:
-            Response: Список задач пользователя или ошибку
+            JsonResponse: Страница задач пользователя или ошибку
         """
         telegram_id = request.GET.get("telegram_id")
         if not telegram_id:
-            return Response({"error": "telegram_id is required"}, status=400)
-
+            return json_response({"error": "telegram_id is required"}, status=400)
         try:
-            profile = TelegramProfile.objects.get(telegram_id=telegram_id)
-        except TelegramProfile.DoesNotExist:
-            return Response({"error": "User not linked"}, status=404)
+            user_id = await aget_user_id_for_telegram(int(telegram_id))
+        except ValueError:
+            return json_response({"error": "telegram_id must be an integer"}, status=400)
+        if user_id is None:
+            return json_response({"error": "User not linked"}, status=404)
 
-        tasks = Task.objects.filter(assigned_to=profile.user)
-        serializer = TaskSerializer(tasks, many=True)
-        notify_tasks_updated()
-        return Response(serializer.data)
+        etag = task_list_etag(user_id, await stats.aget_revision(user_id), request)
+        if etag_matches(request, etag):
+            return set_validator(HttpResponse(status=304), etag)
+
+        paginator = TaskCursorPagination()
+        try:
+            tasks, fields = filter_tasks(
+                Task.objects.filter(assigned_to_id=user_id), request.GET
+            )
+            rows, task_row = task_rows(tasks, fields)
+            page = await paginator.apaginate_queryset(rows, request.GET)
+        except APIException as e:
+            return error_response(e)
+        return set_validator(json_response(paginator.page_data([task_row(row) for row in page])), etag)
 
 
-class TelegramCompleteTask(APIView):
+class TelegramCompleteTask(AsyncBotView):
     """
     API для отметки задач как выполненных через Telegram бота.
     
     Позволяет пользователям отмечать свои задачи как выполненные
-    непосредственно из Telegram чата через бота.
+    непосредственно из Telegram чата через бота. Задача отмечается
+    тем же условным UPDATE, что и в TaskCompleteView (см.
+    tasks.completion), событие task_completed отправляется отсюда же.
     """
     
-    def post(self, request):
+    async def post(self, request):
         """
         Отмечает задачу как выполненную по запросу от Telegram бота.
         
         Args:
-            request: HTTP запрос с telegram_id и task_id в data
+            request: HTTP запрос с telegram_id и task_id в теле
             
         Returns:
-            Response: Сообщение о успешном выполнении или ошибке
+            JsonResponse: Сообщение о успешном выполнении или ошибке
         """
-        telegram_id = request.data.get("telegram_id")
-        task_id = request.data.get("task_id")
+        data = request_data(request)
+        if data is None:
+            return json_response({"error": "Invalid JSON"}, status=400)
+        telegram_id = data.get("telegram_id")
+        task_id = data.get("task_id")
 
         if not telegram_id or not task_id:
-            return Response({"error": "telegram_id and task_id required"}, status=400)
-
+            return json_response({"error": "telegram_id and task_id required"}, status=400)
         try:
-            profile = TelegramProfile.objects.get(telegram_id=telegram_id)
-        except TelegramProfile.DoesNotExist:
-            return Response({"error": "User not linked"}, status=404)
+            user_id = await aget_user_id_for_telegram(int(telegram_id))
+        except (TypeError, ValueError):
+            return json_response({"error": "telegram_id must be an integer"}, status=400)
+        if user_id is None:
+            return json_response({"error": "User not linked"}, status=404)
 
         try:
-            task = Task.objects.get(id=task_id, assigned_to=profile.user)
-        except Task.DoesNotExist:
-            return Response({"error": "Task not found or not yours"}, status=404)
+            task, completed = await acomplete_task(int(task_id), user_id)
+        except (TypeError, ValueError):
+            task = None
+        if task is None:
+            return json_response({"error": "Task not found or not yours"}, status=404)
+        if completed:
+            await events.asend_to_user(
+                user_id, events.task_delta("task_completed", task, {"completed": True})
+            )
+        return json_response({"message": "Task completed ✅"})
+
 
-        task.completed = True
-        task.save()
-        return Response({"message": "Task completed ✅"})
-    
 def index(request):
     """
     Отображает главную страницу веб-приложения.
@@ -248,4 +719,30 @@ def index(request):
     Returns:
         HttpResponse: Рендер главной страницы (index.html)
     """
-    return render(request, 'index.html')
\ No newline at end of file
+    return render(request, 'index.html')
+
+
+def prometheus_metrics(request):
+    """
+    Отдает метрики всех процессов в текстовом формате Prometheus.
+
+    Требует заголовок ``Authorization: Bearer <токен>`` с токеном
+    REQUEST_METRICS['TOKEN']. Если токен не задан, метрики недоступны:
+    адрес клиента за обратным прокси не отличить от внутреннего.
+
+    Args:
+        request: HTTP запрос
+
+    Returns:
+        HttpResponse: Метрики, 403 без настроенного токена
+            или 401 без верного токена
+    """
+    token = settings.REQUEST_METRICS['TOKEN']
+    if not token:
+        return HttpResponse(status=403)
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )